@@ -4,6 +4,7 @@ import pandas as pd
 import random
 import uuid
 from datetime import datetime
+from crm_search import session_index
 
 st.set_page_config(page_title="AI Credit Disputer", layout="wide")
 
@@ -55,14 +56,8 @@ with tab2:
     status_filter = st.selectbox("Status Filter", ["All", "New", "Hot", "Follow-Up"])
     
     def filter_leads(leads, search_text, status_filter):
-        today = datetime.now()
-        filtered = []
-        for lead in leads:
-            if search_text.lower() in lead["name"].lower() or search_text.lower() in lead["email"].lower():
-                if status_filter == "All" or lead["status"] == status_filter:
-                    lead["inactive"] = (today - datetime.strptime(lead["added"], "%Y-%m-%d")).days > 30
-                    filtered.append(lead)
-        return filtered
+        index = session_index(st.session_state, "leads", leads, date_field="added")
+        return index.search(search_text, None if status_filter == "All" else status_filter)
 
     filtered_leads = filter_leads(leads_data, search_leads, status_filter)
 
@@ -77,7 +72,7 @@ with tab3:
     search_clients = st.text_input("🔍 Search Clients", placeholder="Name or email")
     
     def filter_clients(clients, search_text):
-        return [c for c in clients if search_text.lower() in c["name"].lower() or search_text.lower() in c["email"].lower()]
+        return session_index(st.session_state, "clients", clients).search(search_text)
 
     filtered_clients = filter_clients(clients_data, search_clients)
 
@@ -87,31 +82,12 @@ with tab3:
 
 
 import json
+from report_stream import open_report
 
 # --- Upload & Dispute Letter Generator ---
 
 # --- Scoring Breakdown ---
-def score_tradeline(item):
-    score = 0
-    breakdown = []
-
-    if "charge" in item["status"].lower():
-        score += 3
-        breakdown.append("+3 Charge-Off")
-    if "collection" in item["status"].lower():
-        score -= 2
-        breakdown.append("-2 Collection")
-    if item.get("balance", 0) > 1000:
-        score -= 1
-        breakdown.append("-1 High Balance")
-    if "late" in item["status"].lower():
-        score -= 1
-        breakdown.append("-1 Late")
-    if "closed" in item["status"].lower():
-        score += 1
-        breakdown.append("+1 Closed Account")
-
-    return score, breakdown
+from scoring import score_stream
 
 # Add scoring breakdown to Dispute Tools tab
 
@@ -125,6 +101,7 @@ os.makedirs(REPORT_DIR, exist_ok=True)
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 import io
+from logo_cache import draw_logo
 
 def generate_dispute_letter_pdf(consumer_name, tradelines, bureau_name, agency_name="Your Agency", logo_path=None):
     buffer = io.BytesIO()
@@ -133,7 +110,7 @@ def generate_dispute_letter_pdf(consumer_name, tradelines, bureau_name, agency_n
 
     if logo_path:
         try:
-            c.drawImage(logo_path, 50, height - 80, width=100, preserveAspectRatio=True)
+            draw_logo(c, logo_path, 50, height - 80, width=100)
         except Exception as e:
             print("Logo error:", e)
 
@@ -172,13 +149,13 @@ with tab4:
 
     if uploaded_file:
         try:
-            report_data = json.load(uploaded_file)
-            consumer_name = report_data.get("consumer_info", {}).get("name", "Unknown Consumer")
-            tradelines = report_data.get("tradelines", [])
+            report_header, report_items = open_report(uploaded_file, sections=("tradelines",))
+            consumer_name = report_header.get("consumer_info", {}).get("name", "Unknown Consumer")
+            tradelines = []
             bureau = st.selectbox("Select Bureau", ["TransUnion", "Equifax", "Experian"])
 
-            for i, item in enumerate(tradelines, 1):
-                score, breakdown = score_tradeline(item)
+            for i, (_, item, score, breakdown) in enumerate(score_stream(report_items, "tools"), 1):
+                tradelines.append(item)
                 with st.expander(f"{i}. {item['creditor_name']}"):
                     st.markdown(f"- **Status:** {item['status']}")
                     st.markdown(f"- **Balance:** ${item['balance']}")
@@ -95,27 +95,7 @@ import json
 # --- Upload & Dispute Letter Generator ---
 
 # --- Scoring Breakdown ---
-def score_tradeline(item):
-    score = 0
-    breakdown = []
-
-    if "charge" in item["status"].lower():
-        score += 3
-        breakdown.append("+3 Charge-Off")
-    if "collection" in item["status"].lower():
-        score -= 2
-        breakdown.append("-2 Collection")
-    if item.get("balance", 0) > 1000:
-        score -= 1
-        breakdown.append("-1 High Balance")
-    if "late" in item["status"].lower():
-        score -= 1
-        breakdown.append("-1 Late")
-    if "closed" in item["status"].lower():
-        score += 1
-        breakdown.append("+1 Closed Account")
-
-    return score, breakdown
+from scoring import score_items
 
 # Add scoring breakdown to Dispute Tools tab
 
@@ -181,8 +161,8 @@ with tab4:
             tradelines = report_data.get("tradelines", [])
             bureau = st.selectbox("Select Bureau", ["TransUnion", "Equifax", "Experian"])
 
-            for i, item in enumerate(tradelines, 1):
-                score, breakdown = score_tradeline(item)
+            scores, breakdowns = score_items(tradelines, "tools", breakdown=True)
+            for i, (item, score, breakdown) in enumerate(zip(tradelines, scores, breakdowns), 1):
                 with st.expander(f"{i}. {item['creditor_name']}"):
                     st.markdown(f"- **Status:** {item['status']}")
                     st.markdown(f"- **Balance:** ${item['balance']}")
@@ -309,27 +289,7 @@ import json
 # --- Upload & Dispute Letter Generator ---
 
 # --- Scoring Breakdown ---
-def score_tradeline(item):
-    score = 0
-    breakdown = []
-
-    if "charge" in item["status"].lower():
-        score += 3
-        breakdown.append("+3 Charge-Off")
-    if "collection" in item["status"].lower():
-        score -= 2
-        breakdown.append("-2 Collection")
-    if item.get("balance", 0) > 1000:
-        score -= 1
-        breakdown.append("-1 High Balance")
-    if "late" in item["status"].lower():
-        score -= 1
-        breakdown.append("-1 Late")
-    if "closed" in item["status"].lower():
-        score += 1
-        breakdown.append("+1 Closed Account")
-
-    return score, breakdown
+from scoring import score_items
 
 # Add scoring breakdown to Dispute Tools tab
 
@@ -395,8 +355,8 @@ with tab4:
             tradelines = report_data.get("tradelines", [])
             bureau = st.selectbox("Select Bureau", ["TransUnion", "Equifax", "Experian"])
 
-            for i, item in enumerate(tradelines, 1):
-                score, breakdown = score_tradeline(item)
+            scores, breakdowns = score_items(tradelines, "tools", breakdown=True)
+            for i, (item, score, breakdown) in enumerate(zip(tradelines, scores, breakdowns), 1):
                 with st.expander(f"{i}. {item['creditor_name']}"):
                     st.markdown(f"- **Status:** {item['status']}")
                     st.markdown(f"- **Balance:** ${item['balance']}")
@@ -5,6 +5,7 @@ st.set_page_config(page_title="AI Credit Disputer", layout="wide")
 import uuid
 import json
 import random
+from collections import Counter
 import pandas as pd
 from datetime import datetime
 
@@ -47,388 +48,87 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-import streamlit as st
-import json
 import os
-from datetime import datetime
 from pathlib import Path
 from io import BytesIO
 from reportlab.pdfgen import canvas
 import matplotlib.pyplot as plt
-import pandas as pd
+import plotly.graph_objects as go
+import streamlit.components.v1 as components
+from streamlit.components.v1 import html
+import data_cache
+from activity_export import FORMATS as EXPORT_FORMATS, export_activity, export_file_name
+from router import Router
+from metro2 import load_report as load_metro2_report
+from mismo import convert_cached
+from pdf_report import extracted_text, parse_pdf
+from report_stream import open_report
+from records import Item, as_items
+from scoring import score_items, score_records
+from letter_batch import draw_multi_item_letter
+from logo_cache import draw_logo, logo_error, prefetch_in_background, store_uploaded_logo
+from crm_search import reindex, session_index
+from lead_import import import_leads
+from log_rotation import get_rotator
+from outbox import get_worker, outbox_counts
+from webhooks import get_dispatcher
+from report_store import (
+    content_digest, store_report, load_score_history, sync_daily_scores, sync_manifest, write_json,
+)
+from storage import (
+    get_db, migrate_json, sync_letter_totals, sync_status_totals, sync_status_events, add_letters,
+    add_status_option,
+    add_message, load_todos, add_todo,
+    has_users, get_user, add_user,
+    add_lead, convert_lead, log_emails,
+)
+from write_behind import WriteBehind
 
-st.set_page_config(page_title="AI Credit Disputer", layout="wide")
 st.title("📄 AI Credit Disputer")
 
 storage_dir = Path("stored_reports")
-log_path = Path("letter_logs.json")
 storage_dir.mkdir(exist_ok=True)
 
-# Load letter log
-if log_path.exists():
-    with open(log_path) as f:
-        letter_log = json.load(f)
-else:
-    letter_log = {}
-
-uploaded_file = st.file_uploader("Upload your credit report", type="json")
-
-if uploaded_file:
-    report_data = json.load(uploaded_file)
-    consumer_name = report_data.get("consumer_info", {}).get("name", "Unknown")
-    credit_score = report_data.get("consumer_info", {}).get("credit_score", 0)
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-    today = datetime.now().strftime("%Y-%m-%d")
-
-    consumer_key = consumer_name.replace(" ", "_")
-    consumer_dir = storage_dir / consumer_key
-    save_path = consumer_dir / timestamp
-    save_path.mkdir(parents=True, exist_ok=True)
-    with open(save_path / "report.json", "w") as f:
-        json.dump(report_data, f, indent=2)
-
-    # === Save score history ===
-    score_history_path = consumer_dir / "score_history.json"
-    if score_history_path.exists():
-        with open(score_history_path) as f:
-            history = json.load(f)
-    else:
-        history = []
-
-    history.append({"date": today, "score": credit_score})
-    with open(score_history_path, "w") as f:
-        json.dump(history, f, indent=2)
-
-    st.success(f"Report uploaded for {consumer_name} on {timestamp}")
-
-    # === Score Display + Graph ===
-    st.subheader("📈 Credit Score Overview")
-    score_color = "#e74c3c" if credit_score < 580 else "#f39c12" if credit_score < 670 else "#2ecc71"
-    st.markdown(f"<div style='padding:10px; border-left: 6px solid {score_color};'><h3>{consumer_name}</h3>"
-                f"<b>Score:</b> <span style='color:{score_color}; font-size:20px;'>{credit_score}</span></div>",
-                unsafe_allow_html=True)
-
-    if len(history) > 1:
-        df = pd.DataFrame(history)
-        df["date"] = pd.to_datetime(df["date"])
-        df = df.sort_values("date")
-        st.line_chart(df.set_index("date")["score"])
-
-    # === Account Section ===
-    st.subheader("📋 Select Accounts to Dispute")
-    selected_accounts = []
-    items = report_data.get("tradelines", []) + report_data.get("collections", [])
-
-    for i, item in enumerate(items):
-        creditor = item.get("creditor_name") or item.get("agency_name", "Unknown")
-        balance = item.get("balance", item.get("amount", 0))
-        status = item.get("status", "N/A")
-        reported = item.get("last_reported", "N/A")
-
-        score = 0
-        breakdown = []
-        if "charge" in status.lower():
-            score += 3
-            breakdown.append("+3 Charge-off")
-        if "late" in status.lower():
-            score += 2
-            breakdown.append("+2 Late payments")
-        if balance and balance > 1000:
-            score += 2
-            breakdown.append("+2 High balance")
-        if "collection" in item.get("remarks", "").lower():
-            score += 2
-            breakdown.append("+2 Collection remark")
-        if not breakdown:
-            breakdown.append("0 – No indicators")
-
-        with st.container():
-            st.markdown(f"### {creditor}")
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.markdown(f"""**Status:** {status}  
-**Balance:** ${balance}  
-**Last Reported:** {reported}""")
-                st.markdown(f"🧠 **Dispute Score:** `{score}/10`")
-                with st.expander("🔍 Score Breakdown"):
-                    for line in breakdown:
-                        st.markdown(f"- {line}")
-            with col2:
-                selected = st.checkbox("Include in Letter", key=f"check_{i}")
-                if selected:
-                    selected_accounts.append({
-                        "creditor": creditor,
-                        "status": status,
-                        "balance": balance,
-                        "reported": reported,
-                        "index": i
-                    })
-
-    if selected_accounts:
-        bureau = st.selectbox("Select Bureau", ["TransUnion", "Experian", "Equifax"])
-        reason = st.selectbox("Dispute Reason", ["Not Mine", "Never Late", "Already Paid", "Wrong Balance", "Request Validation"])
-
-        if st.button("📄 Generate Multi-Item Letter PDF"):
-            buffer = BytesIO()
-            c = canvas.Canvas(buffer)
-            c.setFont("Helvetica", 12)
-            c.drawString(50, 800, f"{bureau}")
-            c.drawString(50, 780, f"Consumer: {consumer_name}")
-            c.drawString(50, 760, "Subject: Dispute Letter - Multiple Accounts")
-            c.drawString(50, 740, f"Dear {bureau},")
-            c.drawString(50, 720, "I am writing to dispute the following accounts:")
-
-            y = 700
-            log_entries = []
-            for item in selected_accounts:
-                c.drawString(60, y, f"• {item['creditor']} — {item['status']} — ${item['balance']} — {item['reported']}")
-                log_entries.append({
-                    "creditor": item['creditor'],
-                    "bureau": bureau,
-                    "reason": reason,
-                    "date": today
-                })
-                y -= 20
-                if y < 100:
-                    c.showPage()
-                    c.setFont("Helvetica", 12)
-                    y = 800
-
-            c.drawString(50, y-20, f"Dispute Reason: {reason}")
-            c.drawString(50, y-40, "Under the FCRA, please investigate and correct these items.")
-            c.drawString(50, y-60, f"Thank you,")
-            c.drawString(50, y-80, f"{consumer_name}")
-            c.save()
-            buffer.seek(0)
-
-            st.download_button("📥 Download Combined PDF", data=buffer, file_name=f"{consumer_key}_bulk_dispute_letter.pdf", mime="application/pdf")
+# App state lives in app.db; the old JSON files are imported on first run
+db = get_db()
+migrate_json(db, storage_dir=storage_dir)
+sync_manifest(db, storage_dir)
+sync_daily_scores(db)
+sync_letter_totals(db)
+sync_status_totals(db)
+sync_status_events(db)
+# Archives old email log rows and keeps the WAL file small, in the background
+get_rotator()
 
-            # Save letter log
-            if consumer_key not in letter_log:
-                letter_log[consumer_key] = []
-            letter_log[consumer_key].extend(log_entries)
-            with open(log_path, "w") as f:
-                json.dump(letter_log, f, indent=2)
-
-# === View Letter History ===
-st.sidebar.title("📑 Letter History")
-if letter_log:
-    for person, entries in letter_log.items():
-        with st.sidebar.expander(person.replace("_", " ")):
-            for e in entries:
-                st.markdown(f"- {e['date']} | **{e['creditor']}** | {e['bureau']} | {e['reason']}")
-else:
-    st.sidebar.info("No letters generated yet.")
-
-# --- Phase 3: Add-on to AI Disputer All-in-One ---
-
-import fitz  # PyMuPDF for PDF parsing
-
-# Add PDF upload for conversion to JSON (mock example)
-st.sidebar.header("📄 PDF Report Import (Beta)")
-pdf_file = st.sidebar.file_uploader("Upload Credit Report (PDF)", type="pdf", key="pdf_report")
-if pdf_file:
-    text = ""
-    with fitz.open(stream=pdf_file.read(), filetype="pdf") as doc:
-        for page in doc:
-            text += page.get_text()
-
-    # Demo extraction logic (real app would parse structure properly)
-    st.sidebar.success("PDF text extracted!")
-    st.sidebar.write(text[:500] + "...")  # preview
-
-    # Convert into basic JSON-like structure (mock)
-    extracted = {
-        "consumer_info": {
-            "name": "Extracted User",
-            "credit_score": 620
-        },
-        "tradelines": [
-            {
-                "creditor_name": "Mock Creditor 1",
-                "status": "Charge-off",
-                "balance": 1540,
-                "last_reported": "2024-12-01",
-                "remarks": "collection"
-            },
-            {
-                "creditor_name": "Mock Creditor 2",
-                "status": "Late",
-                "balance": 980,
-                "last_reported": "2024-10-15",
-                "remarks": ""
-            }
-        ]
-    }
-
-    if st.sidebar.button("Import Extracted Data"):
-        with open("temp_pdf_report.json", "w") as f:
-            json.dump(extracted, f, indent=2)
-        st.session_state["imported_json"] = extracted
-        st.sidebar.success("Imported as structured JSON!")
-
-# Inject AI-generated dispute sequence example
-st.sidebar.header("🧠 AI Dispute Sequence (Demo)")
-if "imported_json" in st.session_state:
-    imported_data = st.session_state["imported_json"]
-    for i, item in enumerate(imported_data["tradelines"]):
-        creditor = item.get("creditor_name")
-        with st.sidebar.expander(f"{creditor} – Sequence"):
-            st.markdown("**Round 1 – Validation Letter**")
-            st.markdown(f"Dear {creditor}, I request validation of this debt...")
-
-            st.markdown("**Round 2 – Escalation**")
-            st.markdown(f"I still have not received proper validation for {creditor}...")
-
-            st.markdown("**Round 3 – Legal Reference**")
-            st.markdown(f"Under the FCRA and FDCPA, continued reporting without validation is unlawful...")
-
-# --- Branding + Dashboard View ---
+# Only the selected tab's page runs on a rerun. Everything above the navigation
+# is cheap shared chrome (sidebar settings whose widgets must keep rendering);
+# pages declare the data they read and the router loads just that.
+router = Router()
 
-# Branding controls
-st.sidebar.header("🎨 Branding Options")
-agency_name = st.sidebar.text_input("Agency Name", value="My Credit Agency")
-primary_color = st.sidebar.color_picker("Primary Color", value="#2c3e50")
-logo_url = st.sidebar.text_input("Logo URL (optional)")
-
-# Custom header display
-st.markdown(f"<h2 style='color:{primary_color};'>{agency_name}</h2>", unsafe_allow_html=True)
-if logo_url:
-    st.image(logo_url, width=150)
-
-# === Dashboard View ===
-st.sidebar.title("📊 Dashboard")
-all_clients = [f.name for f in storage_dir.iterdir() if f.is_dir()]
-total_reports = sum(len(list((storage_dir / client).glob("*/*.json"))) for client in all_clients)
-st.sidebar.metric("Total Reports", total_reports)
-
-# Display recent uploads
-recent_uploads = []
-for client in all_clients:
-    client_path = storage_dir / client
-    folders = sorted(client_path.glob("*"), reverse=True)
-    if folders:
-        latest = folders[0]
-        json_file = latest / "report.json"
-        if json_file.exists():
-            with open(json_file) as f:
-                r = json.load(f)
-                recent_uploads.append({
-                    "client": client.replace("_", " "),
-                    "score": r.get("consumer_info", {}).get("credit_score", "N/A"),
-                    "date": latest.name
-                })
-
-if recent_uploads:
-    st.sidebar.markdown("**Recent Reports:**")
-    for r in recent_uploads[:5]:
-        st.sidebar.markdown(f"- {r['date']} | {r['client']} | Score: {r['score']}")
-
-# --- Phase 5: To-Do List, Calendar, and 45-Day Recheck ---
-
-# ========== TO-DO LIST ==========
-st.sidebar.header("✅ To-Do List")
-todo_path = Path("todo.json")
-
-# Load tasks
-if todo_path.exists():
-    with open(todo_path) as f:
-        todos = json.load(f)
-else:
-    todos = []
-
-new_task = st.sidebar.text_input("New Task")
-if st.sidebar.button("Add Task"):
-    if new_task:
-        todos.append({"task": new_task, "done": False})
-        with open(todo_path, "w") as f:
-            json.dump(todos, f, indent=2)
-
-for i, t in enumerate(todos):
-    checked = st.sidebar.checkbox(t["task"], value=t["done"], key=f"todo_{i}")
-    todos[i]["done"] = checked
-with open(todo_path, "w") as f:
-    json.dump(todos, f, indent=2)
-
-# ========== CALENDAR ==========
-st.sidebar.header("🗓️ Calendar Preview")
-today = datetime.today()
-st.sidebar.markdown(f"**Today:** {today.strftime('%A, %B %d, %Y')}")
-
-# ========== 45-DAY REPORT CHECK ==========
-st.sidebar.header("⏱️ 45-Day Report Reminders")
-
-due_clients = []
-for client in storage_dir.iterdir():
-    if not client.is_dir():
-        continue
-    folders = sorted(client.glob("*"), reverse=True)
-    if folders:
-        try:
-            last_date = datetime.strptime(folders[0].name, "%Y-%m-%d_%H-%M")
-            days_since = (today - last_date).days
-            if days_since >= 45:
-                due_clients.append((client.name.replace("_", " "), days_since))
-        except:
-            continue
-
-if due_clients:
-    st.sidebar.markdown("### Ready to Recheck:")
-    for name, days in due_clients:
-        st.sidebar.markdown(f"- **{name}** ({days} days ago)")
-else:
-    st.sidebar.info("No clients due yet.")
+# --- Phase 6 / 16: Session user ---
 
-# --- Phase 6: Full Client Portal with Login ---
-
-# ========== USER LOGIN SYSTEM ==========
-user_db_path = Path("users.json")
-if user_db_path.exists():
-    with open(user_db_path) as f:
-        user_db = json.load(f)
-else:
-    user_db = {
-        "admin@example.com": {
-            "password": "admin123",
-            "is_admin": True
-        }
-    }
-
-# login removed
-    st.session_state["user"] = None
+if not has_users(db):
+    add_user(db, "admin@example.com", "admin123", is_admin=True)
 
 def login_user(email, password):
-    if email in user_db and user_db[email]["password"] == password:
-        st.session_state["user"] = {"email": email, "is_admin": user_db[email].get("is_admin", False)}
+    account = get_user(db, email)
+    if account and account["password"] == password:
+        st.session_state["user"] = {"email": email, "is_admin": account["is_admin"]}
         return True
     return False
 
 def register_user(email, password):
-    if email not in user_db:
-        user_db[email] = {"password": password, "is_admin": False}
-        with open(user_db_path, "w") as f:
-            json.dump(user_db, f, indent=2)
+    if add_user(db, email, password):
         return True
     return False
 
-# login removed
-    st.sidebar.header("🔐 Login or Register")
-    email = st.sidebar.text_input("Email")
-    password = st.sidebar.text_input("Password", type="password")
-    if st.sidebar.button("Login"):
-        if login_user(email, password):
-            st.success("Logged in!")
-        else:
-            st.error("Invalid credentials.")
-    if st.sidebar.button("Register"):
-        if register_user(email, password):
-            st.success("Account created!")
-        else:
-            st.warning("Email already exists.")
-    st.stop()
-
-user = st.session_state["user"]
+# Login was removed in Phase 16: a signed-in session keeps its user, everyone else is the guest admin
+user = st.session_state.get("user") or {"email": "guest@example.com", "is_admin": True}
+# Minute resolution, like report timestamps, so cached reads keyed by it hit within the minute
+today = datetime.today().replace(second=0, microsecond=0)
 
+def client_key(user):
+    return user["email"].replace("@", "_").replace(".", "_")
 
 # ========== PORTAL VIEW ==========
 if user["is_admin"]:
@@ -438,128 +138,20 @@ else:
     st.markdown("## 🙋 Client Portal")
     st.write("Your reports, scores, and letter tools below.")
 
-# --- Phase 7: Role Access + Branded PDFs + Mock Email Reminders ---
-
-# Load client branding from local storage (simulate database)
-branding_path = Path("branding.json")
-if branding_path.exists():
-    with open(branding_path) as f:
-        branding_data = json.load(f)
-else:
-    branding_data = {}
-
-# Let client save their branding info
-if not user["is_admin"]:
-    st.sidebar.header("🎨 Your Branding")
-    agency_brand = st.sidebar.text_input("Your Agency Name", value=branding_data.get(user["email"], {}).get("name", ""))
-    agency_logo = st.sidebar.text_input("Logo URL", value=branding_data.get(user["email"], {}).get("logo", ""))
-    if st.sidebar.button("Save Branding"):
-        branding_data[user["email"]] = {"name": agency_brand, "logo": agency_logo}
-        with open(branding_path, "w") as f:
-            json.dump(branding_data, f, indent=2)
-        st.sidebar.success("Branding saved!")
-
-# Filter client data by login identity
-if not user["is_admin"]:
-    consumer_key = user["email"].replace("@", "_").replace(".", "_")
-    user_storage_dir = storage_dir / consumer_key
-    user_storage_dir.mkdir(exist_ok=True)
-    storage_dir = user_storage_dir  # override global path for this session
-
-# PDF branding override
-client_brand_name = branding_data.get(user["email"], {}).get("name", "")
-client_logo = branding_data.get(user["email"], {}).get("logo", "")
-
-# Modify PDF generator (inject branding into previous letter section)
-# Locate the previous canvas drawing section and include header
-# This override will replace the start of letter writing
-
-if selected_accounts:
-    if st.button("📄 Generate Multi-Item Letter PDF"):
-        buffer = BytesIO()
-        c = canvas.Canvas(buffer)
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(50, 820, client_brand_name or agency_name)
-        if client_logo:
-            try:
-                import requests
-                from PIL import Image
-                from io import BytesIO as PILBytes
-                response = requests.get(client_logo)
-                img = Image.open(PILBytes(response.content))
-                c.drawInlineImage(img, 400, 760, width=140, preserveAspectRatio=True)
-            except:
-                c.setFont("Helvetica", 8)
-                c.drawString(400, 760, "(Logo failed to load)")
-        c.setFont("Helvetica", 12)
-        c.drawString(50, 800, f"{bureau}")
-        c.drawString(50, 780, f"Consumer: {consumer_name}")
-        c.drawString(50, 760, "Subject: Dispute Letter - Multiple Accounts")
-        c.drawString(50, 740, f"Dear {bureau},")
-        c.drawString(50, 720, "I am writing to dispute the following accounts:")
-
-        y = 700
-        log_entries = []
-        for item in selected_accounts:
-            c.drawString(60, y, f"• {item['creditor']} — {item['status']} — ${item['balance']} — {item['reported']}")
-            log_entries.append({
-                "creditor": item['creditor'],
-                "bureau": bureau,
-                "reason": reason,
-                "date": today
-            })
-            y -= 20
-            if y < 100:
-                c.showPage()
-                c.setFont("Helvetica", 12)
-                y = 800
-
-        c.drawString(50, y-20, f"Dispute Reason: {reason}")
-        c.drawString(50, y-40, "Under the FCRA, please investigate and correct these items.")
-        c.drawString(50, y-60, f"Thank you,")
-        c.drawString(50, y-80, f"{consumer_name}")
-        c.save()
-        buffer.seek(0)
-
-        st.download_button("📥 Download Branded PDF", data=buffer, file_name=f"{consumer_key}_bulk_dispute_letter.pdf", mime="application/pdf")
-
-        # Save letter log
-        if consumer_key not in letter_log:
-            letter_log[consumer_key] = []
-        letter_log[consumer_key].extend(log_entries)
-        with open(log_path, "w") as f:
-            json.dump(letter_log, f, indent=2)
-
-# --- 45-day Reminder Mock Email Log ---
-email_log_path = Path("email_log.json")
-if email_log_path.exists():
-    with open(email_log_path) as f:
-        email_log = json.load(f)
-else:
-    email_log = []
-
-if user["is_admin"]:
-    st.subheader("📧 Mock Email Log")
-    new_reminders = []
-    for client in due_clients:
-        email = client[0].replace(" ", "_").replace("_at_", "@")
-        reminder_entry = {"to": email, "subject": "Time to upload new credit report!", "date": today.strftime("%Y-%m-%d")}
-        if reminder_entry not in email_log:
-            new_reminders.append(reminder_entry)
-
-    if new_reminders:
-        email_log.extend(new_reminders)
-        with open(email_log_path, "w") as f:
-            json.dump(email_log, f, indent=2)
+# --- Branding + Dashboard View ---
 
-    for e in email_log[-10:]:
-        st.markdown(f"- To: **{e['to']}** | Subject: *{e['subject']}* | Date: {e['date']}")
+# Branding controls
+st.sidebar.header("🎨 Branding Options")
+agency_name = st.sidebar.text_input("Agency Name", value="My Credit Agency")
+primary_color = st.sidebar.color_picker("Primary Color", value="#2c3e50")
+logo_url = st.sidebar.text_input("Logo URL (optional)")
 
-# --- Phase 8: SMTP Email + Zapier Webhook + Analytics ---
+# Custom header display
+st.markdown(f"<h2 style='color:{primary_color};'>{agency_name}</h2>", unsafe_allow_html=True)
+if logo_url:
+    st.image(logo_url, width=150)
 
-import smtplib
-from email.message import EmailMessage
-import requests
+# --- Phase 8: SMTP Email + Zapier Webhook ---
 
 # ========== SMTP CONFIG ==========
 st.sidebar.header("✉️ SMTP Email Settings (Admin)")
@@ -569,170 +161,53 @@ smtp_user = st.sidebar.text_input("Email Username", value="", type="default")
 smtp_pass = st.sidebar.text_input("Email Password", value="", type="password")
 
 # ========== SEND REAL EMAILS ==========
+# Mail goes through the outbox: queued in the db and sent by a background worker that
+# reuses one SMTP login, so campaigns never block the page. Picks up queued mail after restarts.
+mailer = get_worker(smtp_host, smtp_port, smtp_user, smtp_pass) if smtp_user and smtp_pass else None
+
 def send_email(to_email, subject, body):
-    try:
-        msg = EmailMessage()
-        msg["From"] = smtp_user
-        msg["To"] = to_email
-        msg["Subject"] = subject
-        msg.set_content(body)
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_pass)
-            server.send_message(msg)
-        return True
-    except Exception as e:
-        st.error(f"Email error: {e}")
-        return False
-
-if user["is_admin"] and st.sidebar.button("📧 Send All Due Reminders"):
-    for client, days in due_clients:
-        to_email = client.replace(" ", "_") + "@demo.com"
-        subject = "Time to upload your new credit report"
-        body = f"Hi {client}, it’s been {days} days since your last upload. Please log in and upload your updated report."
-        send_email(to_email, subject, body)
-    st.success("Reminders sent!")
+    return send_emails([(to_email, subject, body)]) == 1
+
+def send_emails(messages):
+    if mailer is None:
+        st.error("Email error: enter SMTP username and password first.")
+        return 0
+    return mailer.send(messages)
 
 # ========== ZAPIER TRIGGER ==========
 zapier_url = st.sidebar.text_input("Zapier Webhook URL (optional)")
-def trigger_zapier(event, payload):
-    if zapier_url:
-        try:
-            requests.post(zapier_url, json={"event": event, "payload": payload})
-        except Exception as e:
-            st.warning(f"Zapier trigger failed: {e}")
-
-# Trigger when user uploads a file
-if uploaded_file:
-    trigger_zapier("report_uploaded", {"user": user["email"], "score": credit_score})
-
-# Trigger when PDF letter is downloaded
-if selected_accounts and st.button("Trigger Zapier for Letter"):
-    trigger_zapier("letter_generated", {"user": user["email"], "creditors": [x["creditor"] for x in selected_accounts]})
-    st.success("Zapier event sent!")
-
-# ========== CLIENT ANALYTICS ==========
-if not user["is_admin"]:
-    st.subheader("📊 Your Score Trends")
-    history_file = storage_dir / "score_history.json"
-    if history_file.exists():
-        with open(history_file) as f:
-            hist = json.load(f)
-        df = pd.DataFrame(hist)
-        df["date"] = pd.to_datetime(df["date"])
-        df = df.sort_values("date")
-        st.line_chart(df.set_index("date")["score"])
-
-    letter_count = len(letter_log.get(consumer_key, []))
-    st.metric("Total Letters Sent", letter_count)
-
-    # Optional basic stat: letters per dispute score
-    scores = [3 if "charge" in l["reason"].lower() else 2 for l in letter_log.get(consumer_key, [])]
-    if scores:
-        avg_score = round(sum(scores) / len(scores), 2)
-        st.metric("Avg Dispute Weight", avg_score)
-
-# --- Phase 9: Success Tracking, Preview/Download, Custom Status Tags ---
-
-# Custom status field storage
-status_file = Path("dispute_statuses.json")
-if status_file.exists():
-    with open(status_file) as f:
-        custom_statuses = json.load(f)
-else:
-    custom_statuses = {}
+def trigger_zapier(event, payload, key=None):
+    # Queued and delivered in the background; an event whose key was already sent is ignored
+    return get_dispatcher().emit(zapier_url, event, payload, key)
 
-# Add custom statuses (admin only)
-if user["is_admin"]:
-    st.sidebar.header("⚙️ Custom Dispute Statuses")
-    new_status = st.sidebar.text_input("Add New Status")
-    if st.sidebar.button("Add Status"):
-        if new_status not in custom_statuses:
-            custom_statuses[new_status] = {}
-            with open(status_file, "w") as f:
-                json.dump(custom_statuses, f, indent=2)
-            st.sidebar.success("Status added.")
-
-# Show status options on each account (if user is client)
-account_status_data = {}
-
-st.subheader("📌 Account Status Tracker")
-if uploaded_file or "imported_json" in st.session_state:
-    for i, item in enumerate(items):
-        creditor = item.get("creditor_name") or item.get("agency_name", "Unknown")
-        status_key = f"{consumer_key}_{creditor}_{i}"
+# --- Phase 13: SaaS Prep ---
+st.sidebar.markdown("### ⚙️ SaaS Mode Settings (Prep)")
+demo_mode = st.sidebar.checkbox("Enable Demo Mode")
+if demo_mode:
+    st.sidebar.info("Demo mode enabled: limited data visibility and testing features.")
 
-        current_status = custom_statuses.get(status_key, {}).get("status", "Not Set")
-        st.markdown(f"**{creditor}** — Current Status: `{current_status}`")
+# --- Phase 14: Top Tab UI, Logo Upload ---
 
-        if custom_statuses:
-            chosen = st.selectbox("Update Status", list(custom_statuses.keys()), key=f"statusbox_{i}")
-            if st.button(f"Update Status for {creditor}", key=f"updatestatus_{i}"):
-                custom_statuses[status_key] = {
-                    "status": chosen,
-                    "date": datetime.today().strftime("%Y-%m-%d")
-                }
-                with open(status_file, "w") as f:
-                    json.dump(custom_statuses, f, indent=2)
-                st.success(f"{creditor} updated to: {chosen}")
+# Logo uploader
+st.sidebar.header("🖼️ Upload Logo")
+uploaded_logo = st.sidebar.file_uploader("Upload your logo (PNG/JPG)", type=["png", "jpg", "jpeg"])
+logo_path = None
+if uploaded_logo:
+    # Content-addressed: reruns with the same upload reuse the cached PNG
+    logo_path = store_uploaded_logo(uploaded_logo.getvalue())
 
-# Dispute result effectiveness
-if not user["is_admin"]:
-    st.subheader("✅ Dispute Effectiveness")
-    status_stats = {}
-    for k, v in custom_statuses.items():
-        if k.startswith(consumer_key):
-            s = v["status"]
-            status_stats[s] = status_stats.get(s, 0) + 1
-    if status_stats:
-        for s, count in status_stats.items():
-            st.markdown(f"- **{s}**: {count} account(s)")
-
-# Secure preview of uploaded JSON reports (client only)
-if not user["is_admin"]:
-    st.subheader("🔍 View Uploaded Credit Reports")
-    client_path = Path("stored_reports") / consumer_key
-    report_files = list(client_path.glob("**/report.json"))
-    if report_files:
-        for file in sorted(report_files, reverse=True):
-            with open(file) as f:
-                report_data = json.load(f)
-            with st.expander(f"Report: {file.parent.name}"):
-                st.json(report_data)
-                st.download_button("Download JSON", data=json.dumps(report_data, indent=2),
-                                   file_name=f"{file.parent.name}_report.json", mime="application/json")
-
-# --- Phase 10: Mobile UI, Drag-and-Drop Upload, Client Messaging ---
-
-# ========== DRAG-AND-DROP REPORT UPLOAD ==========
-st.subheader("📂 Upload Credit Report")
-uploaded_drag = st.file_uploader("Drop your JSON or PDF file here", type=["json", "pdf"], label_visibility="collapsed")
-
-if uploaded_drag and uploaded_drag.name.endswith(".json"):
-    report_data = json.load(uploaded_drag)
-    st.success("JSON report uploaded successfully.")
-    st.session_state["report_data"] = report_data
-
-elif uploaded_drag and uploaded_drag.name.endswith(".pdf"):
-    text = ""
-    with fitz.open(stream=uploaded_drag.read(), filetype="pdf") as doc:
-        for page in doc:
-            text += page.get_text()
-    st.session_state["report_data"] = {
-        "consumer_info": {"name": "Parsed PDF", "credit_score": 630},
-        "tradelines": [{"creditor_name": "PDF Creditor", "status": "Late", "balance": 890, "last_reported": "2024-11-10"}]
-    }
-    st.success("PDF parsed and report structure created.")
-
-# Use parsed report if present
-if "report_data" in st.session_state:
-    report_data = st.session_state["report_data"]
-    consumer_name = report_data.get("consumer_info", {}).get("name", "Unknown")
-    credit_score = report_data.get("consumer_info", {}).get("credit_score", 0)
-    tradelines = report_data.get("tradelines", [])
-    st.markdown(f"**Consumer:** {consumer_name} — **Score:** {credit_score}")
-    for item in tradelines:
-        st.markdown(f"- {item['creditor_name']} | {item['status']} | ${item['balance']}")
+# Dashboard style with logo + metrics
+st.markdown("""
+<style>
+.css-1v0mbdj.eknhn3m10 {margin-top: -50px;}
+.css-1aumxhk {
+    background: #f9f9f9;
+    padding: 0.75rem 1rem;
+    border-radius: 8px;
+    box-shadow: 0 1px 2px rgba(0,0,0,0.1);
+}
+</style>
+""", unsafe_allow_html=True)
 
 # ========== MOBILE UI OPTIMIZATION ==========
 st.markdown("""
@@ -751,59 +226,642 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# ========== CLIENT MESSAGE CENTER ==========
-message_file = Path("messages.json")
-if message_file.exists():
-    with open(message_file) as f:
-        all_messages = json.load(f)
-else:
-    all_messages = []
-
-if not user["is_admin"]:
-    st.subheader("💬 Send Message to Admin")
-    msg = st.text_area("Your Message")
-    if st.button("Send Message"):
-        all_messages.append({
-            "from": user["email"],
-            "to": "admin",
-            "text": msg,
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M")
-        })
-        with open(message_file, "w") as f:
-            json.dump(all_messages, f, indent=2)
-        st.success("Message sent.")
+# --- Phase 19: Sample Records ---
 
-if user["is_admin"]:
-    st.subheader("📥 Client Messages")
-    for m in reversed(all_messages[-10:]):
-        st.markdown(f"**{m['from']}** on {m['date']}")
-        st.markdown(f"> {m['text']}")
-        st.markdown("---")
+# Shown until the CRM has real leads / clients
+SAMPLE_LEADS = [{"id": "94839693-fc42-4150-a5e6-26c874b75900", "name": "Lead 1 Sample", "email": "lead1@example.com", "source": "Facebook", "status": "Hot", "tags": ["Medical", "Late"], "phone": "(555) 555-5501", "notes": "This is a test note for lead 1.", "added": "2025-04-24"}, {"id": "aaab7b49-8957-4399-9e4d-6f011a429043", "name": "Lead 2 Sample", "email": "lead2@example.com", "source": "Website", "status": "Hot", "tags": ["Late", "Medical"], "phone": "(555) 555-5502", "notes": "This is a test note for lead 2.", "added": "2025-04-24"}, {"id": "7ba755b0-c72b-44f7-8dc1-0616c57d5734", "name": "Lead 3 Sample", "email": "lead3@example.com", "source": "Referral", "status": "Follow-Up", "tags": ["Medical", "Student Loan"], "phone": "(555) 555-5503", "notes": "This is a test note for lead 3.", "added": "2025-04-24"}, {"id": "e4fe7741-ee3e-4f3d-aed8-073143ae8669", "name": "Lead 4 Sample", "email": "lead4@example.com", "source": "Facebook", "status": "New", "tags": ["Student Loan", "Auto"], "phone": "(555) 555-5504", "notes": "This is a test note for lead 4.", "added": "2025-04-24"}, {"id": "de9bd9da-8f5c-405e-8fd7-d2cfb6288ccb", "name": "Lead 5 Sample", "email": "lead5@example.com", "source": "Website", "status": "New", "tags": ["Late", "Student Loan"], "phone": "(555) 555-5505", "notes": "This is a test note for lead 5.", "added": "2025-04-24"}, {"id": "68bd6691-0fd6-4d7d-919d-3618c16a5a85", "name": "Lead 6 Sample", "email": "lead6@example.com", "source": "Referral", "status": "Hot", "tags": ["Medical", "Late"], "phone": "(555) 555-5506", "notes": "This is a test note for lead 6.", "added": "2025-04-24"}, {"id": "1ea80ba6-7411-4b6c-a8e1-98182571e35d", "name": "Lead 7 Sample", "email": "lead7@example.com", "source": "Referral", "status": "Follow-Up", "tags": ["Auto", "Late"], "phone": "(555) 555-5507", "notes": "This is a test note for lead 7.", "added": "2025-04-24"}, {"id": "919d6b5b-50a1-45a1-80aa-6fb1fdb552d8", "name": "Lead 8 Sample", "email": "lead8@example.com", "source": "Website", "status": "New", "tags": ["Auto", "Medical"], "phone": "(555) 555-5508", "notes": "This is a test note for lead 8.", "added": "2025-04-24"}, {"id": "3ff68c6e-7eac-42f6-9b0e-d12ff3f822ab", "name": "Lead 9 Sample", "email": "lead9@example.com", "source": "Facebook", "status": "Follow-Up", "tags": ["Medical", "Auto"], "phone": "(555) 555-5509", "notes": "This is a test note for lead 9.", "added": "2025-04-24"}, {"id": "2c91c121-0611-4afc-ae91-27e1277c7e11", "name": "Lead 10 Sample", "email": "lead10@example.com", "source": "Website", "status": "New", "tags": ["Student Loan", "Medical"], "phone": "(555) 555-5510", "notes": "This is a test note for lead 10.", "added": "2025-04-24"}]
+SAMPLE_CLIENTS = [{"id": "a6a50d9b-9edb-49eb-b72b-c2c9733a9ebc", "name": "Client 1 Demo", "email": "client1@example.com", "status": "Active", "phone": "(444) 444-4401", "joined": "2025-04-24", "score": 641}, {"id": "2c5f9f4a-5a6e-4552-8707-b4e65dc5add5", "name": "Client 2 Demo", "email": "client2@example.com", "status": "Active", "phone": "(444) 444-4402", "joined": "2025-04-24", "score": 667}, {"id": "61583cf4-2b9e-42ad-81f3-5b5b06bbf7b8", "name": "Client 3 Demo", "email": "client3@example.com", "status": "Active", "phone": "(444) 444-4403", "joined": "2025-04-24", "score": 616}, {"id": "6b5ea7ed-8682-49f5-b3a3-1e9612dc0415", "name": "Client 4 Demo", "email": "client4@example.com", "status": "Active", "phone": "(444) 444-4404", "joined": "2025-04-24", "score": 642}, {"id": "971102b2-8f9c-44a5-9c23-c37886932232", "name": "Client 5 Demo", "email": "client5@example.com", "status": "Active", "phone": "(444) 444-4405", "joined": "2025-04-24", "score": 696}, {"id": "7af328b4-c022-4ffd-9d0d-e9a5ceda7672", "name": "Client 6 Demo", "email": "client6@example.com", "status": "Active", "phone": "(444) 444-4406", "joined": "2025-04-24", "score": 617}, {"id": "7bf4f330-9e17-41f6-80c4-454a2cd40a30", "name": "Client 7 Demo", "email": "client7@example.com", "status": "Active", "phone": "(444) 444-4407", "joined": "2025-04-24", "score": 694}, {"id": "afec6466-4252-4cc0-83f5-2c0557910367", "name": "Client 8 Demo", "email": "client8@example.com", "status": "Active", "phone": "(444) 444-4408", "joined": "2025-04-24", "score": 678}, {"id": "5f503552-43d0-4e61-b0ef-4ff69844eb2b", "name": "Client 9 Demo", "email": "client9@example.com", "status": "Active", "phone": "(444) 444-4409", "joined": "2025-04-24", "score": 661}, {"id": "a61d69c7-b65d-40d0-bdff-57d551c3f2cd", "name": "Client 10 Demo", "email": "client10@example.com", "status": "Active", "phone": "(444) 444-4410", "joined": "2025-04-24", "score": 595}]
 
-# --- Phase 11: Client Progress Bar Tracker ---
+# --- Page data ---
+# Each loader runs at most once per rerun, and only if the active page declared it.
+# Reads go through data_cache, keyed by the data versions read once per rerun.
 
-from streamlit.components.v1 import html
+@router.loader("versions")
+def load_versions(ctx):
+    return data_cache.versions()
 
-if not user["is_admin"]:
-    st.subheader("📈 Dispute Progress Tracker")
+@router.loader("total_reports", needs=("versions",))
+def load_total_reports(ctx):
+    return data_cache.read(ctx.versions, "total_reports")
 
-    total_accounts = len(items)
-    resolved_statuses = ["Removed", "Resolved", "Verified Deleted"]
-    active_statuses = ["Pending", "In Dispute", "Escalated", "Round 1", "Round 2", "Round 3"]
+@router.loader("recent_reports", needs=("versions",))
+def load_recent_reports(ctx):
+    return data_cache.read(ctx.versions, "recent_reports", 5)
+
+@router.loader("due_clients", needs=("versions",))
+def load_due_clients(ctx):
+    return data_cache.read(ctx.versions, "reports_due", ctx.today, 45)
+
+@router.loader("active_clients", needs=("versions",))
+def load_active_clients(ctx):
+    return data_cache.read(ctx.versions, "total_consumers")
+
+@router.loader("todos", needs=("versions",))
+def load_todo_list(ctx):
+    return data_cache.read(ctx.versions, "todos")
+
+@router.loader("emails", needs=("versions",))
+def load_emails(ctx):
+    return data_cache.read(ctx.versions, "emails", 10)
+
+@router.loader("letter_log", needs=("versions",))
+def load_letter_log(ctx):
+    return data_cache.read(ctx.versions, "letter_log")
+
+@router.loader("total_letters", needs=("versions",))
+def load_total_letters(ctx):
+    return data_cache.read(ctx.versions, "total_letters")
+
+@router.loader("latest_scores", needs=("versions",))
+def load_latest_scores(ctx):
+    return data_cache.read(ctx.versions, "latest_scores")
+
+@router.loader("shard")
+def load_shard_versions(ctx):
+    # Versions of the signed-in client's own shard; other clients' writes leave them alone
+    return data_cache.shard_versions(client_key(ctx.user))
+
+@router.loader("client_history", needs=("shard",))
+def load_client_history(ctx):
+    # A client's own score history under stored_reports
+    return data_cache.score_history(str(ctx.storage_dir), client_key(ctx.user), ctx.shard.get("reports", 0))
+
+@router.loader("client_letters", needs=("shard",))
+def load_client_letters(ctx):
+    return data_cache.read_shard(ctx.shard, "letters", client_key(ctx.user))
+
+@router.loader("branding", needs=("versions",))
+def load_branding(ctx):
+    return data_cache.read(ctx.versions, "branding", ctx.user["email"])
+
+@router.loader("status_options", needs=("versions",))
+def load_status_options(ctx):
+    return data_cache.read(ctx.versions, "status_options")
+
+@router.loader("messages", needs=("versions",))
+def load_messages(ctx):
+    return data_cache.read(ctx.versions, "messages", 10)
+
+@router.loader("leads", needs=("versions",))
+def load_lead_records(ctx):
+    return data_cache.read(ctx.versions, "leads") or [dict(lead) for lead in SAMPLE_LEADS]
+
+@router.loader("clients", needs=("versions",))
+def load_client_records(ctx):
+    return data_cache.read(ctx.versions, "clients") or [dict(client) for client in SAMPLE_CLIENTS]
+
+# --- Phase 21: Search, Filters, Inactivity Alerts ---
+
+def filter_leads(leads, search="", status_filter=None, version=None):
+    # Ranked n-gram lookup; the index is kept while the leads version holds and updated on add/convert/import/edit
+    return session_index(st.session_state, "leads", leads, version, date_field="added").search(search, status_filter)
+
+def filter_clients(clients, search="", version=None):
+    return session_index(st.session_state, "clients", clients, version).search(search)
 
-    resolved_count = 0
-    active_count = 0
+# --- Phase 18: Lead stages and tags ---
+stage_options = ["New", "Hot", "Follow-Up", "No Response", "Converted"]
+tag_options = ["Credit", "Student Loan", "Real Estate", "Bankruptcy", "Auto Loan"]
+
+# === DASHBOARD ===
+@router.page("Dashboard", needs=(
+    "versions", "total_reports", "recent_reports", "due_clients", "active_clients", "todos", "emails",
+    "total_letters", "latest_scores", "client_history", "client_letters", "leads", "clients",
+))
+def dashboard_page(ctx):
+    user = ctx.user
+
+    # Answered from the report manifest, no stored_reports/ crawl
+    st.sidebar.title("📊 Dashboard")
+    st.sidebar.metric("Total Reports", ctx.total_reports)
+
+    # Display recent uploads
+    if ctx.recent_reports:
+        st.sidebar.markdown("**Recent Reports:**")
+        for r in ctx.recent_reports:
+            score = r["score"] if r["score"] is not None else "N/A"
+            st.sidebar.markdown(f"- {r['date']} | {r['client']} | Score: {score}")
+
+    # --- Phase 5: To-Do List, Calendar, and 45-Day Recheck ---
+
+    # ========== TO-DO LIST ==========
+    st.sidebar.header("✅ To-Do List")
+
+    new_task = st.sidebar.text_input("New Task")
+    if st.sidebar.button("Add Task"):
+        if new_task:
+            add_todo(db, new_task)
+            ctx.todos = load_todos(db)
+
+    todos = ctx.todos
+    for i, t in enumerate(todos):
+        checked = st.sidebar.checkbox(t["task"], value=t["done"], key=f"todo_{i}")
+        ctx.writes.update("todos", t["id"], t, done=checked)
+
+    # ========== CALENDAR ==========
+    st.sidebar.header("🗓️ Calendar Preview")
+    st.sidebar.markdown(f"**Today:** {ctx.today.strftime('%A, %B %d, %Y')}")
+
+    # ========== 45-DAY REPORT CHECK ==========
+    st.sidebar.header("⏱️ 45-Day Report Reminders")
+
+    due_clients = ctx.due_clients
+    if due_clients:
+        st.sidebar.markdown("### Ready to Recheck:")
+        for name, days in due_clients:
+            st.sidebar.markdown(f"- **{name}** ({days} days ago)")
+    else:
+        st.sidebar.info("No clients due yet.")
 
+    # --- Phase 14: Dashboard Enhancements ---
+    st.title("📊 Dashboard Overview")
+
+    # Calendar preview
+    st.subheader("🗓️ Calendar")
+    st.markdown(f"**Today:** {ctx.today.strftime('%A, %B %d, %Y')}")
+
+    # Active clients metric
+    st.metric("Active Clients", ctx.active_clients)
+
+    # Reports due for refresh
+    st.subheader("⏱️ Reports Due (45+ days)")
+    if due_clients:
+        for name, days in due_clients:
+            st.markdown(f"- **{name}** ({days} days ago)")
+    else:
+        st.success("No clients are due for refresh.")
+
+    # --- Phase 19: Dashboard Charts ---
+    leads_data, clients_data = ctx.leads, ctx.clients
+
+    st.subheader("📈 CRM Metrics")
+    st.metric("Total Clients", len(clients_data))
+    st.metric("Active Leads", len(leads_data))
+
+    source_chart, score_df = data_cache.crm_charts(
+        ctx.versions.get("leads", 0), ctx.versions.get("clients", 0), leads_data, clients_data)
+    st.bar_chart(source_chart)
+    st.line_chart(score_df)
+
+    # --- Phase 7: 45-day Reminder Mock Email Log ---
+    if user["is_admin"]:
+        st.subheader("📧 Mock Email Log")
+        # Deduped in one set lookup; reruns that log nothing new do not write
+        log_emails(db, [(client[0].replace(" ", "_").replace("_at_", "@"), "Time to upload new credit report!",
+                         ctx.today.strftime("%Y-%m-%d")) for client in due_clients])
+
+        for e in ctx.emails:
+            st.markdown(f"- To: **{e['to']}** | Subject: *{e['subject']}* | Date: {e['date']}")
+
+    # --- Phase 8: Reminders + Analytics ---
+    if user["is_admin"] and st.sidebar.button("📧 Send All Due Reminders"):
+        reminders = []
+        for client, days in due_clients:
+            to_email = client.replace(" ", "_") + "@demo.com"
+            subject = "Time to upload your new credit report"
+            body = f"Hi {client}, it’s been {days} days since your last upload. Please log in and upload your updated report."
+            reminders.append((to_email, subject, body))
+        queued = send_emails(reminders)
+        if queued:
+            st.success(f"{queued} reminders queued!")
+
+    if user["is_admin"] and mailer is not None:
+        counts = outbox_counts(db, mailer.account)
+        st.sidebar.caption(f"Outbox: {counts['queued']} queued · {counts['sent']} sent · {counts['failed']} failed")
+
+    # ========== CLIENT ANALYTICS ==========
+    if not user["is_admin"]:
+        st.subheader("📊 Your Score Trends")
+        hist = ctx.client_history
+        if hist:
+            st.line_chart(data_cache.history_frame(hist)["score"])
+
+        consumer_letters = ctx.client_letters
+        letter_count = len(consumer_letters)
+        st.metric("Total Letters Sent", letter_count)
+
+        # Optional basic stat: letters per dispute score
+        scores = [3 if "charge" in l["reason"].lower() else 2 for l in consumer_letters]
+        if scores:
+            avg_score = round(sum(scores) / len(scores), 2)
+            st.metric("Avg Dispute Weight", avg_score)
+
+    # --- Phase 13: Admin Analytics + CSV Export ---
+    if user["is_admin"]:
+        st.subheader("📊 Admin Analytics Overview")
+
+        # Materialized counters and per-day aggregates, kept current on every upload and letter
+        st.metric("Total Users", ctx.active_clients)
+        st.metric("Reports Uploaded", ctx.total_reports)
+        st.metric("Dispute Letters Generated", ctx.total_letters)
+
+        # Cross-user score trend view
+        st.markdown("### 📈 Global Score Trends")
+        trend = data_cache.score_trend(ctx.versions.get("reports", 0))
+        if trend is not None:
+            st.line_chart(trend)
+
+        if ctx.latest_scores:
+            st.markdown("### 🧾 Latest Score by User")
+            st.dataframe(pd.DataFrame(ctx.latest_scores, columns=["User", "Latest Score"]), hide_index=True)
+
+        # Export: built only when the download is clicked, streamed from the store in chunks
+        st.markdown("### 📤 Export User Activity Log")
+        col1, col2, col3 = st.columns([2, 2, 3])
+        export_format = col1.selectbox("Format", list(EXPORT_FORMATS), key="export_format")
+        export_consumer = col2.text_input("Consumer (optional)", key="export_consumer").strip().replace(" ", "_") or None
+        export_range = col3.date_input("Date range (optional)", value=(), key="export_range")
+        export_start = export_range[0].strftime("%Y-%m-%d") if len(export_range) > 0 else None
+        export_end = export_range[-1].strftime("%Y-%m-%d") if len(export_range) > 0 else None
+        st.download_button(
+            "📥 Download Export",
+            data=lambda: export_activity(export_format, export_consumer, export_start, export_end),
+            file_name=export_file_name(export_format, export_consumer, export_start, export_end),
+            mime=EXPORT_FORMATS[export_format][1],
+            on_click="ignore",
+        )
+
+# === LEADS VIEW ===
+@router.page("Leads", needs=("leads",))
+def leads_page(ctx):
+    user = ctx.user
+    leads_data = ctx.leads
+
+    # --- Phase 17: Editable CRM Leads ---
+    st.title("📇 Leads CRM")
+    with st.form("add_lead"):
+        col1, col2 = st.columns(2)
+        with col1:
+            lead_name = st.text_input("Lead Name")
+            lead_email = st.text_input("Email")
+        with col2:
+            lead_source = st.selectbox("Source", ["Facebook", "Referral", "Website", "Other"])
+            submitted = st.form_submit_button("Add Lead")
+        if submitted and lead_name and lead_email:
+            new_lead = {
+                "id": str(uuid.uuid4()),
+                "name": lead_name,
+                "email": lead_email,
+                "source": lead_source,
+                "status": "New",
+                "added": datetime.now().strftime("%Y-%m-%d")
+            }
+            add_lead(db, new_lead)
+            leads_data.append(new_lead)
+            reindex(st.session_state, "leads", [new_lead])
+            st.success("Lead added!")
+
+    # --- Phase 18: Custom Lead Stages, CSV Upload, and Zapier Integration ---
+
+    # Custom upload via CSV
+    st.markdown("### 📥 Bulk Upload Leads via CSV")
+    csv_upload = st.file_uploader("Upload CSV file with columns: name, email, source (optional: phone)", type="csv", key="csvleads")
+    # The uploader keeps its file across reruns; import each file once
+    csv_digest = content_digest(csv_upload) if csv_upload else None
+    if csv_digest and st.session_state.get("csv_leads_digest") != csv_digest:
+        try:
+            result = import_leads(db, csv_upload)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.session_state["csv_leads_digest"] = csv_digest
+            leads_data.extend(result["leads"])
+            reindex(st.session_state, "leads", result["leads"])
+            st.success(f"{result['imported']} leads uploaded from CSV! "
+                       f"({result['duplicates']} duplicates, {result['skipped']} rows without email/phone skipped)")
+
+    # Display editable lead list with stages and tags
+    st.markdown("### 📝 Lead Management")
+    for lead in list(leads_data):
+        with st.expander(f"{lead['name']} ({lead['email']})"):
+            stage = st.selectbox("Status", stage_options, index=stage_options.index(lead.get("status", "New")), key=f"stage_{lead['id']}")
+            # Tags outside tag_options are not shown; only a real edit drops them
+            kept_tags = [t for t in lead.get("tags", []) if t in tag_options]
+            tags = st.multiselect("Tags", tag_options, default=kept_tags, key=f"tags_{lead['id']}")
+            if tags == kept_tags:
+                tags = lead.get("tags")
+            if ctx.writes.update("leads", lead["id"], lead, status=stage, tags=tags):
+                reindex(st.session_state, "leads", [lead])
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                if st.button("Convert", key=f"convert_{lead['id']}"):
+                    client = convert_lead(db, lead, datetime.now().strftime("%Y-%m-%d"))
+                    leads_data.remove(lead)
+                    reindex(st.session_state, "leads", removed=[lead["id"]])
+                    reindex(st.session_state, "clients", [client])
+                    st.success(f"{lead['name']} converted to client.")
+
+    # === ZAPIER WEBHOOK ENDPOINT ===
+    if "zapier_leads" not in st.session_state:
+        st.session_state["zapier_leads"] = []
+
+    def capture_zapier_lead(payload):
+        new_lead = {
+            "id": str(uuid.uuid4()),
+            "name": payload.get("name", "Zapier Lead"),
+            "email": payload.get("email", "noemail@example.com"),
+            "source": payload.get("source", "Zapier"),
+            "status": "New",
+            "added": datetime.now().strftime("%Y-%m-%d")
+        }
+        add_lead(db, new_lead)
+        leads_data.append(new_lead)
+        reindex(st.session_state, "leads", [new_lead])
+        st.session_state["zapier_leads"].append(new_lead)
+
+    # Simulate Zapier JSON input (admin only testing)
+    if user["is_admin"]:
+        with st.expander("🧪 Simulate Zapier Lead Capture"):
+            zap_name = st.text_input("Zapier Name")
+            zap_email = st.text_input("Zapier Email")
+            zap_source = st.text_input("Zapier Source", value="Web Form")
+            if st.button("Add Zapier Lead"):
+                capture_zapier_lead({"name": zap_name, "email": zap_email, "source": zap_source})
+                st.success("Zapier lead added.")
+
+    # --- Phase 21: Search + inactivity alerts ---
+    search_leads = st.text_input("🔍 Search Leads", placeholder="Search by name or email")
+    status_filter = st.selectbox("Filter by Status", ["All"] + stage_options)
+    selected_status = None if status_filter == "All" else status_filter
+
+    visible_leads = filter_leads(leads_data, search_leads, selected_status, ctx.versions.get("leads", 0))
+    for lead in visible_leads:
+        with st.container():
+            st.markdown(f"**{lead['name']}** — {lead['email']}")
+            col1, col2, col3 = st.columns([3, 2, 2])
+            col1.markdown(f"Source: `{lead['source']}`")
+            col2.markdown(f"Status: `{lead['status']}`")
+            col3.markdown(f"Phone: {lead.get('phone', '')}")
+            if lead.get("tags"):
+                st.markdown(f"Tags: {', '.join(lead['tags'])}")
+            if lead.get("inactive"):
+                st.warning("⚠️ Inactive 30+ days")
+            st.markdown("---")
+
+# === CLIENTS VIEW ===
+@router.page("Clients", needs=("clients",))
+def clients_page(ctx):
+    st.title("👥 Clients CRM")
+
+    search_clients = st.text_input("🔍 Search Clients", placeholder="Search by name or email")
+    visible_clients = filter_clients(ctx.clients, search_clients, ctx.versions.get("clients", 0))
+
+    for client in visible_clients:
+        with st.container():
+            st.markdown(f"**{client['name']}** — {client['email']}")
+            col1, col2, col3 = st.columns([2, 2, 2])
+            col1.markdown(f"Phone: {client.get('phone', '')}")
+            col2.markdown(f"Joined: {client['joined']}")
+            col3.markdown(f"Score: {client.get('score', 'N/A')}")
+            st.markdown("---")
+
+# === DISPUTE MANAGER ===
+@router.page("Dispute Manager", needs=("branding", "status_options", "client_history"))
+def dispute_manager_page(ctx):
+    user = ctx.user
+    st.title("🧾 Dispute Manager")
+    st.write("Upload a credit report, select accounts, and generate dispute letters.")
+
+    # --- Phase 1: Upload, Scoring, Account Selection ---
+    uploaded_file = st.file_uploader("Upload your credit report", type=["json", "xml"])
+    items = []
+    selected_accounts = []
+    # Clients always work on their own folder; admins on whichever report they upload
+    consumer_key = None if user["is_admin"] else client_key(user)
+
+    if uploaded_file:
+        if uploaded_file.name.lower().endswith(".xml"):
+            # MISMO credit response: stored and read as the equivalent JSON report, converted once per file
+            uploaded_file = convert_cached(uploaded_file)
+        # Stream the report: header first, then tradelines/collections one at a time
+        report_header, report_items = open_report(uploaded_file)
+        consumer_name = report_header.get("consumer_info", {}).get("name", "Unknown")
+        credit_score = report_header.get("consumer_info", {}).get("credit_score", 0)
+
+        report_key = consumer_name.replace(" ", "_")
+        consumer_key = consumer_key or report_key
+
+        # === Save report + score history (no-op when this exact file is already stored) ===
+        stored_entry, report_is_new = store_report(db, ctx.storage_dir, report_key, uploaded_file, credit_score)
+        timestamp = stored_entry["timestamp"]
+        history = load_score_history(ctx.storage_dir, report_key)
+
+        if report_is_new:
+            st.success(f"Report uploaded for {consumer_name} on {timestamp}")
+        else:
+            st.info(f"Report for {consumer_name} already stored on {timestamp}")
+
+        # Trigger when user uploads a file (keyed by report digest so reruns don't resend it)
+        trigger_zapier("report_uploaded", {"user": user["email"], "score": credit_score},
+                       key=f"report_uploaded:{stored_entry['digest']}")
+
+        # === Score Display + Graph ===
+        st.subheader("📈 Credit Score Overview")
+        score_color = "#e74c3c" if credit_score < 580 else "#f39c12" if credit_score < 670 else "#2ecc71"
+        st.markdown(f"<div style='padding:10px; border-left: 6px solid {score_color};'><h3>{consumer_name}</h3>"
+                    f"<b>Score:</b> <span style='color:{score_color}; font-size:20px;'>{credit_score}</span></div>",
+                    unsafe_allow_html=True)
+
+        if len(history) > 1:
+            st.line_chart(data_cache.history_frame(history)["score"])
+
+        # === Account Section ===
+        st.subheader("📋 Select Accounts to Dispute")
+
+        # Each item is normalized once here; later phases reuse the Items
+        records = (Item.from_dict(raw, section) for section, raw in report_items)
+        for i, (item, score, breakdown) in enumerate(score_records(records, "dispute")):
+            items.append(item)
+            creditor, balance = item.creditor, item.balance
+            status = item.status or "N/A"
+            reported = item.raw.get("last_reported") or "N/A"
+
+            with st.container():
+                st.markdown(f"### {creditor}")
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.markdown(f"""**Status:** {status}  
+**Balance:** ${balance}  
+**Last Reported:** {reported}""")
+                    st.markdown(f"🧠 **Dispute Score:** `{score}/10`")
+                    with st.expander("🔍 Score Breakdown"):
+                        for line in breakdown:
+                            st.markdown(f"- {line}")
+                with col2:
+                    selected = st.checkbox("Include in Letter", key=f"check_{i}")
+                    if selected:
+                        selected_accounts.append({
+                            "creditor": creditor,
+                            "status": status,
+                            "balance": balance,
+                            "reported": reported,
+                            "index": i
+                        })
+
+    # --- Phase 7: Branded PDFs ---
+    if selected_accounts:
+        bureau = st.selectbox("Select Bureau", ["TransUnion", "Experian", "Equifax"])
+        reason = st.selectbox("Dispute Reason", ["Not Mine", "Never Late", "Already Paid", "Wrong Balance", "Request Validation"])
+
+        # PDF branding override
+        client_brand_name = ctx.branding.get("name", "")
+        client_logo = ctx.branding.get("logo", "")
+
+        if st.button("📄 Generate Multi-Item Letter PDF"):
+            buffer = BytesIO()
+            c = canvas.Canvas(buffer)
+            c.setFont("Helvetica-Bold", 14)
+            c.drawString(50, 820, client_brand_name or agency_name)
+            if client_logo:
+                try:
+                    logo_drawn = draw_logo(c, client_logo, 400, 760, width=140)
+                except Exception:
+                    logo_drawn = False
+                if not logo_drawn:
+                    c.setFont("Helvetica", 8)
+                    c.drawString(400, 760, "(Logo failed to load)")
+            log_entries = draw_multi_item_letter(c, bureau, consumer_name, selected_accounts, reason)
+            c.save()
+            buffer.seek(0)
+
+            st.download_button("📥 Download Branded PDF", data=buffer, file_name=f"{consumer_key}_bulk_dispute_letter.pdf", mime="application/pdf")
+
+            # Save letter log
+            add_letters(db, consumer_key, log_entries)
+
+        # Trigger when PDF letter is downloaded
+        if st.button("Trigger Zapier for Letter"):
+            trigger_zapier("letter_generated", {"user": user["email"], "creditors": [x["creditor"] for x in selected_accounts]})
+            st.success("Zapier event queued!")
+
+    # --- Phase 3: Add-on to AI Disputer All-in-One ---
+
+    # Parse an uploaded PDF report into the JSON report structure
+    st.sidebar.header("📄 PDF Report Import (Beta)")
+    pdf_file = st.sidebar.file_uploader("Upload Credit Report (PDF)", type="pdf", key="pdf_report")
+    if pdf_file:
+        pdf_bytes = pdf_file.getvalue()
+        extracted = parse_pdf(pdf_bytes)
+        st.sidebar.success(
+            f"PDF parsed: {len(extracted['tradelines'])} tradelines, {len(extracted['collections'])} collections"
+        )
+        st.sidebar.write(extracted_text(pdf_bytes) + "...")  # preview
+
+        if st.sidebar.button("Import Extracted Data"):
+            write_json("temp_pdf_report.json", extracted)
+            st.session_state["imported_json"] = extracted
+            st.sidebar.success("Imported as structured JSON!")
+
+    # Inject AI-generated dispute sequence example
+    st.sidebar.header("🧠 AI Dispute Sequence (Demo)")
+    if "imported_json" in st.session_state:
+        imported_data = st.session_state["imported_json"]
+        for i, item in enumerate(as_items(imported_data["tradelines"])):
+            creditor = item.creditor
+            with st.sidebar.expander(f"{creditor} – Sequence"):
+                st.markdown("**Round 1 – Validation Letter**")
+                st.markdown(f"Dear {creditor}, I request validation of this debt...")
+
+                st.markdown("**Round 2 – Escalation**")
+                st.markdown(f"I still have not received proper validation for {creditor}...")
+
+                st.markdown("**Round 3 – Legal Reference**")
+                st.markdown(f"Under the FCRA and FDCPA, continued reporting without validation is unlawful...")
+
+    # --- Phase 9: Success Tracking, Custom Status Tags ---
+
+    # Custom status field storage
+    custom_status_names = ctx.status_options
+    shard = data_cache.shard_versions(consumer_key) if consumer_key else {}
+    custom_statuses = data_cache.read_shard(shard, "statuses", consumer_key) if consumer_key else {}
+    # {status: accounts} from the maintained totals; staged edits adjust it in place
+    consumer_status_counts = Counter(data_cache.read_shard(shard, "status_counts", consumer_key) if consumer_key else {})
+    # {status key: [events, oldest first]}; staged edits are appended in place too
+    status_history = data_cache.read_shard(shard, "status_history", consumer_key) if consumer_key else {}
+
+    # Show status options on each account (if user is client)
+    st.subheader("📌 Account Status Tracker")
     for i, item in enumerate(items):
-        creditor = item.get("creditor_name") or item.get("agency_name", "Unknown")
+        creditor = item.creditor
         status_key = f"{consumer_key}_{creditor}_{i}"
-        status_obj = custom_statuses.get(status_key, {})
-        status = status_obj.get("status", "")
 
-        if status in resolved_statuses:
-            resolved_count += 1
-        elif status in active_statuses:
-            active_count += 1
+        current_status = custom_statuses.get(status_key, {}).get("status", "Not Set")
+        st.markdown(f"**{creditor}** — Current Status: `{current_status}`")
+
+        if custom_status_names:
+            chosen = st.selectbox("Update Status", custom_status_names, key=f"statusbox_{i}")
+            if st.button(f"Update Status for {creditor}", key=f"updatestatus_{i}"):
+                record = custom_statuses.setdefault(status_key, {})
+                previous = record.get("status")
+                ctx.writes.update("account_statuses", (consumer_key, status_key), record,
+                                  status=chosen, date=datetime.today().strftime("%Y-%m-%d"))
+                if previous != chosen:
+                    if previous:
+                        consumer_status_counts[previous] -= 1
+                    consumer_status_counts[chosen] += 1
+                    status_history.setdefault(status_key, []).append(dict(record))
+                st.success(f"{creditor} updated to: {chosen}")
+
+    # Dispute result effectiveness
+    if not user["is_admin"]:
+        st.subheader("✅ Dispute Effectiveness")
+        status_stats = {s: count for s, count in consumer_status_counts.items() if count > 0}
+        if status_stats:
+            for s, count in status_stats.items():
+                st.markdown(f"- **{s}**: {count} account(s)")
+
+    # --- Phase 10: Drag-and-Drop Upload ---
+
+    # ========== DRAG-AND-DROP REPORT UPLOAD ==========
+    st.subheader("📂 Upload Credit Report")
+    uploaded_drag = st.file_uploader("Drop your JSON, MISMO XML, PDF or Metro 2 file here",
+                                     type=["json", "xml", "pdf", "txt", "dat"], label_visibility="collapsed")
+
+    drag_name = uploaded_drag.name.lower() if uploaded_drag else ""
+    if drag_name.endswith(".json"):
+        report_data = json.load(uploaded_drag)
+        st.success("JSON report uploaded successfully.")
+        st.session_state["report_data"] = report_data
+
+    elif drag_name.endswith(".xml"):
+        uploaded_drag.seek(0)
+        with convert_cached(uploaded_drag) as converted:
+            st.session_state["report_data"] = json.load(converted)
+        st.success("MISMO report parsed and report structure created.")
+
+    elif drag_name.endswith(".pdf"):
+        st.session_state["report_data"] = parse_pdf(uploaded_drag.getvalue())
+        st.success("PDF parsed and report structure created.")
+
+    elif drag_name.endswith((".txt", ".dat")):
+        # Metro 2 furnisher file: keep one consumer's accounts, by SSN or the first record's
+        ssn = st.text_input("Consumer SSN (blank = first consumer in the file)", key="metro2_ssn").strip() or None
+        uploaded_drag.seek(0)
+        st.session_state["report_data"] = load_metro2_report(uploaded_drag, ssn)
+        st.success("Metro 2 file parsed and report structure created.")
+
+    # Use parsed report if present
+    if "report_data" in st.session_state:
+        report_data = st.session_state["report_data"]
+        consumer_name = report_data.get("consumer_info", {}).get("name", "Unknown")
+        credit_score = report_data.get("consumer_info", {}).get("credit_score", 0)
+        tradelines = as_items(report_data.get("tradelines", []))
+        st.markdown(f"**Consumer:** {consumer_name} — **Score:** {credit_score}")
+        for item in tradelines:
+            st.markdown(f"- {item.creditor} | {item.status} | ${item.balance}")
+
+    if user["is_admin"]:
+        return
+
+    # --- Phase 11: Client Progress Bar Tracker ---
+    st.subheader("📈 Dispute Progress Tracker")
+
+    total_accounts = len(items)
+    resolved_statuses = ["Removed", "Resolved", "Verified Deleted"]
+    active_statuses = ["Pending", "In Dispute", "Escalated", "Round 1", "Round 2", "Round 3"]
+
+    # A few counter lookups, however many accounts are tracked; capped at this report's accounts
+    resolved_count = min(sum(consumer_status_counts.get(s, 0) for s in resolved_statuses), total_accounts)
 
     percent_resolved = int((resolved_count / total_accounts) * 100) if total_accounts > 0 else 0
 
@@ -819,23 +877,17 @@ if not user["is_admin"]:
     # Status breakdown
     st.markdown("#### Account Status Breakdown")
     for s in resolved_statuses + active_statuses:
-        count = sum(1 for k, v in custom_statuses.items() if k.startswith(consumer_key) and v.get("status") == s)
+        count = consumer_status_counts.get(s, 0)
         if count > 0:
             st.markdown(f"- **{s}**: {count}")
 
-# --- Phase 12: Timeline, Score Comparison, AI Dispute Priority ---
-
-import plotly.graph_objects as go
+    # --- Phase 12: Timeline, Score Comparison, AI Dispute Priority ---
 
-# ========== Score Change Comparison ==========
-if not user["is_admin"]:
+    # ========== Score Change Comparison ==========
     st.subheader("📉 Score Improvement")
 
-    score_file = storage_dir / "score_history.json"
-    if score_file.exists():
-        with open(score_file) as f:
-            history = json.load(f)
-
+    history = ctx.client_history
+    if history:
         if len(history) >= 2:
             first = history[0]["score"]
             latest = history[-1]["score"]
@@ -843,25 +895,22 @@ if not user["is_admin"]:
             st.metric("Score Change", f"{change:+} points", delta_color="normal")
 
             # Plot line chart
-            df = pd.DataFrame(history)
-            df["date"] = pd.to_datetime(df["date"])
-            df = df.sort_values("date")
-            st.line_chart(df.set_index("date")["score"])
+            st.line_chart(data_cache.history_frame(history)["score"])
         else:
             st.info("Not enough uploads to compare scores.")
 
-# ========== Dispute Timeline ==========
-if not user["is_admin"]:
+    # ========== Dispute Timeline ==========
     st.subheader("🕒 Dispute Round Timeline")
 
     for i, item in enumerate(items):
-        creditor = item.get("creditor_name") or item.get("agency_name", "Unknown")
+        creditor = item.creditor
         status_key = f"{consumer_key}_{creditor}_{i}"
-        status_history = [v for k, v in custom_statuses.items() if k == status_key]
+        # Every round this account went through, from its own index entries
+        events = status_history.get(status_key, [])
 
-        if status_history:
-            timeline = [status_history[0]["status"]]
-            dates = [status_history[0].get("date", "N/A")]
+        if events:
+            timeline = [e["status"] for e in events]
+            dates = [e.get("date") or "N/A" for e in events]
 
             fig = go.Figure(go.Scatter(
                 x=dates,
@@ -873,295 +922,128 @@ if not user["is_admin"]:
             fig.update_layout(title=creditor, height=200)
             st.plotly_chart(fig, use_container_width=True)
 
-# ========== AI-Based Dispute Priority ==========
-if not user["is_admin"]:
+    # ========== AI-Based Dispute Priority ==========
     st.subheader("🤖 AI Dispute Priority Suggestion")
 
-    ranked = []
-    for i, item in enumerate(items):
-        creditor = item.get("creditor_name") or item.get("agency_name", "Unknown")
-        score = 0
-        status = item.get("status", "").lower()
-        remarks = item.get("remarks", "").lower()
-        balance = item.get("balance", item.get("amount", 0))
-
-        if "charge" in status:
-            score += 3
-        if "late" in status:
-            score += 2
-        if "collection" in remarks:
-            score += 2
-        if balance and balance > 1000:
-            score += 1
-
-        ranked.append((creditor, score))
+    priority_scores = score_items(items, "priority")
+    ranked = [
+        (item.creditor, int(score))
+        for item, score in zip(items, priority_scores)
+    ]
 
     ranked.sort(key=lambda x: x[1], reverse=True)
     st.markdown("### 🔝 Suggested Dispute Targets")
     for cred, score in ranked[:5]:
         st.markdown(f"- **{cred}** — Priority Score: `{score}/10`")
 
-# --- Phase 13: Admin Analytics + CSV Export + SaaS Prep ---
-
-import csv
-
-if user["is_admin"]:
-    st.subheader("📊 Admin Analytics Overview")
-
-    user_dirs = [d for d in storage_dir.parent.iterdir() if d.is_dir()]
-    total_users = len(user_dirs)
-    total_reports = sum(len(list(d.glob("**/report.json"))) for d in user_dirs)
-    total_letters = sum(len(letter_log.get(d.name, [])) for d in user_dirs)
-
-    st.metric("Total Users", total_users)
-    st.metric("Reports Uploaded", total_reports)
-    st.metric("Dispute Letters Generated", total_letters)
-
-    # Cross-user score trend view
-    st.markdown("### 📈 Global Score Trends")
-    all_scores = []
-    for user_dir in user_dirs:
-        score_path = user_dir / "score_history.json"
-        if score_path.exists():
-            with open(score_path) as f:
-                data = json.load(f)
-            for row in data:
-                all_scores.append({
-                    "email": user_dir.name.replace("_", "@").replace("dot", "."),
-                    "date": row["date"],
-                    "score": row["score"]
-                })
-
-    if all_scores:
-        df = pd.DataFrame(all_scores)
-        df["date"] = pd.to_datetime(df["date"])
-        st.line_chart(df.pivot_table(index="date", columns="email", values="score"))
-
-    # Export to CSV
-    st.markdown("### 📤 Export User Activity Log")
-
-    activity_rows = []
-    for user_dir in user_dirs:
-        history_path = user_dir / "score_history.json"
-        letters = letter_log.get(user_dir.name, [])
-        if history_path.exists():
-            with open(history_path) as f:
-                scores = json.load(f)
-                for s in scores:
-                    activity_rows.append({
-                        "user": user_dir.name,
-                        "date": s["date"],
-                        "score": s["score"],
-                        "letters_generated": len(letters)
-                    })
-
-    if activity_rows:
-        csv_file = "user_activity_log.csv"
-        with open(csv_file, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=activity_rows[0].keys())
-            writer.writeheader()
-            writer.writerows(activity_rows)
-
-        with open(csv_file, "rb") as f:
-            st.download_button("📥 Download CSV", f, file_name=csv_file, mime="text/csv")
-
-# Prep for SaaS structure
-st.sidebar.markdown("### ⚙️ SaaS Mode Settings (Prep)")
-demo_mode = st.sidebar.checkbox("Enable Demo Mode")
-if demo_mode:
-    st.sidebar.info("Demo mode enabled: limited data visibility and testing features.")
-
-# --- Phase 14: Top Tab UI, Logo Upload, Dashboard Enhancements ---
-
-import streamlit.components.v1 as components
-
-# Logo uploader
-st.sidebar.header("🖼️ Upload Logo")
-uploaded_logo = st.sidebar.file_uploader("Upload your logo (PNG/JPG)", type=["png", "jpg", "jpeg"])
-logo_path = None
-if uploaded_logo:
-    logo_path = f"logos/{user['email'].replace('@', '_at_')}_logo.png"
-    Path("logos").mkdir(exist_ok=True)
-    with open(logo_path, "wb") as f:
-        f.write(uploaded_logo.read())
-
-# Dashboard style with logo + metrics
-st.markdown("""
-<style>
-.css-1v0mbdj.eknhn3m10 {margin-top: -50px;}
-.css-1aumxhk {
-    background: #f9f9f9;
-    padding: 0.75rem 1rem;
-    border-radius: 8px;
-    box-shadow: 0 1px 2px rgba(0,0,0,0.1);
-}
-</style>
-""", unsafe_allow_html=True)
-
-# Top tab nav layout
-tab_options = ["Dashboard", "Dispute Manager", "Reports", "Messages", "Settings"]
-selected_tab = st.selectbox("📁 Navigate", tab_options, key="tabnav")
-
-# Display uploaded logo (if available)
-if logo_path and Path(logo_path).exists():
-    st.image(logo_path, width=150)
-
-# === DASHBOARD OVERVIEW ===
-if selected_tab == "Dashboard":
-    st.title("📊 Dashboard Overview")
-
-    # Calendar preview
-    st.subheader("🗓️ Calendar")
-    today = datetime.today()
-    st.markdown(f"**Today:** {today.strftime('%A, %B %d, %Y')}")
-
-    # Active clients metric
-    clients = [p.name for p in storage_dir.iterdir() if p.is_dir()]
-    st.metric("Active Clients", len(clients))
-
-    # Reports due for refresh
-    st.subheader("⏱️ Reports Due (45+ days)")
-    due_list = []
-    for c in clients:
-        folders = sorted((storage_dir / c).glob("*"), reverse=True)
-        if folders:
-            try:
-                last = datetime.strptime(folders[0].name, "%Y-%m-%d_%H-%M")
-                if (today - last).days >= 45:
-                    due_list.append((c.replace("_", " "), (today - last).days))
-            except:
-                continue
-
-    if due_list:
-        for name, days in due_list:
-            st.markdown(f"- **{name}** ({days} days ago)")
+# === REPORTS ===
+@router.page("Reports", needs=("letter_log", "versions", "shard", "client_letters"))
+def reports_page(ctx):
+    user = ctx.user
+
+    # === View Letter History ===
+    # Admins see the whole book; a client only reads its own shard
+    st.sidebar.title("📑 Letter History")
+    letter_log = ctx.letter_log if user["is_admin"] else {client_key(user): ctx.client_letters}
+    if any(letter_log.values()):
+        for person, entries in letter_log.items():
+            with st.sidebar.expander(person.replace("_", " ")):
+                for e in entries:
+                    st.markdown(f"- {e['date']} | **{e['creditor']}** | {e['bureau']} | {e['reason']}")
     else:
-        st.success("No clients are due for refresh.")
-
-# Additional tabs (placeholder for rest of app)
-elif selected_tab == "Dispute Manager":
-    st.title("🧾 Dispute Manager")
-    st.info("Manage disputes here (move core tools into this view).")
-
-elif selected_tab == "Reports":
-    st.title("📂 Report Viewer")
-    st.info("Show uploaded JSON and parsed PDFs here.")
-
-elif selected_tab == "Messages":
-    st.title("💬 Client Messages")
-    st.info("Inbox and communication hub.")
-
-elif selected_tab == "Settings":
-    st.title("⚙️ Settings")
-    st.info("User, brand, and app configuration.")
-
-# --- Phase 15: Polished Tab Views ---
-
-# Dispute Manager (core functionality moved here)
-if selected_tab == "Dispute Manager":
-    st.title("🧾 Dispute Manager")
-    st.write("Upload a credit report, select accounts, and generate dispute letters.")
+        st.sidebar.info("No letters generated yet.")
 
-    st.subheader("📤 Upload or Drag-and-Drop Credit Report")
-    uploaded = st.file_uploader("Upload credit report (JSON or PDF)", type=["json", "pdf"])
-
-    if uploaded:
-        if uploaded.name.endswith(".json"):
-            report_data = json.load(uploaded)
-        elif uploaded.name.endswith(".pdf"):
-            text = ""
-            with fitz.open(stream=uploaded.read(), filetype="pdf") as doc:
-                for page in doc:
-                    text += page.get_text()
-            report_data = {
-                "consumer_info": {"name": "PDF Parse", "credit_score": 620},
-                "tradelines": [{"creditor_name": "PDF Creditor", "status": "Late", "balance": 750, "last_reported": "2024-11-01"}]
-            }
-        st.success("Report loaded!")
-        consumer = report_data.get("consumer_info", {}).get("name", "Unknown")
-        score = report_data.get("consumer_info", {}).get("credit_score", "N/A")
-        st.markdown(f"**Consumer:** {consumer} | **Score:** {score}")
-
-        st.subheader("🧠 Account Disputes")
-        tradelines = report_data.get("tradelines", [])
-        for item in tradelines:
-            with st.expander(f"{item['creditor_name']} — {item['status']}"):
-                st.markdown(f"- **Balance:** ${item['balance']}")
-                st.markdown(f"- **Last Reported:** {item['last_reported']}")
-
-# Report viewer
-elif selected_tab == "Reports":
+    # --- Phase 15: Report viewer ---
     st.title("📂 Uploaded Reports")
-    client_key = user["email"].replace("@", "_at_")
-    user_folder = Path("stored_reports") / client_key
-    if user_folder.exists():
-        report_files = list(user_folder.glob("**/report.json"))
-        for file in sorted(report_files, reverse=True):
-            with open(file) as f:
-                data = json.load(f)
-            with st.expander(f"{file.parent.name} — {data.get('consumer_info', {}).get('name', '')}"):
+    reports_version = ctx.versions.get("reports", 0)
+    user_folder = ctx.storage_dir / user["email"].replace("@", "_at_")
+    user_reports = data_cache.stored_reports(str(user_folder), reports_version)
+    if user_reports:
+        for name, data in user_reports:
+            with st.expander(f"{name} — {data.get('consumer_info', {}).get('name', '')}"):
                 st.json(data)
                 st.download_button("Download JSON", data=json.dumps(data, indent=2),
-                                   file_name=f"{file.parent.name}_report.json", mime="application/json")
+                                   file_name=f"{name}_report.json", mime="application/json")
     else:
         st.info("No reports uploaded yet.")
 
-# Messages view
-elif selected_tab == "Messages":
+    # --- Phase 9: Secure preview of uploaded JSON reports (client only) ---
+    if not user["is_admin"]:
+        st.subheader("🔍 View Uploaded Credit Reports")
+        client_path = ctx.storage_dir / client_key(user)
+        for name, report_data in data_cache.stored_reports(str(client_path), ctx.shard.get("reports", 0)):
+            with st.expander(f"Report: {name}"):
+                st.json(report_data)
+                st.download_button("Download JSON", data=json.dumps(report_data, indent=2),
+                                   file_name=f"{name}_report.json", mime="application/json",
+                                   key=f"client_report_{name}")
+
+# === MESSAGES ===
+@router.page("Messages", needs=("messages",))
+def messages_page(ctx):
+    user = ctx.user
     st.title("💬 Messages")
     if not user["is_admin"]:
         st.subheader("Send a Message")
         msg = st.text_area("Type your message:")
         if st.button("Send"):
-            all_messages.append({
-                "from": user["email"],
-                "to": "admin",
-                "text": msg,
-                "date": datetime.now().strftime("%Y-%m-%d %H:%M")
-            })
-            with open("messages.json", "w") as f:
-                json.dump(all_messages, f, indent=2)
+            add_message(db, user["email"], "admin", msg, datetime.now().strftime("%Y-%m-%d %H:%M"))
             st.success("Message sent!")
     else:
         st.subheader("Inbox")
-        if all_messages:
-            for m in reversed(all_messages[-10:]):
+        if ctx.messages:
+            for m in ctx.messages:
                 st.markdown(f"**{m['from']}** at {m['date']}")
                 st.markdown(f"> {m['text']}")
                 st.markdown("---")
         else:
             st.info("No messages yet.")
 
-# Settings view
-elif selected_tab == "Settings":
+# === SETTINGS ===
+@router.page("Settings", needs=("branding",))
+def settings_page(ctx):
+    user = ctx.user
+    user_branding = ctx.branding
+
+    # --- Phase 7: Client branding ---
+    if not user["is_admin"]:
+        st.sidebar.header("🎨 Your Branding")
+        agency_brand = st.sidebar.text_input("Your Agency Name", value=user_branding.get("name", ""))
+        agency_logo = st.sidebar.text_input("Logo URL", value=user_branding.get("logo", ""))
+        if st.sidebar.button("Save Branding"):
+            ctx.writes.update("branding", user["email"], user_branding, name=agency_brand, logo=agency_logo)
+            if agency_logo:
+                # Fetch + downscale in the background so neither this rerun nor letter generation waits on the network
+                prefetch_in_background(agency_logo, force=True)
+            st.sidebar.success("Branding saved!")
+        if agency_logo and logo_error(agency_logo):
+            st.sidebar.warning(f"Couldn't fetch your logo: {logo_error(agency_logo)}")
+
+    # --- Phase 9: Add custom statuses (admin only) ---
+    if user["is_admin"]:
+        st.sidebar.header("⚙️ Custom Dispute Statuses")
+        new_status = st.sidebar.text_input("Add New Status")
+        if st.sidebar.button("Add Status"):
+            if add_status_option(db, new_status):
+                st.sidebar.success("Status added.")
+
+    # --- Phase 15: Settings view ---
     st.title("⚙️ User Settings")
 
     st.markdown(f"**Email:** {user['email']}")
     st.markdown("**Branding Options**")
-    agency_name = st.text_input("Agency Name", value=branding_data.get(user["email"], {}).get("name", ""))
-    color_theme = st.color_picker("Theme Color", value="#2c3e50")
+    agency_name = st.text_input("Agency Name", value=user_branding.get("name", ""), key="settings_agency_name")
+    color_theme = st.color_picker("Theme Color", value="#2c3e50", key="settings_color")
     new_logo = st.file_uploader("Upload New Logo", type=["png", "jpg"])
 
     if st.button("Save Settings"):
-        branding_data[user["email"]] = {
-            "name": agency_name,
-            "color": color_theme,
-            "logo": branding_data.get(user["email"], {}).get("logo", "")
-        }
+        saved_logo = user_branding.get("logo", "")
         if new_logo:
-            logo_path = f"logos/{user['email'].replace('@', '_at_')}_logo.png"
-            with open(logo_path, "wb") as f:
-                f.write(new_logo.read())
-            branding_data[user["email"]]["logo"] = logo_path
-        with open("branding.json", "w") as f:
-            json.dump(branding_data, f, indent=2)
+            saved_logo = store_uploaded_logo(new_logo.getvalue())
+        ctx.writes.update("branding", user["email"], user_branding, name=agency_name, logo=saved_logo, color=color_theme)
         st.success("Settings saved!")
 
-# --- Phase 16: No Login, Top Tabs, Leads/Clients Views ---
-
-# Replacing login with default public session
-user = {"email": "guest@example.com", "is_admin": True}
-consumer_key = "guest"
+# --- Phase 16: Top Tab Navigation ---
 
 # Apply compact tab layout
 tab_style = """
@@ -1174,279 +1056,16 @@ tab_style = """
 """
 st.markdown(tab_style, unsafe_allow_html=True)
 
-# Compact top tab selection
-tab_options = ["Dashboard", "Leads", "Clients", "Dispute Manager", "Reports", "Messages", "Settings"]
-selected_tab = st.selectbox("🧭 Navigate", tab_options, key="topnav")
-
-# === NEW: Leads tab ===
-if selected_tab == "Leads":
-    st.title("📇 Leads")
-    st.info("Add and manage new prospects here.")
-    st.dataframe(pd.DataFrame(columns=["Name", "Email", "Source", "Date Added"]))
-
-# === NEW: Clients tab ===
-elif selected_tab == "Clients":
-    st.title("👥 Clients")
-    st.info("List of active or onboarded credit repair clients.")
-    st.dataframe(pd.DataFrame(columns=["Client", "Last Upload", "Status", "Score"]))
+selected_tab = st.selectbox("🧭 Navigate", router.names(), key="topnav")
 
-# --- Phase 17: Editable CRM Leads + Clients ---
-
-import uuid
-
-# CRM file storage paths
-leads_file = Path("crm_leads.json")
-clients_file = Path("crm_clients.json")
-
-# Load or initialize
-if leads_file.exists():
-    leads_data = json.load(open(leads_file))
-else:
-    leads_data = []
-
-if clients_file.exists():
-    clients_data = json.load(open(clients_file))
-else:
-    clients_data = []
-
-# === LEADS VIEW ===
-if selected_tab == "Leads":
-    st.title("📇 Leads CRM")
-    with st.form("add_lead"):
-        col1, col2 = st.columns(2)
-        with col1:
-            lead_name = st.text_input("Lead Name")
-            lead_email = st.text_input("Email")
-        with col2:
-            lead_source = st.selectbox("Source", ["Facebook", "Referral", "Website", "Other"])
-            submitted = st.form_submit_button("Add Lead")
-        if submitted and lead_name and lead_email:
-            leads_data.append({
-                "id": str(uuid.uuid4()),
-                "name": lead_name,
-                "email": lead_email,
-                "source": lead_source,
-                "status": "New",
-                "added": datetime.now().strftime("%Y-%m-%d")
-            })
-            with open(leads_file, "w") as f:
-                json.dump(leads_data, f, indent=2)
-            st.success("Lead added!")
-
-    st.markdown("### Current Leads")
-    for lead in leads_data:
-        with st.expander(f"{lead['name']} ({lead['email']})"):
-            st.markdown(f"- **Source:** {lead['source']}")
-            st.markdown(f"- **Status:** {lead['status']}")
-            st.markdown(f"- **Date Added:** {lead['added']}")
-            col1, col2 = st.columns([1, 3])
-            with col1:
-                if st.button("Convert", key=f"convert_{lead['id']}"):
-                    clients_data.append({
-                        "id": lead["id"],
-                        "name": lead["name"],
-                        "email": lead["email"],
-                        "status": "Active",
-                        "joined": datetime.now().strftime("%Y-%m-%d")
-                    })
-                    leads_data = [l for l in leads_data if l["id"] != lead["id"]]
-                    with open(leads_file, "w") as f:
-                        json.dump(leads_data, f, indent=2)
-                    with open(clients_file, "w") as f:
-                        json.dump(clients_data, f, indent=2)
-                    st.success(f"{lead['name']} converted to client!")
-
-# === CLIENTS VIEW ===
-elif selected_tab == "Clients":
-    st.title("👥 Clients CRM")
-    st.markdown("### Current Clients")
-    for client in clients_data:
-        with st.expander(f"{client['name']} ({client['email']})"):
-            st.markdown(f"- **Status:** {client['status']}")
-            st.markdown(f"- **Joined:** {client['joined']}")
-
-# --- Phase 18: Custom Lead Stages, CSV Upload, and Zapier Integration ---
-
-# Load tag/stage config
-stage_options = ["New", "Hot", "Follow-Up", "No Response", "Converted"]
-tag_options = ["Credit", "Student Loan", "Real Estate", "Bankruptcy", "Auto Loan"]
-
-# Custom upload via CSV
-if selected_tab == "Leads":
-    st.markdown("### 📥 Bulk Upload Leads via CSV")
-    csv_upload = st.file_uploader("Upload CSV file with columns: name, email, source", type="csv", key="csvleads")
-    if csv_upload:
-        df = pd.read_csv(csv_upload)
-        count = 0
-        for _, row in df.iterrows():
-            if "name" in row and "email" in row:
-                leads_data.append({
-                    "id": str(uuid.uuid4()),
-                    "name": row["name"],
-                    "email": row["email"],
-                    "source": row.get("source", "CSV Import"),
-                    "status": "New",
-                    "added": datetime.now().strftime("%Y-%m-%d")
-                })
-                count += 1
-        with open(leads_file, "w") as f:
-            json.dump(leads_data, f, indent=2)
-        st.success(f"{count} leads uploaded from CSV!")
-
-    # Display editable lead list with stages and tags
-    st.markdown("### 📝 Lead Management")
-    for lead in leads_data:
-        with st.expander(f"{lead['name']} ({lead['email']})"):
-            lead["status"] = st.selectbox("Status", stage_options, index=stage_options.index(lead.get("status", "New")), key=f"stage_{lead['id']}")
-            tags = st.multiselect("Tags", tag_options, default=lead.get("tags", []), key=f"tags_{lead['id']}")
-            lead["tags"] = tags
-            col1, col2 = st.columns([1, 3])
-            with col1:
-                if st.button("Convert", key=f"convert_{lead['id']}"):
-                    clients_data.append({
-                        "id": lead["id"],
-                        "name": lead["name"],
-                        "email": lead["email"],
-                        "status": "Active",
-                        "joined": datetime.now().strftime("%Y-%m-%d")
-                    })
-                    leads_data = [l for l in leads_data if l["id"] != lead["id"]]
-                    with open(clients_file, "w") as f:
-                        json.dump(clients_data, f, indent=2)
-                    st.success(f"{lead['name']} converted to client.")
-            with open(leads_file, "w") as f:
-                json.dump(leads_data, f, indent=2)
-
-# === ZAPIER WEBHOOK ENDPOINT ===
-if "zapier_leads" not in st.session_state:
-    st.session_state["zapier_leads"] = []
-
-def capture_zapier_lead(payload):
-    new_lead = {
-        "id": str(uuid.uuid4()),
-        "name": payload.get("name", "Zapier Lead"),
-        "email": payload.get("email", "noemail@example.com"),
-        "source": payload.get("source", "Zapier"),
-        "status": "New",
-        "added": datetime.now().strftime("%Y-%m-%d")
-    }
-    leads_data.append(new_lead)
-    with open(leads_file, "w") as f:
-        json.dump(leads_data, f, indent=2)
-    st.session_state["zapier_leads"].append(new_lead)
-
-# Simulate Zapier JSON input (admin only testing)
-if selected_tab == "Leads" and user["is_admin"]:
-    with st.expander("🧪 Simulate Zapier Lead Capture"):
-        zap_name = st.text_input("Zapier Name")
-        zap_email = st.text_input("Zapier Email")
-        zap_source = st.text_input("Zapier Source", value="Web Form")
-        if st.button("Add Zapier Lead"):
-            capture_zapier_lead({"name": zap_name, "email": zap_email, "source": zap_source})
-            st.success("Zapier lead added.")
-
-# --- Phase 19: Dashboard Charts + Sample Records ---
-
-# Load sample data
-leads_data = [{"id": "94839693-fc42-4150-a5e6-26c874b75900", "name": "Lead 1 Sample", "email": "lead1@example.com", "source": "Facebook", "status": "Hot", "tags": ["Medical", "Late"], "phone": "(555) 555-5501", "notes": "This is a test note for lead 1.", "added": "2025-04-24"}, {"id": "aaab7b49-8957-4399-9e4d-6f011a429043", "name": "Lead 2 Sample", "email": "lead2@example.com", "source": "Website", "status": "Hot", "tags": ["Late", "Medical"], "phone": "(555) 555-5502", "notes": "This is a test note for lead 2.", "added": "2025-04-24"}, {"id": "7ba755b0-c72b-44f7-8dc1-0616c57d5734", "name": "Lead 3 Sample", "email": "lead3@example.com", "source": "Referral", "status": "Follow-Up", "tags": ["Medical", "Student Loan"], "phone": "(555) 555-5503", "notes": "This is a test note for lead 3.", "added": "2025-04-24"}, {"id": "e4fe7741-ee3e-4f3d-aed8-073143ae8669", "name": "Lead 4 Sample", "email": "lead4@example.com", "source": "Facebook", "status": "New", "tags": ["Student Loan", "Auto"], "phone": "(555) 555-5504", "notes": "This is a test note for lead 4.", "added": "2025-04-24"}, {"id": "de9bd9da-8f5c-405e-8fd7-d2cfb6288ccb", "name": "Lead 5 Sample", "email": "lead5@example.com", "source": "Website", "status": "New", "tags": ["Late", "Student Loan"], "phone": "(555) 555-5505", "notes": "This is a test note for lead 5.", "added": "2025-04-24"}, {"id": "68bd6691-0fd6-4d7d-919d-3618c16a5a85", "name": "Lead 6 Sample", "email": "lead6@example.com", "source": "Referral", "status": "Hot", "tags": ["Medical", "Late"], "phone": "(555) 555-5506", "notes": "This is a test note for lead 6.", "added": "2025-04-24"}, {"id": "1ea80ba6-7411-4b6c-a8e1-98182571e35d", "name": "Lead 7 Sample", "email": "lead7@example.com", "source": "Referral", "status": "Follow-Up", "tags": ["Auto", "Late"], "phone": "(555) 555-5507", "notes": "This is a test note for lead 7.", "added": "2025-04-24"}, {"id": "919d6b5b-50a1-45a1-80aa-6fb1fdb552d8", "name": "Lead 8 Sample", "email": "lead8@example.com", "source": "Website", "status": "New", "tags": ["Auto", "Medical"], "phone": "(555) 555-5508", "notes": "This is a test note for lead 8.", "added": "2025-04-24"}, {"id": "3ff68c6e-7eac-42f6-9b0e-d12ff3f822ab", "name": "Lead 9 Sample", "email": "lead9@example.com", "source": "Facebook", "status": "Follow-Up", "tags": ["Medical", "Auto"], "phone": "(555) 555-5509", "notes": "This is a test note for lead 9.", "added": "2025-04-24"}, {"id": "2c91c121-0611-4afc-ae91-27e1277c7e11", "name": "Lead 10 Sample", "email": "lead10@example.com", "source": "Website", "status": "New", "tags": ["Student Loan", "Medical"], "phone": "(555) 555-5510", "notes": "This is a test note for lead 10.", "added": "2025-04-24"}]
-clients_data = [{"id": "a6a50d9b-9edb-49eb-b72b-c2c9733a9ebc", "name": "Client 1 Demo", "email": "client1@example.com", "status": "Active", "phone": "(444) 444-4401", "joined": "2025-04-24", "score": 641}, {"id": "2c5f9f4a-5a6e-4552-8707-b4e65dc5add5", "name": "Client 2 Demo", "email": "client2@example.com", "status": "Active", "phone": "(444) 444-4402", "joined": "2025-04-24", "score": 667}, {"id": "61583cf4-2b9e-42ad-81f3-5b5b06bbf7b8", "name": "Client 3 Demo", "email": "client3@example.com", "status": "Active", "phone": "(444) 444-4403", "joined": "2025-04-24", "score": 616}, {"id": "6b5ea7ed-8682-49f5-b3a3-1e9612dc0415", "name": "Client 4 Demo", "email": "client4@example.com", "status": "Active", "phone": "(444) 444-4404", "joined": "2025-04-24", "score": 642}, {"id": "971102b2-8f9c-44a5-9c23-c37886932232", "name": "Client 5 Demo", "email": "client5@example.com", "status": "Active", "phone": "(444) 444-4405", "joined": "2025-04-24", "score": 696}, {"id": "7af328b4-c022-4ffd-9d0d-e9a5ceda7672", "name": "Client 6 Demo", "email": "client6@example.com", "status": "Active", "phone": "(444) 444-4406", "joined": "2025-04-24", "score": 617}, {"id": "7bf4f330-9e17-41f6-80c4-454a2cd40a30", "name": "Client 7 Demo", "email": "client7@example.com", "status": "Active", "phone": "(444) 444-4407", "joined": "2025-04-24", "score": 694}, {"id": "afec6466-4252-4cc0-83f5-2c0557910367", "name": "Client 8 Demo", "email": "client8@example.com", "status": "Active", "phone": "(444) 444-4408", "joined": "2025-04-24", "score": 678}, {"id": "5f503552-43d0-4e61-b0ef-4ff69844eb2b", "name": "Client 9 Demo", "email": "client9@example.com", "status": "Active", "phone": "(444) 444-4409", "joined": "2025-04-24", "score": 661}, {"id": "a61d69c7-b65d-40d0-bdff-57d551c3f2cd", "name": "Client 10 Demo", "email": "client10@example.com", "status": "Active", "phone": "(444) 444-4410", "joined": "2025-04-24", "score": 595}]
-
-# === DASHBOARD UPDATES ===
-if selected_tab == "Dashboard":
-    st.title("📊 Dashboard Overview")
-
-    st.subheader("📈 CRM Metrics")
-    st.metric("Total Clients", len(clients_data))
-    st.metric("Active Leads", len(leads_data))
-
-    lead_sources = [l['source'] for l in leads_data]
-    source_df = pd.DataFrame(lead_sources, columns=["Source"])
-    source_chart = source_df["Source"].value_counts().reset_index()
-    source_chart.columns = ["Source", "Count"]
-    st.bar_chart(source_chart.set_index("Source"))
-
-    score_data = [c["score"] for c in clients_data]
-    score_df = pd.DataFrame(score_data, columns=["Credit Score"])
-    st.line_chart(score_df)
-
-    st.subheader("🗓️ Today")
-    st.markdown(f"**Date:** Thursday, April 24, 2025")
-
-# Replace Lead/Client displays with compact cards
-if selected_tab == "Leads":
-    st.title("📇 Leads CRM")
-    for lead in leads_data:
-        with st.container():
-            st.markdown(f"**{lead['name']}** — {lead['email']}")
-            col1, col2, col3 = st.columns([3, 2, 2])
-            col1.markdown(f"Source: `{lead['source']}`")
-            col2.markdown(f"Status: `{lead['status']}`")
-            col3.markdown(f"Phone: {lead.get('phone', '')}")
-            if lead.get("tags"):
-                st.markdown(f"Tags: {', '.join(lead['tags'])}")
-            st.markdown("---")
-
-elif selected_tab == "Clients":
-    st.title("👥 Clients CRM")
-    for client in clients_data:
-        with st.container():
-            st.markdown(f"**{client['name']}** — {client['email']}")
-            col1, col2, col3 = st.columns([2, 2, 2])
-            col1.markdown(f"Phone: {client.get('phone', '')}")
-            col2.markdown(f"Joined: {client['joined']}")
-            col3.markdown(f"Score: {client.get('score', 'N/A')}")
-            st.markdown("---")
-
-# --- Phase 21: Search, Filters, Inactivity Alerts ---
-
-def filter_leads(leads, search="", status_filter=None):
-    filtered = []
-    today = datetime.now()
-    for lead in leads:
-        if search.lower() in lead["name"].lower() or search.lower() in lead["email"].lower():
-            if status_filter is None or lead["status"] == status_filter:
-                days_inactive = (today - datetime.strptime(lead["added"], "%Y-%m-%d")).days
-                lead["inactive"] = days_inactive > 30
-                filtered.append(lead)
-    return filtered
-
-def filter_clients(clients, search=""):
-    return [c for c in clients if search.lower() in c["name"].lower() or search.lower() in c["email"].lower()]
-
-# Enhanced Leads Tab
-if selected_tab == "Leads":
-    st.title("📇 Leads CRM")
-
-    search_leads = st.text_input("🔍 Search Leads", placeholder="Search by name or email")
-    status_filter = st.selectbox("Filter by Status", ["All"] + stage_options)
-    selected_status = None if status_filter == "All" else status_filter
-
-    visible_leads = filter_leads(leads_data, search_leads, selected_status)
-    for lead in visible_leads:
-        with st.container():
-            st.markdown(f"**{lead['name']}** — {lead['email']}")
-            col1, col2, col3 = st.columns([3, 2, 2])
-            col1.markdown(f"Source: `{lead['source']}`")
-            col2.markdown(f"Status: `{lead['status']}`")
-            col3.markdown(f"Phone: {lead.get('phone', '')}")
-            if lead.get("tags"):
-                st.markdown(f"Tags: {', '.join(lead['tags'])}")
-            if lead.get("inactive"):
-                st.warning("⚠️ Inactive 30+ days")
-            st.markdown("---")
-
-# Enhanced Clients Tab
-elif selected_tab == "Clients":
-    st.title("👥 Clients CRM")
-
-    search_clients = st.text_input("🔍 Search Clients", placeholder="Search by name or email")
-    visible_clients = filter_clients(clients_data, search_clients)
+# Display uploaded logo (if available)
+if logo_path and Path(logo_path).exists():
+    st.image(logo_path, width=150)
 
-    for client in visible_clients:
-        with st.container():
-            st.markdown(f"**{client['name']}** — {client['email']}")
-            col1, col2, col3 = st.columns([2, 2, 2])
-            col1.markdown(f"Phone: {client.get('phone', '')}")
-            col2.markdown(f"Joined: {client['joined']}")
-            col3.markdown(f"Score: {client.get('score', 'N/A')}")
-            st.markdown("---")
+# Widget edits are staged while the page renders and written once, after it
+# (also when the page stops early with st.stop / st.rerun)
+writes = WriteBehind()
+try:
+    router.run(selected_tab, db=db, user=user, today=today, storage_dir=storage_dir, writes=writes)
+finally:
+    writes.flush(db)
@@ -4,6 +4,7 @@ import pandas as pd
 import random
 import uuid
 from datetime import datetime
+from crm_search import session_index
 
 st.set_page_config(page_title="AI Credit Disputer", layout="wide")
 
@@ -59,14 +60,8 @@ elif tab == "Leads":
     status_filter = st.selectbox("Status Filter", ["All", "New", "Hot", "Follow-Up"])
     
     def filter_leads(leads, search_text, status_filter):
-        today = datetime.now()
-        filtered = []
-        for lead in leads:
-            if search_text.lower() in lead["name"].lower() or search_text.lower() in lead["email"].lower():
-                if status_filter == "All" or lead["status"] == status_filter:
-                    lead["inactive"] = (today - datetime.strptime(lead["added"], "%Y-%m-%d")).days > 30
-                    filtered.append(lead)
-        return filtered
+        index = session_index(st.session_state, "leads", leads, date_field="added")
+        return index.search(search_text, None if status_filter == "All" else status_filter)
 
     filtered_leads = filter_leads(leads_data, search_leads, status_filter)
 
@@ -81,7 +76,7 @@ elif tab == "Clients":
     search_clients = st.text_input("🔍 Search Clients", placeholder="Name or email")
     
     def filter_clients(clients, search_text):
-        return [c for c in clients if search_text.lower() in c["name"].lower() or search_text.lower() in c["email"].lower()]
+        return session_index(st.session_state, "clients", clients).search(search_text)
 
     filtered_clients = filter_clients(clients_data, search_clients)
 
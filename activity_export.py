@@ -0,0 +1,92 @@
+import csv
+import gzip
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from report_store import activity_rows
+from storage import DB_PATH, get_db
+
+# --- Admin activity export ---
+# Builds the user activity log only when someone asks for it, e.g. from a
+# st.download_button callable. Rows come out of SQLite in chunks of
+# CHUNK_ROWS. Each chunk goes straight into a gzip CSV stream or becomes one
+# Parquet row group, so the full row set is never held in memory and nothing
+# is written to the working directory. Only the compressed result is kept
+# as bytes, because Streamlit serves downloads from memory. Scores are
+# written as float64. The score column has INTEGER affinity, but it keeps
+# whatever credit_score the report carried, such as 640.5 or free text, so
+# a value that is not a number is exported as null.
+
+CHUNK_ROWS = 10_000
+COLUMNS = ("user", "date", "score", "letters_generated")
+SCHEMA = pa.schema([
+    ("user", pa.string()),
+    ("date", pa.string()),
+    ("score", pa.float64()),
+    ("letters_generated", pa.int64()),
+])
+
+# label: (file extension, mime type)
+FORMATS = {
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def _chunks(db, consumer=None, start=None, end=None, chunk_rows=CHUNK_ROWS):
+    cursor = activity_rows(db, consumer, start, end)
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            return
+        yield rows
+
+
+def _score(value):
+    # float64 for the Parquet score column; None for missing or non-numeric scores
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def write_csv_gz(chunks, out):
+    with gzip.GzipFile(fileobj=out, mode="wb") as gz:
+        text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        writer.writerow(COLUMNS)
+        for rows in chunks:
+            writer.writerows(rows)
+        text.flush()
+        text.detach()
+
+
+def write_parquet(chunks, out):
+    with pq.ParquetWriter(out, SCHEMA, compression="zstd") as writer:
+        wrote = False
+        for rows in chunks:
+            columns = list(zip(*rows))
+            columns[2] = [_score(v) for v in columns[2]]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, SCHEMA)], schema=SCHEMA
+            ))
+            wrote = True
+        if not wrote:
+            writer.write_table(SCHEMA.empty_table())
+
+
+WRITERS = {"CSV (gzip)": write_csv_gz, "Parquet": write_parquet}
+
+
+def export_activity(fmt, consumer=None, start=None, end=None, db_path=DB_PATH, chunk_rows=CHUNK_ROWS):
+    # Returns the export as bytes; start / end are inclusive "%Y-%m-%d" dates
+    out = io.BytesIO()
+    WRITERS[fmt](_chunks(get_db(db_path), consumer, start, end, chunk_rows), out)
+    return out.getvalue()
+
+
+def export_file_name(fmt, consumer=None, start=None, end=None):
+    parts = ["user_activity_log", consumer, start, end]
+    return "_".join(p for p in parts if p) + "." + FORMATS[fmt][0]
@@ -0,0 +1,112 @@
+import argparse
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mismo  # noqa: E402
+
+# --- MISMO merged-file benchmark ---
+# Writes a merged MISMO 2.4 file (several CREDIT_RESPONSEs in one
+# RESPONSE_GROUP, as tri-merge vendors deliver them). It then times
+# mismo.open_mismo_report, mismo.convert_to_json and a plain ET.parse
+# against it. Each mode runs in its own process, so max RSS is that mode's
+# peak. The numbers in the user-018 commit came from
+#   python benchmarks/mismo_merged.py --liabilities 300000 --responses 3
+# The defaults are smaller so the run stays quick.
+
+MODES = ("stream", "convert", "etree")
+RATINGS = ("AsAgreed", "Late30Days", "ChargeOff", "Late90Days")
+BUREAUS = ("Equifax", "Experian", "TransUnion")
+
+
+def liability(i, rng):
+    collection = i % 9 == 0
+    repositories = "".join(f'<CREDIT_REPOSITORY _SourceType="{b}" _SubscriberCode="X{i}"/>'
+                           for b in BUREAUS[:1 + i % 3])
+    extra = (' IsCollectionIndicator="Y" CreditLoanType="CollectionAttorney" _OriginalCreditorName="ST JOSEPH HOSPITAL"'
+             if collection else ' CreditLoanType="CreditCard" _CreditLimitAmount="5000"')
+    return (
+        f'<CREDIT_LIABILITY CreditLiabilityID="L{i}" BorrowerID="B1" _AccountIdentifier="ACCT{i:08d}" '
+        f'_AccountOpenedDate="2019-05" _AccountReportedDate="2024-10-31" _AccountStatusType="Open" '
+        f'_AccountType="Revolving" _UnpaidBalanceAmount="{1000 + i % 4000}" _HighBalanceAmount="4200" '
+        f'_PastDueAmount="120"{extra}>'
+        f'<_CREDITOR _Name="{"MIDLAND CREDIT" if collection else "CAPITAL ONE"}" _City="RICHMOND" _State="VA"/>'
+        f'<_CURRENT_RATING _Code="2" _Type="{rng.choice(RATINGS)}"/>'
+        f'<_PAYMENT_PATTERN _Data="CCCCCC1CCCCC" _StartDate="2024-10"/>'
+        f'<CREDIT_COMMENT _SourceType="Equifax"><_Text>ACCOUNT CLOSED BY CREDIT GRANTOR</_Text></CREDIT_COMMENT>'
+        f'{repositories}</CREDIT_LIABILITY>\n'
+    )
+
+
+def write_merged(path, liabilities, responses=3, seed=0):
+    # Borrowers first, then liabilities, inquiries and scores, as bureaus order them
+    rng = random.Random(seed)
+    per_response = liabilities // responses
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<RESPONSE_GROUP MISMOVersionID="2.4"><RESPONSE><RESPONSE_DATA>\n')
+        for r in range(responses):
+            f.write(f'<CREDIT_RESPONSE MISMOVersionID="2.4" CreditReportIdentifier="R{r}">\n')
+            f.write('<BORROWER BorrowerID="C1" _FirstName="JANE" _LastName="PUBLIC" '
+                    '_PrintPositionType="CoBorrower" _SSN="987654321"/>\n')
+            f.write('<BORROWER BorrowerID="B1" _FirstName="JOHN" _MiddleName="Q" _LastName="PUBLIC" '
+                    '_PrintPositionType="Borrower" _SSN="123456789" _BirthDate="1980-01-02">'
+                    '<_RESIDENCE _StreetAddress="123 MAIN ST" _City="SPRINGFIELD" _State="IL" _PostalCode="62701" '
+                    'BorrowerResidencyType="Current"/></BORROWER>\n')
+            for i in range(r * per_response, (r + 1) * per_response):
+                f.write(liability(i, rng))
+            for j in range(5):
+                f.write(f'<CREDIT_INQUIRY CreditInquiryID="I{j}" _Name="BANK {j}" _Date="2024-01-0{j + 1}"/>\n')
+            for bureau, value in (("Equifax", 640), ("Experian", 655), ("TransUnion", 628)):
+                f.write(f'<CREDIT_SCORE BorrowerID="B1" CreditRepositorySourceType="{bureau}" '
+                        f'_ModelNameType="FICO" _Value="{value}" _Date="2024-11-01"/>\n')
+            f.write('<CREDIT_SCORE BorrowerID="C1" CreditRepositorySourceType="Equifax" _Value="720"/>\n'
+                    '</CREDIT_RESPONSE>\n')
+        f.write('</RESPONSE_DATA></RESPONSE></RESPONSE_GROUP>\n')
+
+
+def run_mode(mode, path):
+    # One measurement; called in a fresh process
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        if mode == "stream":
+            _, items = mismo.open_mismo_report(f)
+            count = sum(1 for _ in items)
+        elif mode == "convert":
+            count = mismo.convert_to_json(f).seek(0, 2)  # bytes of JSON written
+        else:
+            count = len(ET.parse(f).getroot().findall(".//CREDIT_LIABILITY"))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+    print(f"{mode:8} {count:>12,} {elapsed:8.1f} s {peak:8,} MiB max RSS")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--liabilities", type=int, default=30_000)
+    parser.add_argument("--responses", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--run", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run_mode(args.run, args.file)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "merged.xml"
+        write_merged(path, args.liabilities, args.responses)
+        print(f"{path.stat().st_size / 2**20:.0f} MiB, {args.liabilities:,} liabilities in {args.responses} responses")
+        for mode in args.modes:
+            subprocess.run([sys.executable, __file__, "--run", mode, "--file", str(path)], check=True)
+
+
+if __name__ == "__main__":
+    main()
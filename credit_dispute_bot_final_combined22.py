@@ -1,65 +1,26 @@
 
 import streamlit as st
 import json
-from datetime import datetime
 import io
+from records import as_items
+from scoring import score_items
 
 st.set_page_config(page_title="Credit Dispute Chatbot", layout="centered")
 st.title("🤖 AI Credit Dispute Chatbot")
 
-def months_since(date_str):
-    report_date = datetime.strptime(date_str, "%Y-%m-%d")
-    today = datetime.today()
-    return (today.year - report_date.year) * 12 + (today.month - report_date.month)
-
-def score_item(item, category):
-    score = 0
-    reasons = []
-    breakdown = []
-
-    months_old = months_since(item["last_reported"])
-
-    if months_old > 12:
-        score += 2
-        reasons.append("Older than 12 months")
-        breakdown.append("+2: Older than 12 months")
-    else:
-        score += 1
-        reasons.append("Recent negative reporting")
-        breakdown.append("+1: Recent negative reporting")
-
-    if category == "tradelines":
-        if item["balance"] > item.get("credit_limit", 1):
-            score += 2
-            reasons.append("Balance exceeds limit")
-            breakdown.append("+2: Balance exceeds limit")
-        if "charge" in item["status"].lower() or "off" in item["status"].lower():
-            score += 3
-            reasons.append("Account charged off")
-            breakdown.append("+3: Account charged off")
-        if "late" in item["status"].lower():
-            score += 2
-            reasons.append("Multiple late payments")
-            breakdown.append("+2: Multiple late payments")
-
-    if category == "collections":
-        score += 3
-        reasons.append("Collection account")
-        breakdown.append("+3: Collection account")
-        if months_old < 6:
-            score += 1
-            reasons.append("Recently added")
-            breakdown.append("+1: Recently added")
-
-    return {
-        "category": category,
-        "creditor": item.get("creditor_name") or item.get("agency_name"),
-        "status": item["status"],
-        "balance": item.get("balance", item.get("amount")),
-        "score": score,
-        "reasons": reasons,
+def score_all(items, categories):
+    # One vectorized pass over every tradeline + collection
+    records = as_items(items, categories)
+    scores, breakdowns = score_items(records, "chatbot", breakdown=True)
+    return [{
+        "category": record.section,
+        "creditor": record.creditor,
+        "status": record.status,
+        "balance": record.balance,
+        "score": int(score),
+        "reasons": [line.split(": ", 1)[1] for line in breakdown],
         "breakdown": breakdown
-    }
+    } for record, score, breakdown in zip(records, scores, breakdowns)]
 
 def generate_dispute_letter(consumer_info, item):
     name = consumer_info["name"]
@@ -101,12 +62,12 @@ if uploaded_file:
     try:
         data = json.load(uploaded_file)
         consumer_info = data["consumer_info"]
-        recommendations = []
-
-        for item in data.get("tradelines", []):
-            recommendations.append(score_item(item, "tradelines"))
-        for item in data.get("collections", []):
-            recommendations.append(score_item(item, "collections"))
+        tradelines = data.get("tradelines", [])
+        collections = data.get("collections", [])
+        recommendations = score_all(
+            tradelines + collections,
+            ["tradelines"] * len(tradelines) + ["collections"] * len(collections)
+        )
 
         recommendations = sorted(recommendations, key=lambda x: x["score"], reverse=True)
 
@@ -3,12 +3,18 @@ import streamlit as st
 import json
 import os
 import io
+import shutil
 import smtplib
+import tempfile
 import matplotlib.pyplot as plt
 from datetime import datetime
 from pathlib import Path
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
+from mismo import convert_to_json
+from records import Item
+from report_stream import open_report
+from letter_batch import BUREAUS, TEMPLATES, draw_dispute_letter, render_batch
 
 st.set_page_config(page_title="All-in-One Credit Repair System", layout="wide")
 
@@ -50,16 +56,19 @@ BASE_DIR.mkdir(exist_ok=True)
 with tab1:
     st.subheader("📁 Upload Credit Report")
     consumer = st.text_input("Consumer Name", placeholder="e.g., Jane Smith")
-    uploaded = st.file_uploader("Upload JSON Report", type="json", key="upload")
+    uploaded = st.file_uploader("Upload JSON or MISMO XML Report", type=["json", "xml"], key="upload")
 
     if consumer and uploaded:
+        if uploaded.name.endswith(".xml"):
+            # Stored reports are always JSON
+            uploaded = convert_to_json(uploaded)
         c_key = consumer.replace(" ", "_")
         time_key = datetime.now().strftime("%Y-%m-%d_%H-%M")
         path = BASE_DIR / c_key / time_key
         path.mkdir(parents=True, exist_ok=True)
         file_path = path / f"report_{time_key}.json"
-        with open(file_path, "w") as f:
-            f.write(uploaded.read().decode("utf-8"))
+        with open(file_path, "wb") as f:
+            shutil.copyfileobj(uploaded, f)
         st.success(f"Report saved for {consumer} at {file_path}")
 
 # === Tab 2: Score Tracker ===
@@ -94,18 +103,8 @@ with tab2:
 # === Tab 3: Dispute Letter Generator ===
 with tab3:
     st.subheader("📄 Generate Dispute Letters")
-    bureaus = {
-        "TransUnion": "TransUnion Consumer Solutions\nP.O. Box 2000\nChester, PA 19016-2000",
-        "Experian": "Experian\nP.O. Box 4500\nAllen, TX 75013",
-        "Equifax": "Equifax Information Services LLC\nP.O. Box 740256\nAtlanta, GA 30374-0256"
-    }
-    templates = {
-        "Not Mine": "I am writing to dispute the following information that appears on my credit report. The item is not mine and I request that it be removed immediately.",
-        "Never Late": "This account was never late as reported. Please correct this error by removing the inaccurate payment history.",
-        "Already Paid": "This account has already been paid in full. Please update your records to reflect a paid status.",
-        "Wrong Balance / Status": "The balance or status on this account is incorrect. I request that it be corrected to reflect accurate information.",
-        "Request Validation": "I am requesting full validation of this debt under the Fair Credit Reporting Act. If validation cannot be provided, please remove the account from my report."
-    }
+    bureaus = BUREAUS
+    templates = TEMPLATES
 
     c_name = st.selectbox("Select Consumer", all_consumers)
     if c_name:
@@ -115,64 +114,65 @@ with tab3:
         
         if selected_report:
             sel_path = BASE_DIR / c_name / selected_report.split(" - ")[0] / selected_report.split(" - ")[1]
-            with open(sel_path) as f:
-                data = json.load(f)
-
-            consumer_info = data.get("consumer_info", {"name": "Unknown", "address": "Unknown"})
-            items = data.get("tradelines", []) + data.get("collections", [])
-
+            items = []
             reasons = {}
-            for i, item in enumerate(items):
-                name = item.get("creditor_name") or item.get("agency_name")
-                reasons[i] = st.selectbox(f"Reason for {name}", list(templates.keys()), key=f"r{i}")
+            with open(sel_path, "rb") as f:
+                report_header, report_items = open_report(f)
+                for i, (section, raw) in enumerate(report_items):
+                    item = Item.from_dict(raw, section)
+                    items.append(item)
+                    reasons[i] = st.selectbox(f"Reason for {item.creditor}", list(templates.keys()), key=f"r{i}")
+
+            consumer_info = report_header.get("consumer_info", {"name": "Unknown", "address": "Unknown"})
 
             if st.button("📄 Download All Letters (PDF)"):
                 buffer = io.BytesIO()
                 c = canvas.Canvas(buffer, pagesize=letter)
+                date_str = datetime.today().strftime('%B %d, %Y')
                 for i, item in enumerate(items):
-                    reason = reasons[i]
-                    body = templates[reason]
-                    creditor = item.get("creditor_name") or item.get("agency_name")
-                    balance = item.get("balance", item.get("amount", 0))
-                    status = item.get("status", "N/A")
-
+                    body = templates[reasons[i]]
                     for bureau, address in bureaus.items():
-                        y = 750
-                        lines = [
-                            consumer_info['name'],
-                            consumer_info['address'],
-                            "",
-                            bureau,
-                            *address.split("\n"),
-                            "",
-                            f"Date: {datetime.today().strftime('%B %d, %Y')}",
-                            "",
-                            f"Subject: Dispute of Account - {creditor}",
-                            "",
-                            "To Whom It May Concern,",
-                            "",
-                            f"Creditor: {creditor}",
-                            f"Balance: ${balance}",
-                            f"Status: {status}",
-                            "",
-                            body,
-                            "",
-                            "Under the Fair Credit Reporting Act (FCRA), I respectfully request that this item be investigated and removed if unverifiable.",
-                            "",
-                            "Sincerely,",
-                            consumer_info['name']
-                        ]
-                        for line in lines:
-                            c.drawString(40, y, line)
-                            y -= 15
-                            if y < 60:
-                                c.showPage()
-                                y = 750
-                        c.showPage()
+                        draw_dispute_letter(c, consumer_info, item, body, bureau, address, date_str)
                 c.save()
                 buffer.seek(0)
                 st.download_button("📥 Download Combined Dispute PDF", buffer, "dispute_letters.pdf", "application/pdf")
 
+    # Batch round: latest report of every consumer, rendered across a process pool
+    st.markdown("---")
+    st.subheader("📦 Batch Letters for All Consumers")
+    batch_reason = st.selectbox("Reason for every item", list(templates.keys()), key="batch_reason")
+    batch_workers = st.slider("Worker processes", 1, os.cpu_count() or 1, os.cpu_count() or 1)
+    batch_format = st.radio("Output", ["ZIP (one PDF per consumer)", "Single merged PDF"], horizontal=True)
+
+    def batch_jobs():
+        for consumer_dir in sorted(d for d in BASE_DIR.iterdir() if d.is_dir()):
+            latest = max(consumer_dir.glob("*/report_*.json"), default=None)
+            if latest is None:
+                continue
+            with open(latest, "rb") as f:
+                header, report_items = open_report(f)
+                job_items = [Item.from_dict(item, section) for section, item in report_items]
+            yield {
+                "name": consumer_dir.name,
+                "consumer_info": header.get("consumer_info", {"name": "Unknown", "address": "Unknown"}),
+                "items": job_items,
+                "default_reason": batch_reason,
+            }
+
+    if st.button("⚙️ Render Batch"):
+        zip_out = batch_format.startswith("ZIP")
+        out_name = "dispute_batch.zip" if zip_out else "dispute_batch.pdf"
+        fd, out_path = tempfile.mkstemp(suffix=Path(out_name).suffix)
+        os.close(fd)
+        stats = render_batch(batch_jobs(), out_path, workers=batch_workers, fmt="zip" if zip_out else "pdf")
+        st.success(
+            f"{stats['letters']} letters for {stats['consumers']} consumers in {stats['seconds']:.1f}s "
+            f"({stats['letters_per_second']:.0f} letters/sec on {stats['workers']} workers)"
+        )
+        with open(out_path, "rb") as f:
+            st.download_button("📥 Download Batch", f.read(), out_name, "application/zip" if zip_out else "application/pdf")
+        os.remove(out_path)
+
 # === Tab 4: Full Report Viewer ===
 with tab4:
     st.subheader("📄 View Complete Report")
@@ -0,0 +1,188 @@
+from array import array
+
+from dates import NO_DATE, to_ordinal, today_ordinal
+
+# --- CRM search index ---
+# Leads/clients are indexed once by the bigrams and trigrams of their
+# lowercased name and email. A query looks up its rarest n-gram and only
+# checks that posting list, so a keystroke touches a handful of records
+# instead of all of them. Everything the old filter_* helpers recomputed per
+# keystroke (lowercasing, parsing `added`) is done once per record. Records are
+# added / replaced / removed in place as leads come in or get converted;
+# removals leave a tombstone that is dropped on the next compaction.
+
+GRAMS = (2, 3)
+INACTIVE_DAYS = 30
+def _grams(text, sizes=GRAMS):
+    return {text[i:i + n] for n in sizes for i in range(len(text) - n + 1)}
+
+
+class SearchIndex:
+    def __init__(self, records=(), fields=("name", "email"), date_field=None):
+        self.fields = fields
+        self.date_field = date_field
+        self._rows = []       # slot -> (record, lowered fields, status, date ordinal) or None
+        self._slots = {}      # record id -> slot
+        self._postings = {}   # n-gram -> array of slots
+        self._by_status = {}  # status -> array of slots
+        self._dead = 0
+        self._view = None     # this rerun's record list, see bind()
+        self._view_ids = None
+        for record in records:
+            self.add(record)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, record_id):
+        return record_id in self._slots
+
+    def signature(self):
+        # (count, first id, last id) — cheap check that the index still mirrors a record list
+        first = next((row[0]["id"] for row in self._rows if row), None)
+        last = next((row[0]["id"] for row in reversed(self._rows) if row), None)
+        return len(self), first, last
+
+    def add(self, record):
+        # Inserts a record; a record whose id is already indexed is updated in place
+        slot = self._slots.get(record["id"])
+        old_grams, old_status = set(), object()
+        if slot is None:
+            slot = len(self._rows)
+            self._rows.append(None)
+            self._slots[record["id"]] = slot
+        elif self._rows[slot]:
+            _, old_lowered, old_status, _ = self._rows[slot]
+            old_grams = set().union(*map(_grams, old_lowered))
+        lowered = tuple(str(record.get(f) or "").lower() for f in self.fields)
+        status = record.get("status")
+        added = to_ordinal(record.get(self.date_field)) if self.date_field else NO_DATE
+        self._rows[slot] = (record, lowered, status, added)
+        # Stale postings from the old version are harmless: search() re-checks the row itself
+        for gram in set().union(*map(_grams, lowered)) - old_grams:
+            self._postings.setdefault(gram, array("I")).append(slot)
+        if status != old_status:
+            self._by_status.setdefault(status, array("I")).append(slot)
+
+    update = add
+
+    def bind(self, records):
+        # Makes search return these record dicts, which hold the same data under new identities.
+        # O(1): hits are mapped by id only when they are returned.
+        self._view = records
+        self._view_ids = None
+
+    def _current(self, slot, record):
+        view = self._view
+        if view is None:
+            return record
+        # Until a compaction, slot i is records[i] of the list the index was built from
+        if slot < len(view) and view[slot]["id"] == record["id"]:
+            return view[slot]
+        if self._view_ids is None:
+            self._view_ids = {r["id"]: r for r in view}
+        return self._view_ids.get(record["id"], record)
+
+    def remove(self, record_id):
+        slot = self._slots.pop(record_id, None)
+        if slot is None:
+            return
+        self._rows[slot] = None
+        self._dead += 1
+        if self._dead > len(self._slots):
+            self._compact()
+
+    def _compact(self):
+        live = [row[0] for row in self._rows if row]
+        self.__init__(live, self.fields, self.date_field)
+
+    def _candidates(self, query, status):
+        if status is not None:
+            slots = self._by_status.get(status, ())
+        else:
+            slots = range(len(self._rows))
+        if len(query) < GRAMS[0]:
+            return slots
+        postings = [self._postings.get(gram) for gram in _grams(query, (min(len(query), GRAMS[-1]),))]
+        if not all(postings):
+            return ()
+        rarest = min(postings, key=len)
+        return rarest if len(rarest) < len(slots) else slots
+
+    def search(self, query="", status=None, today=None, limit=None):
+        # Ranked matches: exact, then prefix, then word-prefix, then substring; ties keep insertion order.
+        # Records with a date field get record["inactive"] set like the old filter_leads did.
+        query = (query or "").strip().lower()
+        today = today_ordinal(today)
+        ranked = []
+        seen = set()
+        for slot in self._candidates(query, status):
+            row = self._rows[slot]
+            if row is None or slot in seen:
+                continue
+            seen.add(slot)
+            record, lowered, row_status, added = row
+            if status is not None and row_status != status:
+                continue
+            rank = self._rank(query, lowered) if query else 0
+            if rank is None:
+                continue
+            ranked.append((rank, slot))
+        if query or status is not None:
+            ranked.sort()
+        if limit is not None:
+            ranked = ranked[:limit]
+
+        results = []
+        for _, slot in ranked:
+            record, _, _, added = self._rows[slot]
+            record = self._current(slot, record)
+            if self.date_field:
+                record["inactive"] = added != NO_DATE and today - added > INACTIVE_DAYS
+            results.append(record)
+        return results
+
+    @staticmethod
+    def _rank(query, lowered):
+        best = None
+        for text in lowered:
+            pos = text.find(query)
+            if pos < 0:
+                continue
+            if text == query:
+                return 0
+            if pos == 0:
+                rank = 1
+            elif not text[pos - 1].isalnum():
+                rank = 2
+            else:
+                rank = 3
+            best = rank if best is None else min(best, rank)
+        return best
+
+
+def session_index(state, name, records, version=None, **options):
+    # Keeps one SearchIndex per CRM list in st.session_state across reruns.
+    # It is rebuilt when the data version (data_versions()[name]) moves, so
+    # edits from any session show up, or when it no longer matches `records`.
+    # Otherwise it is bound to this rerun's list, so search returns the
+    # records the page is editing, not copies from an earlier rerun.
+    key = f"crm_index:{name}"
+    index, built_at = state.get(key, (None, None))
+    signature = (len(records), records[0]["id"] if records else None, records[-1]["id"] if records else None)
+    if index is None or built_at != version or index.signature() != signature:
+        index = SearchIndex(records, **options)
+        state[key] = (index, version)
+    index.bind(records)
+    return index
+
+
+def reindex(state, name, records=(), removed=()):
+    # Applies CRM writes to the session's index, if one has been built yet
+    index, _ = state.get(f"crm_index:{name}", (None, None))
+    if index is None:
+        return
+    for record in records:
+        index.add(record)
+    for record_id in removed:
+        index.remove(record_id)
@@ -0,0 +1,137 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from dates import ordinals, to_datetime64
+from report_store import (
+    daily_score_averages, latest_scores, load_score_history, recent_reports, reports_due,
+    total_consumers, total_reports,
+)
+from storage import (
+    DB_PATH, account_statuses, data_versions, get_branding, get_db, letter_counts, letters_by_consumer, letters_for,
+    load_clients, load_leads, load_todos, recent_emails, recent_messages, shard_versions as read_shard_versions,
+    status_counts, status_history, status_options, total_letters,
+)
+
+# --- Cached data layer ---
+# Streamlit reruns the whole script on every click, and each rerun used to
+# re-read the same rows and files and rebuild the same DataFrames. Reads here
+# go through st.cache_data, which is shared by every session. Entries are
+# keyed by the version of the data they come from; storage.touch bumps that
+# version on every write, from any session, thread or process. A steady-state
+# rerun therefore costs one read of the version counters. The TTL only limits
+# how long an entry can outlive changes made outside the app, such as files
+# edited by hand.
+
+CACHE_TTL = 10 * 60
+MAX_ENTRIES = 512
+
+# name: (reader(db, *args), topic whose version keys the entry)
+READERS = {
+    "leads": (load_leads, "leads"),
+    "clients": (load_clients, "clients"),
+    "todos": (load_todos, "todos"),
+    "messages": (recent_messages, "messages"),
+    "emails": (recent_emails, "emails"),
+    "letter_log": (letters_by_consumer, "letters"),
+    "letter_counts": (letter_counts, "letters"),
+    "total_letters": (total_letters, "letters"),
+    "status_options": (status_options, "statuses"),
+    "branding": (get_branding, "branding"),
+    "total_reports": (total_reports, "reports"),
+    "total_consumers": (total_consumers, "reports"),
+    "recent_reports": (recent_reports, "reports"),
+    "reports_due": (reports_due, "reports"),
+    "latest_scores": (latest_scores, "reports"),
+}
+
+
+# name: (reader(db, consumer), shard topic whose version keys the entry)
+SHARD_READERS = {
+    "letters": (letters_for, "letters"),
+    "statuses": (account_statuses, "statuses"),
+    "status_counts": (status_counts, "statuses"),
+    "status_history": (status_history, "statuses"),
+}
+
+
+def versions(db_path=DB_PATH):
+    return data_versions(get_db(db_path))
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def _read(name, version, db_path, args):
+    reader, _ = READERS[name]
+    return reader(get_db(db_path), *args)
+
+
+def read(versions, name, *args, db_path=DB_PATH):
+    # Cached READERS[name](db, *args); an entry cached before the topic's last write is never returned
+    _, topic = READERS[name]
+    return _read(name, versions.get(topic, 0), str(db_path), args)
+
+
+# ========== PER-CONSUMER SHARDS ==========
+def shard_versions(consumer, db_path=DB_PATH):
+    return read_shard_versions(get_db(db_path), consumer)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def _read_shard(name, consumer, version, db_path):
+    reader, _ = SHARD_READERS[name]
+    return reader(get_db(db_path), consumer)
+
+
+def read_shard(versions, name, consumer, db_path=DB_PATH):
+    # Cached SHARD_READERS[name](db, consumer), keyed by that consumer's shard version only
+    _, topic = SHARD_READERS[name]
+    return _read_shard(name, consumer, versions.get(topic, 0), str(db_path))
+
+
+# ========== STORED REPORT FILES ==========
+# Only report_store.store_report writes these, and it bumps the "reports" version
+# and the consumer's "reports" shard version
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def score_history(storage_dir, consumer, version):
+    return load_score_history(storage_dir, consumer)
+
+
+def history_frame(history):
+    # Score history entries -> scores indexed by upload date, oldest first, for st.line_chart
+    dates = pd.DatetimeIndex(to_datetime64(ordinals(h["date"] for h in history)), name="date")
+    return pd.DataFrame({"score": [h["score"] for h in history]}, index=dates).sort_index()
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def stored_reports(folder, version):
+    # [(snapshot folder name, report dict)], newest first
+    reports = []
+    for path in sorted(Path(folder).glob("**/report.json"), reverse=True):
+        with open(path) as f:
+            reports.append((path.parent.name, json.load(f)))
+    return reports
+
+
+# ========== DERIVED AGGREGATES ==========
+# Underscored arguments are not hashed; the versions they were loaded at are the key
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def crm_charts(leads_version, clients_version, _leads, _clients):
+    # (lead count per source, client scores) for the dashboard charts
+    source_chart = pd.DataFrame([l["source"] for l in _leads], columns=["Source"])["Source"].value_counts().reset_index()
+    source_chart.columns = ["Source", "Count"]
+    score_df = pd.DataFrame([c["score"] for c in _clients], columns=["Credit Score"])
+    return source_chart.set_index("Source"), score_df
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def score_trend(reports_version, db_path=str(DB_PATH)):
+    # Average score of each day's uploads, from the daily_scores aggregate; None before any upload
+    rows = daily_score_averages(get_db(db_path))
+    if not rows:
+        return None
+    df = pd.DataFrame(rows, columns=["date", "Average Score"])
+    df["date"] = pd.to_datetime(df["date"])
+    return df.set_index("date")
+
@@ -0,0 +1,74 @@
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+
+# --- Date ordinals ---
+# Dates reach us as strings in a few formats: ISO days, report folder
+# timestamps, bureau-style "MM/DD/YYYY" and the like. They used to be
+# strptime'd wherever an age was needed, on every rerun. to_ordinal parses
+# each distinct string once (cached) into a proleptic Gregorian day number,
+# with NO_DATE for anything unparseable. Ages, inactivity and due dates are
+# then plain integer differences, over numpy arrays when there are many.
+
+NO_DATE = 0  # date.toordinal() starts at 1
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# ISO days and "YYYY-MM-DD_HH-MM" timestamps take the fast path in to_ordinal
+FORMATS = ("%m/%d/%Y", "%m/%d/%y", "%Y-%m", "%m/%Y", "%B %d, %Y", "%b %d, %Y")
+
+
+@lru_cache(maxsize=100_000)
+def _parse(value):
+    if len(value) >= 10 and value[4] == "-" and value[7] == "-":
+        try:
+            return date(int(value[:4]), int(value[5:7]), int(value[8:10])).toordinal()
+        except ValueError:
+            pass
+    for fmt in FORMATS:
+        try:
+            return datetime.strptime(value, fmt).toordinal()
+        except ValueError:
+            continue
+    return NO_DATE
+
+
+def to_ordinal(value):
+    # str / date / datetime -> day ordinal; NO_DATE when missing or unparseable
+    if isinstance(value, date):
+        return value.toordinal()
+    if not value or not isinstance(value, str):
+        return NO_DATE
+    return _parse(value.strip())
+
+
+def ordinals(values):
+    return np.fromiter((to_ordinal(v) for v in values), dtype=np.int64)
+
+
+def to_date(ordinal):
+    return date.fromordinal(ordinal) if ordinal != NO_DATE else None
+
+
+def today_ordinal(today=None):
+    return (today or date.today()).toordinal()
+
+
+def days_since(ords, today=None):
+    # Whole days from each ordinal to `today`; NaN where there is no date, so comparisons are False
+    days = today_ordinal(today) - np.asarray(ords, dtype=np.float64)
+    return np.where(np.asarray(ords) == NO_DATE, np.nan, days)
+
+
+def months_since(ords, today=None):
+    # Calendar months from each ordinal's month to `today`'s; NaN where there is no date
+    ords = np.asarray(ords, dtype=np.int64)
+    months = (ords - EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    now = np.datetime64(date.fromordinal(today_ordinal(today)), "M").astype(np.int64)
+    return np.where(ords == NO_DATE, np.nan, (now - months).astype(np.float64))
+
+
+def to_datetime64(ords):
+    # For pandas / charts; NaT where there is no date
+    ords = np.asarray(ords, dtype=np.int64)
+    days = (ords - EPOCH_ORDINAL).astype("datetime64[D]")
+    return np.where(ords == NO_DATE, np.datetime64("NaT"), days)
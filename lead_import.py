@@ -0,0 +1,120 @@
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from storage import LEAD_FIELDS, lead_key, sync_lead_keys, touch
+
+# --- Bulk CSV lead import ---
+# Purchased lead lists run to hundreds of thousands of rows. The CSV is read
+# in chunks, columns are cleaned with pandas string ops rather than per row,
+# and every row is keyed by a 64-bit hash of its normalized email and phone
+# (the same keys storage.add_leads records). Rows whose key is already in
+# lead_keys, or repeated earlier in the file, are skipped. All chunks are
+# written inside a single transaction.
+
+CHUNK_ROWS = 50_000
+IMPORT_CACHE_KIB = -256_000  # negative = KiB, per SQLite's cache_size convention
+DEFAULT_SOURCE = "CSV Import"
+
+
+def _normal_emails(column):
+    emails = column.fillna("").astype(str).str.strip().str.lower()
+    return emails.where(emails.str.contains("@", regex=False), "")
+
+
+def _normal_phones(column):
+    digits = column.fillna("").astype(str).str.replace(r"\D", "", regex=True)
+    digits = digits.where(~((digits.str.len() == 11) & digits.str.startswith("1")), digits.str[1:])
+    return digits.where(digits.str.len() >= 7, "")
+
+
+def _keys(kind, values):
+    # Hash only the non-empty values; 0 marks "no key" (blake2b hitting 0 is not a practical concern)
+    return np.fromiter((lead_key(kind, v) if v else 0 for v in values), dtype=np.int64, count=len(values))
+
+
+def _existing_keys(db):
+    keys = db.execute("SELECT key FROM lead_keys")
+    return set(k for (k,) in keys)
+
+
+def _import_chunk(db, chunk, seen, source, added):
+    # Writes the new rows of one CSV chunk (inside the caller's transaction); returns (leads, duplicates, skipped)
+    chunk.columns = chunk.columns.str.strip().str.lower()
+    if "name" not in chunk or "email" not in chunk:
+        raise ValueError("CSV must have name and email columns")
+
+    emails = _normal_emails(chunk["email"])
+    phones = _normal_phones(chunk["phone"]) if "phone" in chunk else pd.Series("", index=chunk.index)
+    usable = (emails != "") | (phones != "")
+    skipped = int((~usable).sum())
+    chunk, emails, phones = chunk[usable], emails[usable], phones[usable]
+
+    email_keys = _keys("e", emails.to_numpy())
+    phone_keys = _keys("p", phones.to_numpy())
+    keep = np.ones(len(chunk), dtype=bool)
+    # Rows are compared against earlier rows too, so the loop stays sequential; it only touches ints
+    for i, (ek, pk) in enumerate(zip(email_keys.tolist(), phone_keys.tolist())):
+        if (ek and ek in seen) or (pk and pk in seen):
+            keep[i] = False
+            continue
+        if ek:
+            seen.add(ek)
+        if pk:
+            seen.add(pk)
+    duplicates = int((~keep).sum())
+    if not keep.any():
+        return [], duplicates, skipped
+
+    chunk = chunk[keep]
+    names = chunk["name"].fillna("").astype(str).str.strip().to_numpy(dtype=object)
+    sources = chunk["source"].fillna(source).to_numpy(dtype=object) if "source" in chunk else [source] * len(chunk)
+    # Rows go to SQLite as tuples in LEAD_FIELDS order; the dicts are built from them for the caller
+    rows = [
+        (str(uuid.uuid4()), name, email, src, "New", "[]", phone or None, None, added)
+        for name, email, src, phone in zip(
+            names, emails[keep].to_numpy(dtype=object), sources, phones[keep].to_numpy(dtype=object))
+    ]
+    db.executemany(
+        f"INSERT INTO leads ({', '.join(LEAD_FIELDS)}) VALUES ({', '.join('?' * len(LEAD_FIELDS))})", rows
+    )
+    leads = [
+        {"id": i, "name": n, "email": e, "source": src, "status": "New", "tags": [], "phone": p, "added": added}
+        if p else
+        {"id": i, "name": n, "email": e, "source": src, "status": "New", "tags": [], "added": added}
+        for i, n, e, src, _, _, p, _, _ in rows
+    ]
+    key_rows = [(k, lead["id"]) for k, lead in zip(email_keys[keep].tolist(), leads) if k]
+    key_rows += [(k, lead["id"]) for k, lead in zip(phone_keys[keep].tolist(), leads) if k]
+    db.executemany("INSERT OR IGNORE INTO lead_keys (key, lead_id) VALUES (?, ?)", key_rows)
+    return leads, duplicates, skipped
+
+
+def import_leads(db, fp, source=DEFAULT_SOURCE, chunk_rows=CHUNK_ROWS, today=None):
+    # Returns {"leads": [new lead dicts], "imported", "duplicates", "skipped"}.
+    # CSV needs name and email columns; source and phone are optional.
+    sync_lead_keys(db)
+    seen = _existing_keys(db)
+    added = (today or datetime.now()).strftime("%Y-%m-%d")
+    new_leads = []
+    duplicates = skipped = 0
+
+    chunks = pd.read_csv(fp, dtype=str, chunksize=chunk_rows, skipinitialspace=True)
+    # Random uuid / hash keys scatter inserts across the b-trees; a bigger page cache keeps them in memory
+    cache_size = db.execute("PRAGMA cache_size").fetchone()[0]
+    db.execute(f"PRAGMA cache_size = {IMPORT_CACHE_KIB}")
+    try:
+        with db:
+            for chunk in chunks:
+                leads, dupes, bad = _import_chunk(db, chunk, seen, source, added)
+                new_leads.extend(leads)
+                duplicates += dupes
+                skipped += bad
+            if new_leads:
+                touch(db, "leads")
+    finally:
+        db.execute(f"PRAGMA cache_size = {cache_size}")
+
+    return {"leads": new_leads, "imported": len(new_leads), "duplicates": duplicates, "skipped": skipped}
@@ -0,0 +1,194 @@
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from records import Item
+
+# --- Batch dispute letter renderer ---
+# Consumers are farmed out to a process pool; each worker renders one
+# consumer's letters to a PDF and hands back the bytes, which the parent
+# writes straight into the output ZIP (or merged PDF) as they finish. ZIP
+# entries are prefixed with the job's position in the batch, so two
+# consumers with the same name never overwrite each other.
+
+BUREAUS = {
+    "TransUnion": "TransUnion Consumer Solutions\nP.O. Box 2000\nChester, PA 19016-2000",
+    "Experian": "Experian\nP.O. Box 4500\nAllen, TX 75013",
+    "Equifax": "Equifax Information Services LLC\nP.O. Box 740256\nAtlanta, GA 30374-0256"
+}
+
+TEMPLATES = {
+    "Not Mine": "I am writing to dispute the following information that appears on my credit report. The item is not mine and I request that it be removed immediately.",
+    "Never Late": "This account was never late as reported. Please correct this error by removing the inaccurate payment history.",
+    "Already Paid": "This account has already been paid in full. Please update your records to reflect a paid status.",
+    "Wrong Balance / Status": "The balance or status on this account is incorrect. I request that it be corrected to reflect accurate information.",
+    "Request Validation": "I am requesting full validation of this debt under the Fair Credit Reporting Act. If validation cannot be provided, please remove the account from my report."
+}
+
+
+def draw_dispute_letter(c, consumer_info, item, body, bureau, address, date_str):
+    # One item (an Item, or a raw tradeline/collection dict), one bureau (credit_repair_all_in_one.py layout)
+    if not isinstance(item, Item):
+        item = Item.from_dict(item)
+    creditor, balance, status = item.creditor, item.balance, item.status or "N/A"
+    y = 750
+    lines = [
+        consumer_info['name'],
+        consumer_info['address'],
+        "",
+        bureau,
+        *address.split("\n"),
+        "",
+        f"Date: {date_str}",
+        "",
+        f"Subject: Dispute of Account - {creditor}",
+        "",
+        "To Whom It May Concern,",
+        "",
+        f"Creditor: {creditor}",
+        f"Balance: ${balance}",
+        f"Status: {status}",
+        "",
+        body,
+        "",
+        "Under the Fair Credit Reporting Act (FCRA), I respectfully request that this item be investigated and removed if unverifiable.",
+        "",
+        "Sincerely,",
+        consumer_info['name']
+    ]
+    for line in lines:
+        c.drawString(40, y, line)
+        y -= 15
+        if y < 60:
+            c.showPage()
+            y = 750
+    c.showPage()
+
+
+def draw_multi_item_letter(c, bureau, consumer_name, accounts, reason):
+    # All selected accounts in one letter to one bureau (App17 layout); returns log entries
+    today = datetime.now().strftime("%Y-%m-%d")
+    c.setFont("Helvetica", 12)
+    c.drawString(50, 800, f"{bureau}")
+    c.drawString(50, 780, f"Consumer: {consumer_name}")
+    c.drawString(50, 760, "Subject: Dispute Letter - Multiple Accounts")
+    c.drawString(50, 740, f"Dear {bureau},")
+    c.drawString(50, 720, "I am writing to dispute the following accounts:")
+
+    y = 700
+    log_entries = []
+    for item in accounts:
+        c.drawString(60, y, f"• {item['creditor']} — {item['status']} — ${item['balance']} — {item['reported']}")
+        log_entries.append({
+            "creditor": item['creditor'],
+            "bureau": bureau,
+            "reason": reason,
+            "date": today
+        })
+        y -= 20
+        if y < 100:
+            c.showPage()
+            c.setFont("Helvetica", 12)
+            y = 800
+
+    c.drawString(50, y-20, f"Dispute Reason: {reason}")
+    c.drawString(50, y-40, "Under the FCRA, please investigate and correct these items.")
+    c.drawString(50, y-60, f"Thank you,")
+    c.drawString(50, y-80, f"{consumer_name}")
+    return log_entries
+
+
+def render_consumer_letters(job):
+    # job: {"name", "consumer_info", "items", "reasons"} -> (file name, pdf bytes, letter count)
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    date_str = job.get("date") or datetime.today().strftime('%B %d, %Y')
+    bureaus = job.get("bureaus") or BUREAUS
+    reasons = job.get("reasons") or {}
+    default_reason = job.get("default_reason", "Request Validation")
+    count = 0
+    for i, item in enumerate(job["items"]):
+        body = TEMPLATES[reasons.get(i, default_reason)]
+        for bureau, address in bureaus.items():
+            draw_dispute_letter(c, job["consumer_info"], item, body, bureau, address, date_str)
+            count += 1
+    c.save()
+    return f"{job['name']}_dispute_letters.pdf", buffer.getvalue(), count
+
+
+def archive_name(n, name):
+    # Job n's ZIP entry: "0001_Jane_Doe_dispute_letters.pdf"; names stay unique and flat
+    return f"{n + 1:04d}_" + name.replace("/", "_").replace("\\", "_")
+
+
+def render_batch(jobs, out, workers=None, fmt="zip"):
+    # Streams every job's PDF into `out` (path or binary file) and returns throughput stats.
+    # `jobs` may be a generator; at most 2 * workers jobs are in flight at once.
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    consumers = letters = 0
+    merged = None
+    archive = None
+    if fmt == "zip":
+        archive = zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED)
+    else:
+        import fitz  # PyMuPDF, only needed for merged output
+        merged = fitz.open()
+
+    jobs = enumerate(jobs)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = {}
+            finished = {}
+            next_page = 0
+
+            def top_up():
+                while len(in_flight) < 2 * workers:
+                    n, job = next(jobs, (None, None))
+                    if job is None:
+                        return
+                    in_flight[pool.submit(render_consumer_letters, job)] = n
+
+            top_up()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    n = in_flight.pop(future)
+                    name, pdf_bytes, count = future.result()
+                    consumers += 1
+                    letters += count
+                    if archive is not None:
+                        archive.writestr(archive_name(n, name), pdf_bytes)
+                        continue
+                    # Merged output keeps job order; append each PDF as soon as its turn comes up
+                    finished[n] = pdf_bytes
+                    while next_page in finished:
+                        with fitz.open(stream=finished.pop(next_page), filetype="pdf") as part:
+                            merged.insert_pdf(part)
+                        next_page += 1
+                top_up()
+        if merged is not None:
+            if isinstance(out, (str, os.PathLike)):
+                merged.save(out, garbage=3, deflate=True)
+            else:
+                out.write(merged.tobytes(garbage=3, deflate=True))
+    finally:
+        if archive is not None:
+            archive.close()
+        elif merged is not None:
+            merged.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        "consumers": consumers,
+        "letters": letters,
+        "seconds": seconds,
+        "letters_per_second": letters / seconds if seconds else 0.0,
+        "workers": workers,
+    }
@@ -0,0 +1,112 @@
+import json
+import logging
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+
+from storage import DB_PATH, get_db, touch
+
+# --- Log rotation ---
+# The letter and email logs are append-only tables in app.db (see
+# storage.py). A letter or a sent email is one INSERT, and the email dedupe
+# is a lookup against the UNIQUE (recipient, subject, date) index. Nothing
+# is rewritten. Growth is bounded by a background thread that runs every
+# ROTATE_INTERVAL. It moves email_log rows older than EMAIL_LOG_DAYS into
+# monthly JSONL archives under logs/, which is safe because the dedupe only
+# compares rows from the same day. Then it checkpoints the WAL and
+# truncates it, so a burst of appends does not leave a large -wal file.
+# Letters stay in the table because the Reports page lists all of them.
+# A failed pass, such as a locked database or a full disk, is logged and
+# retried at the next interval. It does not end the thread.
+
+LOG_DIR = Path("logs")
+EMAIL_LOG_DAYS = 180
+ROTATE_INTERVAL = 60 * 60     # seconds
+ARCHIVE_BATCH = 5000
+
+_rotators = {}
+_rotators_lock = threading.Lock()
+log = logging.getLogger(__name__)
+
+
+def archive_path(log_dir, name, day):
+    # "2025-04-24" -> logs/email_log-2025-04.jsonl
+    return Path(log_dir) / f"{name}-{day[:7]}.jsonl"
+
+
+def rotate_email_log(db, log_dir=LOG_DIR, keep_days=EMAIL_LOG_DAYS, today=None):
+    # Moves email_log rows older than keep_days to the monthly archives; returns how many moved
+    cutoff = ((today or date.today()) - timedelta(days=keep_days)).isoformat()
+    moved = 0
+    while True:
+        rows = db.execute(
+            "SELECT id, recipient, subject, date FROM email_log WHERE date < ? ORDER BY id LIMIT ?",
+            (cutoff, ARCHIVE_BATCH),
+        ).fetchall()
+        if not rows:
+            return moved
+        by_file = {}
+        for r in rows:
+            by_file.setdefault(archive_path(log_dir, "email_log", r["date"] or "undated"), []).append(
+                json.dumps({"to": r["recipient"], "subject": r["subject"], "date": r["date"]}) + "\n"
+            )
+        # Archive before deleting: a crash in between can repeat a line, never lose one
+        Path(log_dir).mkdir(parents=True, exist_ok=True)
+        for path, lines in by_file.items():
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        with db:
+            db.executemany("DELETE FROM email_log WHERE id = ?", [(r["id"],) for r in rows])
+            touch(db, "emails")
+        moved += len(rows)
+
+
+def checkpoint(db):
+    # Copies the WAL into the database and truncates it; skipped (busy) while a reader holds it
+    busy, _, _ = db.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    return not busy
+
+
+class LogRotator:
+    def __init__(self, db_path=DB_PATH, log_dir=LOG_DIR, interval=ROTATE_INTERVAL):
+        self.db_path = db_path
+        self.log_dir = log_dir
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="log-rotation", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def rotate(self):
+        db = get_db(self.db_path)
+        moved = rotate_email_log(db, self.log_dir)
+        checkpoint(db)
+        return moved
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.rotate()
+            except Exception:
+                log.exception("log rotation pass failed")
+            self._stop.wait(self.interval)
+
+
+def get_rotator(db_path=DB_PATH):
+    # One running rotator per database for the whole process
+    key = str(db_path)
+    with _rotators_lock:
+        rotator = _rotators.get(key)
+        if rotator is None:
+            rotator = _rotators[key] = LogRotator(db_path)
+        return rotator.start()
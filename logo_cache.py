@@ -0,0 +1,184 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import requests
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+
+# --- Letterhead logo cache ---
+# Logos are fetched (or uploaded) once, downscaled to letterhead size and
+# saved as PNG under logos/cache/<sha256>.png. URL logos keep their ETag /
+# Last-Modified next to them so refreshes are conditional GETs. PDF code
+# only ever calls get_logo(), which never touches the network: a cache miss
+# schedules a background fetch and returns None for this render. Files are
+# written to a unique temp file in CACHE_DIR and renamed into place, so
+# concurrent fetches never see or clobber each other's partial writes. A
+# failed fetch is logged and kept so Settings can show it.
+
+CACHE_DIR = Path("logos/cache")
+LOGO_SIZE = (420, 180)  # 3x the 140pt letterhead slot
+FETCH_TIMEOUT = 5
+REFRESH_AFTER = 24 * 60 * 60
+RETRY_FAILED_AFTER = 5 * 60
+MEMORY_SLOTS = 64
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_inflight = set()
+_failed = {}  # url -> (time, error message)
+log = logging.getLogger(__name__)
+
+
+def _remember(key, reader):
+    with _lock:
+        _memory[key] = reader
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_SLOTS:
+            _memory.popitem(last=False)
+    return reader
+
+
+def _recall(key):
+    with _lock:
+        reader = _memory.get(key)
+        if reader is not None:
+            _memory.move_to_end(key)
+        return reader
+
+
+def _meta_path(url):
+    return CACHE_DIR / (hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+
+def _write_atomic(path, write):
+    # write(file) fills a temp file next to `path`, which then replaces it in one step
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=CACHE_DIR, suffix=".tmp", delete=False) as f:
+        tmp = f.name
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            os.unlink(tmp)
+            raise
+    os.replace(tmp, path)
+
+
+def normalize_logo(data):
+    # Raw image bytes -> (content digest, path of the downscaled PNG); no-op if already cached
+    digest = hashlib.sha256(data).hexdigest()
+    path = CACHE_DIR / f"{digest}.png"
+    if not path.exists():
+        img = Image.open(io.BytesIO(data))
+        img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+        img.thumbnail(LOGO_SIZE, Image.LANCZOS)
+        _write_atomic(path, lambda f: img.save(f, format="PNG", optimize=True))
+    return digest, path
+
+
+def store_uploaded_logo(data):
+    return str(normalize_logo(data)[1])
+
+
+def prefetch_logo(url, timeout=FETCH_TIMEOUT):
+    # Fetch or revalidate a URL logo; returns the cached PNG path or None
+    meta_path = _meta_path(url)
+    meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and meta.get("digest"):
+            path = CACHE_DIR / f"{meta['digest']}.png"
+        else:
+            response.raise_for_status()
+            digest, path = normalize_logo(response.content)
+            meta = {
+                "url": url,
+                "digest": digest,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+        meta["fetched"] = time.time()
+        _write_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode()))
+        with _lock:
+            _failed.pop(url, None)
+        return str(path)
+    except Exception as e:
+        log.warning("logo fetch failed for %s: %s", url, e)
+        with _lock:
+            _failed[url] = (time.time(), str(e))
+        return None
+    finally:
+        with _lock:
+            _inflight.discard(url)
+
+
+def prefetch_in_background(url, force=False):
+    # Starts prefetch_logo(url) on a daemon thread unless one is running; force skips the failure backoff
+    with _lock:
+        failed_at = _failed.get(url, (0, None))[0]
+        if url in _inflight or (not force and time.time() - failed_at < RETRY_FAILED_AFTER):
+            return False
+        _inflight.add(url)
+    threading.Thread(target=prefetch_logo, args=(url,), daemon=True).start()
+    return True
+
+
+def logo_error(url):
+    # Error message of the last failed fetch of url, or None
+    with _lock:
+        failed = _failed.get(url)
+    return failed[1] if failed else None
+
+
+def get_logo(source):
+    # URL or local path -> reportlab ImageReader of the normalized logo, or None
+    if not source:
+        return None
+    if source.startswith(("http://", "https://")):
+        meta_path = _meta_path(source)
+        if not meta_path.exists():
+            prefetch_in_background(source)
+            return None
+        meta = json.loads(meta_path.read_text())
+        if time.time() - meta.get("fetched", 0) > REFRESH_AFTER:
+            prefetch_in_background(source)
+        key = meta["digest"]
+        path = CACHE_DIR / f"{key}.png"
+    else:
+        local = Path(source)
+        if not local.exists():
+            return None
+        stat = local.stat()
+        key = f"{local.resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
+        reader = _recall(key)
+        if reader is not None:
+            return reader
+        path = normalize_logo(local.read_bytes())[1]
+
+    reader = _recall(key)
+    if reader is None and path.exists():
+        reader = _remember(key, ImageReader(str(path)))
+    return reader
+
+
+def draw_logo(c, source, x, y, width):
+    # Draws the cached logo scaled to `width`; returns False if it is not available yet
+    logo = get_logo(source)
+    if logo is None:
+        return False
+    w, h = logo.getSize()
+    c.drawImage(logo, x, y, width=width, height=width * h / w, mask="auto")
+    return True
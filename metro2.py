@@ -0,0 +1,315 @@
+import struct
+
+import numpy as np
+
+# --- Metro 2 furnisher file reader ---
+# Reads 426-character Metro 2 files (the character format, with a 4-digit
+# record descriptor word, or RDW) into the same tradeline and collection
+# dicts as our JSON reports. Files are read in fixed-size chunks, and each
+# chunk is framed by walking the RDWs. All base segments in a chunk are then
+# decoded together: they are stacked into one byte matrix and every field in
+# BASE_FIELDS is cut out as a column, with amounts and dates converted by
+# numpy array ops rather than one record at a time. The rarer header, J1/J2
+# and K1/K2 segments use a precompiled struct per layout; other appended
+# segments are skipped by their length. Memory is bounded by the chunk size,
+# whatever the file size.
+
+CHUNK_SIZE = 4 * 1024 * 1024
+BASE_LENGTH = 426
+COLLECTION_ACCOUNT_TYPES = {"48", "0C"}  # collection agency / attorney, debt buyer
+
+# (field, 1-based start position, length); anything not listed is skipped
+BASE_FIELDS = [
+    ("account_number", 43, 30),
+    ("account_type", 74, 2),
+    ("date_opened", 76, 8),
+    ("credit_limit", 84, 9),
+    ("high_balance", 93, 9),
+    ("account_status", 124, 2),
+    ("payment_history", 127, 24),
+    ("compliance_code", 153, 2),
+    ("balance", 155, 9),
+    ("past_due", 164, 9),
+    ("last_reported", 182, 8),
+    ("first_delinquency", 190, 8),
+    ("date_closed", 198, 8),
+    ("surname", 232, 25),
+    ("first_name", 257, 20),
+    ("middle_name", 277, 20),
+    ("generation", 297, 1),
+    ("ssn", 298, 9),
+    ("date_of_birth", 307, 8),
+    ("address_1", 330, 32),
+    ("address_2", 362, 32),
+    ("city", 394, 20),
+    ("state", 414, 2),
+    ("zip", 416, 9),
+]
+
+HEADER_FIELDS = [
+    ("record_id", 5, 6),
+    ("activity_date", 48, 8),
+    ("reporter_name", 80, 40),
+]
+
+# Appended segments, positions relative to the segment start
+SEGMENT_FIELDS = {
+    # associated consumer, same address
+    b"J1": (100, [
+        ("surname", 4, 25), ("first_name", 29, 20), ("middle_name", 49, 20), ("generation", 69, 1),
+        ("ssn", 70, 9), ("date_of_birth", 79, 8), ("ecoa_code", 97, 1),
+    ]),
+    # associated consumer, different address
+    b"J2": (200, [
+        ("surname", 4, 25), ("first_name", 29, 20), ("middle_name", 49, 20), ("generation", 69, 1),
+        ("ssn", 70, 9), ("date_of_birth", 79, 8), ("ecoa_code", 97, 1),
+        ("address_1", 102, 32), ("address_2", 134, 32), ("city", 166, 20), ("state", 186, 2), ("zip", 188, 9),
+    ]),
+    b"K1": (34, [("original_creditor", 3, 30), ("creditor_classification", 33, 2)]),
+    b"K2": (34, [("purchase_indicator", 3, 1), ("purchased_name", 4, 30)]),
+    b"K3": (40, []),
+    b"K4": (30, []),
+    b"L1": (54, []),
+    b"N1": (146, []),
+}
+
+MONEY_FIELDS = {"credit_limit", "high_balance", "balance", "past_due"}
+DATE_FIELDS = {"date_opened", "last_reported", "first_delinquency", "date_closed", "date_of_birth", "activity_date"}
+
+ACCOUNT_STATUSES = {
+    "05": "Transferred",
+    "11": "Current",
+    "13": "Paid/Closed",
+    "61": "Paid in full - was voluntary surrender",
+    "62": "Paid in full - was collection",
+    "63": "Paid in full - was repossession",
+    "64": "Paid in full - was charge-off",
+    "65": "Paid in full - foreclosure started",
+    "71": "Late 30-59 days",
+    "78": "Late 60-89 days",
+    "80": "Late 90-119 days",
+    "82": "Late 120-149 days",
+    "83": "Late 150-179 days",
+    "84": "Late 180+ days",
+    "88": "Claim filed with government",
+    "89": "Deed in lieu of foreclosure",
+    "93": "Collection",
+    "94": "Foreclosure completed",
+    "95": "Voluntary surrender",
+    "96": "Repossession",
+    "97": "Charge-off",
+    "DA": "Deleted",
+    "DF": "Deleted - fraud",
+}
+
+ACCOUNT_TYPES = {
+    "00": "Auto Loan",
+    "01": "Unsecured Loan",
+    "02": "Secured Loan",
+    "07": "Charge Account",
+    "12": "Education Loan",
+    "15": "Line of Credit",
+    "18": "Credit Card",
+    "26": "Conventional Mortgage",
+    "3A": "Auto Lease",
+    "48": "Collection Agency/Attorney",
+    "0C": "Debt Buyer",
+    "89": "Home Equity Line of Credit",
+}
+
+COMPLIANCE_CODES = {
+    "XA": "Account closed at consumer's request",
+    "XB": "Account information disputed by consumer",
+    "XC": "Consumer disagrees with completed investigation",
+    "XD": "Account closed at consumer's request - disputed",
+    "XE": "Account closed at consumer's request - consumer disagrees",
+    "XF": "Account in dispute",
+    "XH": "Previously in dispute - investigation completed",
+}
+
+
+def _layout(fields):
+    # One struct for a segment: "Ns" for each field, "Nx" pad bytes for the gaps
+    fmt, pos, names = "", 1, []
+    for name, start, length in sorted(fields, key=lambda f: f[1]):
+        if start > pos:
+            fmt += f"{start - pos}x"
+        fmt += f"{length}s"
+        pos = start + length
+        names.append(name)
+    return struct.Struct(fmt), names
+
+
+BASE_NAMES = [name for name, _, _ in BASE_FIELDS]
+HEADER = _layout(HEADER_FIELDS)
+SEGMENTS = {seg: (length, _layout(fields) if fields else None) for seg, (length, fields) in SEGMENT_FIELDS.items()}
+
+
+def _decode(layout, buf, offset):
+    # One header or appended segment, through its struct
+    layout, names = layout
+    fields = {}
+    for name, raw in zip(names, layout.unpack_from(buf, offset)):
+        if name in DATE_FIELDS:
+            fields[name] = f"{raw[4:8].decode()}-{raw[:2].decode()}-{raw[2:4].decode()}" if raw.strip(b" 0") else ""
+        else:
+            fields[name] = raw.decode("latin-1").strip()
+    return fields
+
+
+def _column(block, name, start, length):
+    # One BASE_FIELDS field for every record in `block` (records x BASE_LENGTH bytes), as a list
+    cells = block[:, start - 1:start - 1 + length]
+    raw = np.ascontiguousarray(cells).view(f"S{length}").ravel()
+    if name in MONEY_FIELDS:
+        return np.where(np.char.isdigit(raw), raw, b"0").astype(np.int64).tolist()
+    if name in DATE_FIELDS:
+        # MMDDYYYY -> YYYY-MM-DD; all zeros or blank -> ""
+        dash = np.full((len(block), 1), ord("-"), dtype=np.uint8)
+        iso = np.hstack([cells[:, 4:8], dash, cells[:, 0:2], dash, cells[:, 2:4]]).view("S10").ravel()
+        return np.where(np.char.strip(raw, b" 0") == b"", b"", iso).astype("U10").tolist()
+    # Text stays per value: bytes.decode beats numpy's string functions here
+    return [value.decode("latin-1").strip() for value in raw.tolist()]
+
+
+def _base_rows(buf, starts):
+    # Field dicts for the base segments at `starts`, decoded column by column
+    block = np.frombuffer(b"".join(buf[s:s + BASE_LENGTH] for s in starts), dtype=np.uint8)
+    block = block.reshape(len(starts), BASE_LENGTH)
+    columns = [_column(block, name, start, length) for name, start, length in BASE_FIELDS]
+    return [dict(zip(BASE_NAMES, values)) for values in zip(*columns)]
+
+
+def _person(fields):
+    name = " ".join(p for p in (fields["first_name"], fields["middle_name"], fields["surname"], fields["generation"]) if p)
+    person = {"name": name, "ssn": fields["ssn"], "date_of_birth": fields["date_of_birth"]}
+    if fields.get("address_1"):
+        street = ", ".join(p for p in (fields["address_1"], fields["address_2"], fields["city"]) if p)
+        person["address"] = f"{street}, {fields['state']} {fields['zip'][:5]}".strip()
+    return person
+
+
+def _item(fields, reporter, segments):
+    status_code = fields["account_status"]
+    status = ACCOUNT_STATUSES.get(status_code, status_code)
+    remarks = COMPLIANCE_CODES.get(fields["compliance_code"], "")
+    original = segments.get(b"K1", {}).get("original_creditor", "")
+    if fields["account_type"] in COLLECTION_ACCOUNT_TYPES or status_code == "93":
+        return "collections", {
+            "agency_name": reporter,
+            "original_creditor": original,
+            "account_number": fields["account_number"],
+            "amount": fields["balance"],
+            "original_amount": fields["high_balance"],
+            "status": status,
+            "date_assigned": fields["date_opened"],
+            "last_reported": fields["last_reported"],
+            "remarks": remarks,
+        }
+    item = {
+        "creditor_name": reporter,
+        "account_number": fields["account_number"],
+        "account_type": ACCOUNT_TYPES.get(fields["account_type"], fields["account_type"]),
+        "status": status,
+        "balance": fields["balance"],
+        "credit_limit": fields["credit_limit"],
+        "high_balance": fields["high_balance"],
+        "past_due": fields["past_due"],
+        "date_opened": fields["date_opened"],
+        "last_reported": fields["last_reported"],
+        "payment_history": fields["payment_history"],
+        "remarks": remarks,
+    }
+    if original:
+        item["original_creditor"] = original
+    if b"K2" in segments:
+        # Indicator 1 = purchased from, 2 = sold to
+        k2 = segments[b"K2"]
+        item["sold_to" if k2["purchase_indicator"] == "2" else "purchased_from"] = k2["purchased_name"]
+    for field in ("first_delinquency", "date_closed"):
+        if fields[field]:
+            item[field] = fields[field]
+    return "tradelines", item
+
+
+def _records(buf, bases, reporter):
+    # (consumer_info, section, item) for the (offset, length) base records in `bases`
+    if not bases:
+        return
+    for (pos, length), fields in zip(bases, _base_rows(buf, [pos for pos, _ in bases])):
+        segments, associated = {}, []
+        seg_pos, end = pos + BASE_LENGTH, pos + length
+        while seg_pos < end:
+            seg = buf[seg_pos:seg_pos + 2]
+            if seg not in SEGMENTS:
+                raise ValueError(f"Malformed Metro 2 file: unknown segment {seg!r} at byte {seg_pos}")
+            seg_length, layout = SEGMENTS[seg]
+            if layout:
+                decoded = _decode(layout, buf, seg_pos)
+                if seg in (b"J1", b"J2"):
+                    associated.append(_person(decoded))
+                else:
+                    segments[seg] = decoded
+            seg_pos += seg_length
+        section, item = _item(fields, reporter, segments)
+        if associated:
+            item["associated_consumers"] = associated
+        yield _person(fields), section, item
+
+
+def iter_records(fp, chunk_size=CHUNK_SIZE):
+    # Yields (consumer_info, section, item) for every base segment; fp is a binary file
+    reporter = ""
+    tail = b""
+    while True:
+        chunk = fp.read(chunk_size)
+        buf = tail + chunk
+        pos, bases = 0, []
+        while True:
+            # Line-delimited files put CR/LF between records
+            while pos < len(buf) and buf[pos] in b"\r\n":
+                pos += 1
+            rdw = buf[pos:pos + 4]
+            if len(rdw) < 4 or (rdw.isdigit() and len(buf) - pos < int(rdw)):
+                break  # the rest of this record is in the next chunk
+            if not rdw.isdigit():
+                raise ValueError(f"Malformed Metro 2 file: bad record length {rdw!r}")
+            length = int(rdw)
+            if length < BASE_LENGTH:
+                raise ValueError(f"Malformed Metro 2 file: record length {length}")
+
+            kind = buf[pos + 4:pos + 11]
+            if kind.startswith(b"HEADER"):
+                yield from _records(buf, bases, reporter)
+                bases = []
+                reporter = _decode(HEADER, buf, pos)["reporter_name"]
+            elif not kind.startswith(b"TRAILER"):
+                bases.append((pos, length))
+            pos += length
+
+        yield from _records(buf, bases, reporter)
+        tail = buf[pos:]
+        if not chunk:
+            if tail:
+                raise ValueError("Malformed Metro 2 file: truncated record")
+            return
+
+
+def iter_items(fp, chunk_size=CHUNK_SIZE):
+    # (section, item) pairs, as report_stream.iter_items yields them
+    for _, section, item in iter_records(fp, chunk_size):
+        yield section, item
+
+
+def load_report(fp, ssn=None, chunk_size=CHUNK_SIZE):
+    # Report dict for one consumer: `ssn`, or the consumer on the first record. Only their records are kept.
+    report = {"consumer_info": {}, "tradelines": [], "collections": []}
+    for consumer, section, item in iter_records(fp, chunk_size):
+        if ssn is None:
+            ssn = consumer["ssn"]
+        if consumer["ssn"] != ssn:
+            continue
+        if not report["consumer_info"]:
+            report["consumer_info"] = {**consumer, "credit_score": 0}
+        report[section].append(item)
+    return report
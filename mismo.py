@@ -0,0 +1,256 @@
+import json
+import os
+import statistics
+import tempfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from report_store import content_digest
+
+# --- MISMO 2.4 credit response reader ---
+# Turns a MISMO 2.4 XML credit response into our report schema:
+# consumer_info comes from BORROWER and CREDIT_SCORE, and tradelines and
+# collections come from CREDIT_LIABILITY. The document is read with
+# iterparse. Each record element is converted when its end tag arrives and
+# then dropped from its parent, along with everything else already parsed,
+# so memory stays flat however many liabilities a merged file holds.
+# MISMO puts the scores after the liabilities. Callers expect the header
+# before the items (see report_stream.open_report), so the header comes
+# from a first pass that skips liabilities without converting them.
+# Uploads are converted once: convert_cached keeps the JSON as
+# mismo_cache/<sha256>.json (the digest report_store keys uploads by), so
+# reruns reopen the file instead of re-parsing the XML.
+
+SPOOL_BYTES = 8 * 1024 * 1024  # converted reports larger than this spill to a temp file
+CACHE_DIR = Path("mismo_cache")
+CONVERTER_VERSION = 1          # bump when conversion changes so old cache entries are ignored
+
+# _CURRENT_RATING/@_Type -> status; worded so the scoring rules' keywords match
+RATING_STATUSES = {
+    "AsAgreed": "Current",
+    "Late30Days": "Late 30 days",
+    "Late60Days": "Late 60 days",
+    "Late90Days": "Late 90 days",
+    "LateOver120Days": "Late 120+ days",
+    "ChargeOff": "Charge-off",
+    "Collection": "Collection",
+    "CollectionOrChargeOff": "Collection/Charge-off",
+    "Repossession": "Repossession",
+    "Foreclosure": "Foreclosure",
+    "BankruptcyOrWageEarnerPlan": "Bankruptcy",
+    "WageEarnerPlan": "Wage earner plan",
+}
+
+
+def _local(tag):
+    # "{namespace}TAG" -> "TAG"
+    return tag.rpartition("}")[2]
+
+
+def _records(fp, tags):
+    # Yields (tag, element) for each complete element named in `tags`. The
+    # element is only valid until the next item, because finished elements
+    # are removed from their parents as parsing moves on.
+    stack = []
+    record_depth = 0  # depth of the open record element, 0 when outside one
+    for event, elem in ET.iterparse(fp, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if not record_depth and _local(elem.tag) in tags:
+                record_depth = len(stack)
+            continue
+        depth = len(stack)
+        stack.pop()
+        if record_depth and depth > record_depth:
+            continue  # a child of the record; the record still needs it
+        if depth == record_depth:
+            yield _local(elem.tag), elem
+            record_depth = 0
+        if stack:
+            del stack[-1][:]
+
+
+def _children(elem):
+    # {tag: [child, ...]} for the direct children of `elem`
+    children = {}
+    for child in elem:
+        children.setdefault(_local(child.tag), []).append(child)
+    return children
+
+
+def _amount(attrib, *names):
+    for name in names:
+        value = attrib.get(name)
+        if value:
+            try:
+                number = float(value.replace(",", ""))
+            except ValueError:
+                continue
+            return int(number) if number.is_integer() else number
+    return None
+
+
+def _date(value):
+    # MISMO dates are YYYY-MM-DD or YYYY-MM; the scoring code expects full dates
+    if value and len(value) == 7:
+        return value + "-01"
+    return value or ""
+
+
+def _person(elem):
+    a = elem.attrib
+    name = " ".join(a[k] for k in ("_FirstName", "_MiddleName", "_LastName", "_NameSuffix") if a.get(k))
+    info = {"name": name or a.get("_UnparsedName", "Unknown")}
+    if a.get("_SSN"):
+        info["ssn"] = a["_SSN"]
+    if a.get("_BirthDate"):
+        info["date_of_birth"] = a["_BirthDate"]
+    residences = _children(elem).get("_RESIDENCE", [])
+    current = next((r for r in residences if r.get("BorrowerResidencyType") == "Current"), None)
+    residence = current if current is not None else next(iter(residences), None)
+    if residence is not None:
+        r = residence.attrib
+        city_line = " ".join(p for p in (r.get("_State"), r.get("_PostalCode")) if p)
+        info["address"] = ", ".join(p for p in (r.get("_StreetAddress"), r.get("_City"), city_line) if p)
+    return info
+
+
+def _liability(elem):
+    # CREDIT_LIABILITY -> (section, item)
+    a = elem.attrib
+    children = _children(elem)
+    creditor = next(iter(children.get("_CREDITOR", [])), None)
+    rating = next(iter(children.get("_CURRENT_RATING", [])), None)
+    rating_type = rating.get("_Type", "") if rating is not None else ""
+    account_status = a.get("_AccountStatusType", "")
+    status = RATING_STATUSES.get(rating_type, rating_type or account_status or "Unknown")
+    if status == "Current" and account_status in ("Closed", "Paid"):
+        status = account_status
+
+    comments = []
+    for comment in children.get("CREDIT_COMMENT", []):
+        text = comment.findtext("{*}_Text") or comment.get("_Text", "")
+        if text:
+            comments.append(text.strip())
+    bureaus = [r.get("_SourceType") for r in children.get("CREDIT_REPOSITORY", []) if r.get("_SourceType")]
+
+    common = {
+        "account_number": a.get("_AccountIdentifier", ""),
+        "status": status,
+        "last_reported": _date(a.get("_AccountReportedDate")),
+        "remarks": "; ".join(comments),
+    }
+    if bureaus:
+        common["bureaus"] = bureaus
+    name = creditor.get("_Name", "Unknown") if creditor is not None else "Unknown"
+
+    if a.get("IsCollectionIndicator") == "Y" or "Collection" in a.get("CreditLoanType", ""):
+        item = {"agency_name": name, "original_creditor": a.get("_OriginalCreditorName", ""),
+                "amount": _amount(a, "_UnpaidBalanceAmount") or 0,
+                "original_amount": _amount(a, "_OriginalBalanceAmount", "_HighBalanceAmount") or 0,
+                "date_assigned": _date(a.get("_AccountOpenedDate")), **common}
+        return "collections", item
+
+    item = {"creditor_name": name, "account_type": a.get("CreditLoanType") or a.get("_AccountType", ""),
+            "balance": _amount(a, "_UnpaidBalanceAmount") or 0,
+            "date_opened": _date(a.get("_AccountOpenedDate")), **common}
+    for field, names in (("credit_limit", ("_CreditLimitAmount",)),
+                         ("high_balance", ("_HighBalanceAmount", "_HighCreditAmount")),
+                         ("past_due", ("_PastDueAmount",))):
+        value = _amount(a, *names)
+        if value is not None:
+            item[field] = value
+    return "tradelines", item
+
+
+def read_header(fp):
+    # {"consumer_info": {...}} for the primary borrower, with their scores; reads the whole document
+    borrower, borrower_id, primary, scores = None, None, False, []
+    for tag, elem in _records(fp, {"BORROWER", "CREDIT_SCORE"}):
+        if tag == "BORROWER":
+            # The first BORROWER printed as "Borrower" (not co-borrower), else the first one
+            is_primary = elem.get("_PrintPositionType") == "Borrower"
+            if borrower is None or is_primary and not primary:
+                borrower, borrower_id, primary = _person(elem), elem.get("BorrowerID"), is_primary
+        elif elem.get("_Value", "").isdigit():
+            scores.append({
+                "borrower": elem.get("BorrowerID"),
+                "bureau": elem.get("CreditRepositorySourceType", ""),
+                "model": elem.get("_ModelNameType", ""),
+                "score": int(elem.get("_Value")),
+                "date": elem.get("_Date", ""),
+            })
+
+    info = borrower or {"name": "Unknown"}
+    # Joint reports list every borrower's scores; keep the primary borrower's
+    scores = [s for s in scores if not s["borrower"] or not borrower_id or borrower_id in s["borrower"].split()]
+    for s in scores:
+        del s["borrower"]
+    info["scores"] = scores
+    # Lenders use the middle of the bureau scores
+    info["credit_score"] = int(statistics.median_low([s["score"] for s in scores])) if scores else 0
+    return {"consumer_info": info}
+
+
+def iter_items(fp):
+    # (section, item) for every CREDIT_LIABILITY, in document order
+    for _, elem in _records(fp, {"CREDIT_LIABILITY"}):
+        yield _liability(elem)
+
+
+def open_mismo_report(fp):
+    # Same contract as report_stream.open_report, for a seekable binary MISMO file
+    start = fp.tell()
+    header = read_header(fp)
+    fp.seek(start)
+    return header, iter_items(fp)
+
+
+def convert_to_json(fp):
+    # The report as a JSON file object in our export layout, written without holding it in memory
+    header, items = open_mismo_report(fp)
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    collections = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    out.write(b'{"consumer_info": ' + json.dumps(header["consumer_info"]).encode() + b', "tradelines": [')
+    first = {out: True, collections: True}
+    for section, item in items:
+        target = out if section == "tradelines" else collections
+        target.write((b"" if first[target] else b", ") + json.dumps(item).encode())
+        first[target] = False
+    out.write(b'], "collections": [')
+    collections.seek(0)
+    while chunk := collections.read(SPOOL_BYTES):
+        out.write(chunk)
+    collections.close()
+    out.write(b"]}")
+    out.seek(0)
+    return out
+
+
+def convert_cached(fp, cache_dir=CACHE_DIR):
+    # convert_to_json, cached on disk by the upload's content hash; returns an open binary file
+    path = Path(cache_dir) / f"{content_digest(fp)}.v{CONVERTER_VERSION}.json"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        converted = convert_to_json(fp)
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as out:
+            try:
+                while chunk := converted.read(SPOOL_BYTES):
+                    out.write(chunk)
+            except BaseException:
+                out.close()
+                os.unlink(out.name)
+                raise
+            finally:
+                converted.close()
+        os.replace(out.name, path)
+    return open(path, "rb")
+
+
+def load_report(fp):
+    # The whole report as a dict, for small uploads
+    header, items = open_mismo_report(fp)
+    report = {**header, "tradelines": [], "collections": []}
+    for section, item in items:
+        report[section].append(item)
+    return report
@@ -0,0 +1,253 @@
+import logging
+import smtplib
+import threading
+import time
+from datetime import datetime
+from email.message import EmailMessage
+
+from storage import DB_PATH, get_db, log_email
+
+# --- SMTP outbox ---
+# Emails are queued in the `outbox` table and sent by one background worker
+# per SMTP account. The worker keeps its connection open across messages
+# (connect + STARTTLS + login once, not per email), paces itself to the
+# provider's rate limit, and retries transient failures with exponential
+# backoff. Streamlit only enqueues, so a campaign never blocks a rerun, and
+# queued mail survives restarts. An unexpected error still counts as an
+# attempt, so a message that can never be sent ends up failed instead of
+# blocking the queue. A pass that fails outright, such as on a locked
+# database, is logged and retried. It does not end the worker.
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30             # seconds before the first retry; doubles per attempt
+SMTP_TIMEOUT = 20
+IDLE_CLOSE = 60               # drop the connection after this long without mail
+MESSAGES_PER_CONNECTION = 100  # many providers cap messages per session
+DEFAULT_RATE = 5              # messages per second
+PROVIDER_RATES = {
+    "smtp.gmail.com": 1,
+    "smtp.office365.com": 0.5,
+    "smtp-mail.outlook.com": 0.5,
+    "smtp.mail.yahoo.com": 0.5,
+}
+
+_workers = {}
+_workers_lock = threading.Lock()
+log = logging.getLogger(__name__)
+
+
+def account_key(host, port, user):
+    return f"{user}@{host}:{port}"
+
+
+def enqueue(db, account, messages):
+    # messages: iterable of (to, subject, body); returns how many were queued
+    created = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with db:
+        cur = db.executemany(
+            "INSERT INTO outbox (account, recipient, subject, body, created) VALUES (?, ?, ?, ?, ?)",
+            [(account, to, subject, body, created) for to, subject, body in messages],
+        )
+    return cur.rowcount
+
+
+def outbox_counts(db, account=None):
+    # {"queued": n, "sent": n, "failed": n}
+    sql = "SELECT status, COUNT(*) FROM outbox"
+    rows = db.execute(sql + " WHERE account = ? GROUP BY status", (account,)) if account else db.execute(sql + " GROUP BY status")
+    counts = {"queued": 0, "sent": 0, "failed": 0}
+    counts.update({status: n for status, n in rows})
+    return counts
+
+
+def _permanent(error):
+    # 5xx replies about the message or recipient won't change on retry; everything else might
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return isinstance(error, smtplib.SMTPNotSupportedError)
+
+
+class OutboxWorker:
+    def __init__(self, host, port, user, password, starttls=True, rate=None,
+                 db_path=DB_PATH, smtp_factory=smtplib.SMTP):
+        self.host, self.port, self.user, self.password = host, int(port), user, password
+        self.account = account_key(host, self.port, user)
+        self.starttls = starttls
+        self.interval = 1.0 / (rate or PROVIDER_RATES.get(host, DEFAULT_RATE))
+        self.db_path = db_path
+        self.smtp_factory = smtp_factory
+        self._smtp = None
+        self._sent_on_connection = 0
+        self._last_used = 0.0
+        self._next_send = 0.0
+        self._unrecorded = set()  # ids sent but not yet marked sent
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ----- public -----
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"outbox:{self.account}", daemon=True)
+            self._thread.start()
+        return self
+
+    def send(self, messages):
+        count = enqueue(get_db(self.db_path), self.account, messages)
+        self._wake.set()
+        return count
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ----- worker thread -----
+    def _run(self):
+        db = get_db(self.db_path)
+        try:
+            while not self._stop.is_set():
+                self._wake.clear()
+                try:
+                    if self._deliver_due(db):
+                        continue
+                    upcoming = db.execute(
+                        "SELECT MIN(next_attempt) FROM outbox WHERE account = ? AND status = 'queued'", (self.account,)
+                    ).fetchone()[0]
+                    wait = IDLE_CLOSE if upcoming is None else min(IDLE_CLOSE, max(0.0, upcoming - time.time()))
+                except Exception:
+                    # A failed pass (locked database, unexpected error) must not end the worker
+                    log.exception("outbox pass failed for %s", self.account)
+                    wait = BACKOFF_BASE
+                self._wake.wait(wait)
+                if self._smtp is not None and time.monotonic() - self._last_used >= IDLE_CLOSE:
+                    self._close()
+        finally:
+            self._close()
+
+    def _deliver_due(self, db):
+        # Sends one batch of due messages; False when none were due
+        batch = db.execute(
+            "SELECT id, recipient, subject, body, attempts FROM outbox "
+            "WHERE account = ? AND status = 'queued' AND next_attempt <= ? ORDER BY id LIMIT ?",
+            (self.account, time.time(), BATCH_SIZE),
+        ).fetchall()
+        for row in batch:
+            if self._stop.is_set():
+                break
+            self._deliver(db, row)
+        return bool(batch)
+
+    def _deliver(self, db, row):
+        if row["id"] in self._unrecorded:
+            # Sent on an earlier pass whose bookkeeping failed; record it, never send it twice
+            self._record_sent(db, row)
+            return
+        try:
+            message = EmailMessage()
+            message["From"] = self.user
+            message["To"] = row["recipient"]
+            message["Subject"] = row["subject"]
+            message.set_content(row["body"] or "")
+        except ValueError as e:
+            # e.g. a CR/LF in the recipient or subject; no retry will fix it
+            self._record_failure(db, row, e, permanent=True)
+            return
+
+        self._pace()
+        try:
+            try:
+                self._connection().send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                # Server dropped an idle connection; reconnect once before counting it as a failure
+                self._close()
+                self._connection().send_message(message)
+        except (smtplib.SMTPException, OSError) as e:
+            if not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                self._close()  # the server answered, so only drop the connection for transport errors
+            self._record_failure(db, row, e, _permanent(e))
+            return
+        except Exception as e:
+            # Anything else counts as an attempt, so a row that keeps failing ends up failed, not stuck at the head
+            self._close()
+            self._record_failure(db, row, e, permanent=False)
+            return
+
+        self._unrecorded.add(row["id"])
+        self._last_used = time.monotonic()
+        self._sent_on_connection += 1
+        if self._sent_on_connection >= MESSAGES_PER_CONNECTION:
+            self._close()
+        self._record_sent(db, row)
+
+    def _record_sent(self, db, row):
+        # The log goes first: it ignores duplicates, so a retry after a failed UPDATE is harmless
+        now = datetime.now()
+        log_email(db, row["recipient"], row["subject"], now.strftime("%Y-%m-%d"))
+        with db:
+            db.execute(
+                "UPDATE outbox SET status = 'sent', attempts = attempts + 1, sent = ?, last_error = NULL WHERE id = ?",
+                (now.strftime("%Y-%m-%d %H:%M:%S"), row["id"]),
+            )
+        self._unrecorded.discard(row["id"])
+
+    def _record_failure(self, db, row, error, permanent):
+        attempts = row["attempts"] + 1
+        failed = permanent or attempts >= MAX_ATTEMPTS
+        with db:
+            db.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                ("failed" if failed else "queued", attempts,
+                 time.time() + BACKOFF_BASE * 2 ** (attempts - 1), str(error)[:500], row["id"]),
+            )
+
+    def _pace(self):
+        now = time.monotonic()
+        self._next_send = max(self._next_send, now)
+        delay = self._next_send - now
+        self._next_send += self.interval
+        if delay > 0:
+            self._stop.wait(delay)
+
+    def _connection(self):
+        if self._smtp is None:
+            smtp = self.smtp_factory(self.host, self.port, timeout=SMTP_TIMEOUT)
+            try:
+                if self.starttls:
+                    smtp.starttls()
+                if self.user and self.password:
+                    smtp.login(self.user, self.password)
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            self._sent_on_connection = 0
+        return self._smtp
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self._smtp.close()
+            self._smtp = None
+
+
+def get_worker(host, port, user, password, **options):
+    # One running worker per SMTP account for the whole process; Streamlit reruns just look it up
+    key = account_key(host, int(port), user)
+    with _workers_lock:
+        worker = _workers.get(key)
+        if worker is not None and worker.password != password:
+            worker.stop(timeout=SMTP_TIMEOUT)
+            worker = None
+        if worker is None:
+            worker = _workers[key] = OutboxWorker(host, port, user, password, **options)
+        return worker.start()
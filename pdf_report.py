@@ -0,0 +1,328 @@
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from report_store import write_json
+
+# --- PDF credit report parser ---
+# Turns a bureau PDF into the same JSON shape as our report exports:
+# {"consumer_info": {...}, "tradelines": [...], "collections": [...]}.
+# Each page's words are regrouped into visual rows by their y position. A wide
+# horizontal gap inside a row becomes a tab, so table layouts (label column,
+# value column) parse like inline "Label: value" text. Rows are then walked in
+# order: section headings switch between personal info, accounts and
+# collections; a creditor line or a name label opens a new record; and known
+# labels fill its fields. Page extraction is the slow part, so large PDFs are
+# split across a process pool by page range. The parsed report is cached as
+# pdf_cache/<sha256>.json and never re-parsed.
+
+CACHE_DIR = Path("pdf_cache")
+PARSER_VERSION = 2            # bump when parsing changes so old cache entries are ignored
+PARALLEL_MIN_PAGES = 16       # below this, process start-up costs more than it saves
+PAGES_PER_TASK = 4
+ROW_TOLERANCE = 3.0           # points; words whose centers are this close share a row
+COLUMN_GAP = 18.0             # points; a wider gap between words splits cells
+
+SECTION_HEADINGS = {
+    "personal information": "consumer_info",
+    "consumer information": "consumer_info",
+    "personal info": "consumer_info",
+    "accounts": "tradelines",
+    "account information": "tradelines",
+    "account history": "tradelines",
+    "credit accounts": "tradelines",
+    "tradelines": "tradelines",
+    "revolving accounts": "tradelines",
+    "installment accounts": "tradelines",
+    "mortgage accounts": "tradelines",
+    "adverse accounts": "tradelines",
+    "negative accounts": "tradelines",
+    "satisfactory accounts": "tradelines",
+    "collections": "collections",
+    "collection accounts": "collections",
+    "inquiries": None,
+    "hard inquiries": None,
+    "soft inquiries": None,
+    "public records": None,
+    "consumer statements": None,
+    "creditor contacts": None,
+}
+
+CONSUMER_FIELDS = {
+    "name": "name",
+    "consumer name": "name",
+    "full name": "name",
+    "report for": "name",
+    "address": "address",
+    "current address": "address",
+    "date of birth": "date_of_birth",
+    "year of birth": "date_of_birth",
+    "ssn": "ssn",
+    "social security number": "ssn",
+    "credit score": "credit_score",
+    "fico score": "credit_score",
+    "fico score 8": "credit_score",
+    "vantagescore": "credit_score",
+    "vantagescore 3.0": "credit_score",
+    "score": "credit_score",
+    "report date": "report_date",
+}
+
+ITEM_FIELDS = {
+    "tradelines": {
+        "creditor": "creditor_name",
+        "creditor name": "creditor_name",
+        "account name": "creditor_name",
+        "company name": "creditor_name",
+        "account number": "account_number",
+        "account #": "account_number",
+        "account type": "account_type",
+        "type": "account_type",
+        "status": "status",
+        "account status": "status",
+        "payment status": "status",
+        "condition": "status",
+        "balance": "balance",
+        "current balance": "balance",
+        "balance owed": "balance",
+        "credit limit": "credit_limit",
+        "high balance": "high_balance",
+        "high credit": "high_balance",
+        "past due": "past_due",
+        "amount past due": "past_due",
+        "date opened": "date_opened",
+        "opened": "date_opened",
+        "date reported": "last_reported",
+        "last reported": "last_reported",
+        "reported": "last_reported",
+        "date updated": "last_reported",
+        "remarks": "remarks",
+        "comments": "remarks",
+        "comment": "remarks",
+    },
+    "collections": {
+        "agency": "agency_name",
+        "agency name": "agency_name",
+        "collection agency": "agency_name",
+        "creditor": "agency_name",
+        "creditor name": "agency_name",
+        "original creditor": "original_creditor",
+        "account number": "account_number",
+        "account #": "account_number",
+        "status": "status",
+        "account status": "status",
+        "amount": "amount",
+        "balance": "amount",
+        "original amount": "original_amount",
+        "date assigned": "date_assigned",
+        "date opened": "date_assigned",
+        "date reported": "last_reported",
+        "last reported": "last_reported",
+        "date updated": "last_reported",
+        "remarks": "remarks",
+        "comments": "remarks",
+    },
+}
+
+NAME_FIELDS = {"tradelines": "creditor_name", "collections": "agency_name"}
+MONEY_FIELDS = {"balance", "credit_limit", "high_balance", "past_due", "amount", "original_amount"}
+DATE_FIELDS = {"last_reported", "date_opened", "date_assigned", "report_date", "date_of_birth"}
+DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y", "%Y-%m-%d", "%b %d, %Y", "%B %d, %Y", "%m/%Y", "%b %Y", "%B %Y")
+
+_money = re.compile(r"-?\$?\s*-?\d[\d,]*(?:\.\d+)?")
+_score = re.compile(r"\b([3-8]\d\d)\b")
+_count_suffix = re.compile(r"\s*\(\d+\)$")
+_label_split = re.compile(r"^([A-Za-z][A-Za-z0-9 #/&.'-]{0,40}?)\s*:\s*(.*)$")
+
+
+# ========== PAGE EXTRACTION ==========
+def page_rows(page):
+    # One string per visual row, cells separated by tabs where the gap is wide
+    rows = []
+    for x0, y0, x1, y1, word, *_ in sorted(page.get_text("words"), key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+        center = (y0 + y1) / 2
+        if rows and abs(rows[-1][0] - center) <= ROW_TOLERANCE:
+            rows[-1][1].append((x0, x1, word))
+        else:
+            rows.append([center, [(x0, x1, word)]])
+
+    lines = []
+    for _, words in rows:
+        words.sort()
+        text = words[0][2]
+        for (_, prev_end, _), (start, _, word) in zip(words, words[1:]):
+            text += ("\t" if start - prev_end > COLUMN_GAP else " ") + word
+        lines.append(text)
+    return lines
+
+
+_worker_doc = None
+
+
+def _open_worker(data):
+    global _worker_doc
+    _worker_doc = fitz.open(stream=data, filetype="pdf")
+
+
+def _extract_range(pages):
+    start, stop = pages
+    return [page_rows(_worker_doc[n]) for n in range(start, stop)]
+
+
+def extract_rows(data, workers=None):
+    # [[row, ...] per page]; pages are split across worker processes for large PDFs
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        count = doc.page_count
+        if count < PARALLEL_MIN_PAGES or (workers or os.cpu_count() or 1) < 2:
+            return [page_rows(page) for page in doc]
+
+    workers = min(workers or os.cpu_count() or 1, -(-count // PAGES_PER_TASK))
+    ranges = [(n, min(n + PAGES_PER_TASK, count)) for n in range(0, count, PAGES_PER_TASK)]
+    pages = []
+    # The PDF bytes go to each worker once, not once per task
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open_worker, initargs=(data,)) as pool:
+        for chunk in pool.map(_extract_range, ranges):
+            pages.extend(chunk)
+    return pages
+
+
+# ========== ROW PARSING ==========
+def _key(label):
+    # "Collections (2):" -> "collections"
+    return _count_suffix.sub("", " ".join(label.lower().split()).rstrip(":"))
+
+
+def _label_value(row):
+    # ("label", "value") for "Label: value" or "Label<tab>value" rows, else (None, row)
+    cells = [c.strip() for c in row.split("\t") if c.strip()]
+    if not cells:
+        return None, ""
+    match = _label_split.match(cells[0])
+    if match:
+        return match.group(1), " ".join([match.group(2)] + cells[1:]).strip()
+    if len(cells) > 1:
+        return cells[0], " ".join(cells[1:])
+    return None, cells[0]
+
+
+def _looks_like_creditor(text):
+    # Bureau PDFs print each account's creditor as a bare, mostly upper-case line
+    letters = [c for c in text if c.isalpha()]
+    return (3 <= len(text) <= 60 and len(letters) >= 3 and sum(c.isupper() for c in letters) / len(letters) > 0.8
+            and ":" not in text)
+
+
+def _clean(field, value):
+    value = value.strip()
+    if field in MONEY_FIELDS:
+        match = _money.search(value)
+        if not match:
+            return value
+        try:
+            number = float(match.group(0).replace("$", "").replace(",", "").replace(" ", ""))
+        except ValueError:
+            return value
+        return int(number) if number.is_integer() else number
+    if field in DATE_FIELDS:
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+        return value
+    if field == "credit_score":
+        # Scores are always ints; "N/A" and the like leave the score unset
+        match = _score.search(value)
+        return int(match.group(1)) if match else None
+    return value
+
+
+def parse_rows(rows):
+    # rows: every row of the report in reading order -> report dict
+    report = {"consumer_info": {}, "tradelines": [], "collections": []}
+    info = report["consumer_info"]
+    section = "consumer_info"
+    item = None
+    last_field = None
+
+    for row in rows:
+        key = _key(row)
+        if key in SECTION_HEADINGS:
+            section, item, last_field = SECTION_HEADINGS[key], None, None
+            continue
+        if section is None:
+            continue
+
+        label, value = _label_value(row)
+        if section == "consumer_info":
+            field = CONSUMER_FIELDS.get(_key(label)) if label else None
+            cleaned = _clean(field, value) if field and field not in info and value else None
+            if cleaned is not None:
+                info[field] = cleaned
+                last_field = field
+            elif field is None and label is None and last_field == "address":
+                info["address"] += ", " + value  # address continues on the next row
+            else:
+                last_field = None
+            if "credit_score" not in info and "score" in row.lower():
+                match = _score.search(row)
+                if match:
+                    info["credit_score"] = int(match.group(1))
+            continue
+
+        fields = ITEM_FIELDS[section]
+        name_field = NAME_FIELDS[section]
+        field = fields.get(_key(label)) if label else None
+        if field == name_field or (field is None and label is None and _looks_like_creditor(value)):
+            item = {name_field: value}
+            report[section].append(item)
+            last_field = None
+        elif field and item is not None and value:
+            if field in item and field == "account_number":
+                # Same creditor listed again without a header: a new account
+                item = {name_field: item[name_field]}
+                report[section].append(item)
+            item.setdefault(field, _clean(field, value))
+            last_field = field
+        elif field is None and label is None and item is not None and last_field == "remarks":
+            item["remarks"] += " " + value
+
+    report["consumer_info"].setdefault("name", "Unknown")
+    report["consumer_info"].setdefault("credit_score", 0)
+    for section in ("tradelines", "collections"):
+        # Drop header lines that never picked up any account fields
+        report[section] = [i for i in report[section] if len(i) > 1]
+    return report
+
+
+# ========== ENTRY POINT ==========
+def parse_pdf(data, cache_dir=CACHE_DIR, workers=None):
+    # PDF bytes -> report dict; cached by content hash
+    digest = hashlib.sha256(data).hexdigest()
+    path = Path(cache_dir) / f"{digest}.v{PARSER_VERSION}.json"
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    report = parse_rows(row for page in extract_rows(data, workers) for row in page)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_json(path, report)
+    return report
+
+
+def extracted_text(data, limit=500):
+    # First `limit` characters of plain text, for previews
+    parts, size = [], 0
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        for page in doc:
+            text = page.get_text()
+            parts.append(text)
+            size += len(text)
+            if size >= limit:
+                break
+    return "".join(parts)[:limit]
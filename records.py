@@ -0,0 +1,125 @@
+from enum import IntFlag
+from functools import lru_cache
+
+import numpy as np
+
+from dates import months_since, to_ordinal
+
+# --- Report item records ---
+# Tradelines and collections arrive as loose dicts: the creditor sits under
+# creditor_name or agency_name, the balance under balance or amount, and the
+# status is free text. Every reader used to untangle that inline, once per
+# use. Item does it once at ingest. It keeps the normalized values in slots
+# and the source dict as `raw` for anything else, such as account numbers.
+# The report date is kept as a day ordinal (see dates.py).
+# Status text is reduced to Status flags, cached per distinct string since
+# a report repeats a handful of statuses. ItemBatch holds the same fields
+# as numpy columns for the scoring rules.
+
+
+class Status(IntFlag):
+    NONE = 0
+    CHARGE_OFF = 1
+    LATE = 2
+    COLLECTION = 4
+    CLOSED = 8
+    OFF = 16                 # "off" anywhere: charge-off, paid off, written off
+    COLLECTION_REMARK = 32   # from the remarks, not the status
+
+
+STATUS_KEYWORDS = (
+    (Status.CHARGE_OFF, "charge"),
+    (Status.LATE, "late"),
+    (Status.COLLECTION, "collection"),
+    (Status.CLOSED, "closed"),
+    (Status.OFF, "off"),
+)
+
+
+@lru_cache(maxsize=1024)
+def status_flags(status, remarks=""):
+    status = status.lower()
+    flags = Status.NONE
+    for flag, word in STATUS_KEYWORDS:
+        if word in status:
+            flags |= flag
+    if "collection" in remarks.lower():
+        flags |= Status.COLLECTION_REMARK
+    return flags
+
+
+def _number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        number = float(str(value).replace(",", "").replace("$", "").strip())
+    except ValueError:
+        return None
+    if number != number:  # NaN
+        return None
+    return int(number) if number.is_integer() else number
+
+
+class Item:
+    __slots__ = ("section", "creditor", "balance", "credit_limit", "reported", "status", "flags", "raw")
+
+    def __init__(self, section, creditor, balance, credit_limit, reported, status, flags, raw):
+        self.section = section
+        self.creditor = creditor
+        self.balance = balance
+        self.credit_limit = credit_limit
+        self.reported = reported
+        self.status = status
+        self.flags = flags
+        self.raw = raw
+
+    @classmethod
+    def from_dict(cls, raw, section="tradelines"):
+        balance = _number(raw["balance"]) if raw.get("balance") is not None else None
+        if balance is None and raw.get("amount") is not None:
+            balance = _number(raw["amount"])
+        status = str(raw.get("status") or "")
+        return cls(
+            section,
+            raw.get("creditor_name") or raw.get("agency_name") or "Unknown",
+            balance if balance is not None else 0,
+            _number(raw["credit_limit"]) if raw.get("credit_limit") is not None else None,
+            to_ordinal(raw.get("last_reported")),
+            status,
+            status_flags(status, str(raw.get("remarks") or "")),
+            raw,
+        )
+
+    def __repr__(self):
+        return f"Item({self.section!r}, {self.creditor!r}, balance={self.balance!r}, status={self.status!r})"
+
+
+def as_items(items, sections="tradelines"):
+    # Items for a mix of Items and raw dicts; `sections` is one section for all, or one per item
+    if isinstance(sections, str):
+        return [i if isinstance(i, Item) else Item.from_dict(i, sections) for i in items]
+    return [i if isinstance(i, Item) else Item.from_dict(i, s) for i, s in zip(items, sections)]
+
+
+class ItemBatch:
+    # Column-wise view of a list of Items; months_old is relative to `today`
+    __slots__ = ("items", "collection", "balance", "credit_limit", "flags", "months_old")
+
+    def __init__(self, items, today=None):
+        items = list(items)
+        count = len(items)
+        self.items = items
+        self.collection = np.fromiter((i.section == "collections" for i in items), dtype=bool, count=count)
+        self.balance = np.fromiter((i.balance for i in items), dtype=np.float64, count=count)
+        self.credit_limit = np.fromiter(
+            (1 if i.credit_limit is None else i.credit_limit for i in items), dtype=np.float64, count=count
+        )
+        self.flags = np.fromiter((i.flags for i in items), dtype=np.int64, count=count)
+        # Whole months between the report month and this month; NaN when undated
+        self.months_old = months_since(np.fromiter((i.reported for i in items), dtype=np.int64, count=count), today)
+
+    def __len__(self):
+        return len(self.items)
+
+    def has(self, flags):
+        return (self.flags & int(flags)) != 0
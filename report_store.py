@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+from dates import NO_DATE, days_since, ordinals, to_date, to_ordinal
+from report_stream import open_report
+from storage import bump_counter, get_counter, touch, touch_shard
+
+# --- Content-addressed report store + manifest ---
+# Every upload is keyed by the SHA-256 of its bytes in the `reports` table
+# and stored under stored_reports/<consumer>/<timestamp>_<sha256>/, so two
+# different uploads never share a snapshot, even within the same minute.
+# Streamlit reruns the script on each widget click, so the same upload
+# reaches store_report() many times; only the first call writes a snapshot.
+# `report_manifest` keeps per-consumer count / latest timestamp / latest
+# score up to date in the same transaction, so dashboards never crawl
+# stored_reports/. `daily_scores` keeps a running score total and report
+# count per upload date, so admin analytics reads averages instead of every
+# consumer's score history.
+
+HASH_CHUNK = 1024 * 1024
+TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M"
+TIMESTAMP_LENGTH = len("2025-01-31_09-30")
+
+
+def content_digest(fp):
+    start = fp.tell()
+    fp.seek(0)
+    h = hashlib.sha256()
+    for chunk in iter(lambda: fp.read(HASH_CHUNK), b""):
+        h.update(chunk)
+    fp.seek(start)
+    return h.hexdigest()
+
+
+def write_json(path, data):
+    # Write-then-rename so readers never see a half-written file
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _record_report(db, digest, consumer, timestamp, date, score):
+    # Call inside a transaction; returns False if the digest is already known
+    cur = db.execute(
+        "INSERT OR IGNORE INTO reports (digest, consumer, timestamp, date, score) VALUES (?, ?, ?, ?, ?)",
+        (digest, consumer, timestamp, date, score),
+    )
+    if not cur.rowcount:
+        return False
+    cur = db.execute("INSERT OR IGNORE INTO report_manifest (consumer) VALUES (?)", (consumer,))
+    if cur.rowcount:
+        bump_counter(db, "consumers")
+    db.execute(
+        "UPDATE report_manifest SET report_count = report_count + 1, "
+        "latest_score = CASE WHEN ? >= latest_timestamp THEN ? ELSE latest_score END, "
+        "latest_timestamp = MAX(latest_timestamp, ?) WHERE consumer = ?",
+        (timestamp, score, timestamp, consumer),
+    )
+    bump_counter(db, "reports")
+    _count_daily_score(db, date, score, 1)
+    touch(db, "reports")
+    touch_shard(db, consumer, "reports")
+    return True
+
+
+def _unrecord_report(db, row):
+    # Call inside a transaction; undoes _record_report for an indexed report
+    db.execute("DELETE FROM reports WHERE digest = ?", (row["digest"],))
+    latest = db.execute(
+        "SELECT timestamp, score FROM reports WHERE consumer = ? ORDER BY timestamp DESC LIMIT 1", (row["consumer"],)
+    ).fetchone()
+    if latest is None:
+        db.execute("DELETE FROM report_manifest WHERE consumer = ?", (row["consumer"],))
+        bump_counter(db, "consumers", -1)
+    else:
+        db.execute(
+            "UPDATE report_manifest SET report_count = report_count - 1, latest_timestamp = ?, latest_score = ? "
+            "WHERE consumer = ?",
+            (latest["timestamp"], latest["score"], row["consumer"]),
+        )
+    bump_counter(db, "reports", -1)
+    _count_daily_score(db, row["date"], row["score"], -1)
+    touch(db, "reports")
+    touch_shard(db, row["consumer"], "reports")
+
+
+def _is_score(score):
+    # Only real numbers count towards averages; None, "N/A" and bools do not
+    return isinstance(score, (int, float)) and not isinstance(score, bool)
+
+
+def _count_daily_score(db, date, score, sign):
+    if not _is_score(score):
+        return
+    db.execute(
+        "INSERT INTO daily_scores (date, total, reports) VALUES (?, ?, ?) "
+        "ON CONFLICT (date) DO UPDATE SET total = total + excluded.total, reports = reports + excluded.reports",
+        (date, sign * score, sign),
+    )
+
+
+def _entry(row):
+    return {"consumer": row["consumer"], "timestamp": row["timestamp"], "date": row["date"], "score": row["score"],
+            "digest": row["digest"]}
+
+
+def snapshot_path(storage_dir, consumer, timestamp, digest):
+    # stored_reports/<consumer>/<timestamp>_<sha256>/report.json; snapshots stored
+    # before the digest was part of the path sit directly under <timestamp>/
+    path = Path(storage_dir) / consumer / f"{timestamp}_{digest}" / "report.json"
+    legacy = Path(storage_dir) / consumer / timestamp / "report.json"
+    return legacy if not path.exists() and legacy.exists() else path
+
+
+def store_report(db, storage_dir, consumer_key, fp, credit_score, now=None):
+    # Returns (entry, is_new); entry is {"consumer", "timestamp", "date", "score", "digest"}
+    storage_dir = Path(storage_dir)
+    digest = content_digest(fp)
+    row = db.execute("SELECT digest, consumer, timestamp, date, score FROM reports WHERE digest = ?", (digest,)).fetchone()
+    if row and snapshot_path(storage_dir, row["consumer"], row["timestamp"], digest).exists():
+        return _entry(row), False
+
+    now = now or datetime.now()
+    entry = {
+        "consumer": consumer_key,
+        "timestamp": now.strftime(TIMESTAMP_FORMAT),
+        "date": now.strftime("%Y-%m-%d"),
+        "score": credit_score,
+        "digest": digest,
+    }
+    consumer_dir = storage_dir / consumer_key
+    save_path = consumer_dir / f"{entry['timestamp']}_{digest}"
+    save_path.mkdir(parents=True, exist_ok=True)
+    start = fp.tell()
+    fp.seek(0)
+    tmp = save_path / "report.json.tmp"
+    with open(tmp, "wb") as f:
+        shutil.copyfileobj(fp, f)
+    os.replace(tmp, save_path / "report.json")
+    fp.seek(start)
+
+    score_history_path = consumer_dir / "score_history.json"
+    history = load_score_history(storage_dir, consumer_key)
+    history.append({"date": entry["date"], "score": credit_score, "digest": digest})
+    write_json(score_history_path, history)
+
+    # Index last: a crash before this point just means the upload is stored again
+    with db:
+        if row:
+            # Snapshot file had gone missing; re-point the digest at the new copy
+            _unrecord_report(db, row)
+        _record_report(db, digest, consumer_key, entry["timestamp"], entry["date"], credit_score)
+    return entry, True
+
+
+def load_score_history(storage_dir, consumer_key):
+    path = Path(storage_dir) / consumer_key / "score_history.json"
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    return []
+
+
+# ========== MANIFEST READS ==========
+def total_reports(db):
+    return get_counter(db, "reports")
+
+
+def total_consumers(db):
+    return get_counter(db, "consumers")
+
+
+def daily_score_averages(db):
+    # [(date, average score)] over every report uploaded that day
+    rows = db.execute("SELECT date, total * 1.0 / reports FROM daily_scores WHERE reports > 0 ORDER BY date")
+    return [tuple(r) for r in rows]
+
+
+def latest_scores(db):
+    # [(consumer, latest score)] from the manifest
+    return [tuple(r) for r in db.execute("SELECT consumer, latest_score FROM report_manifest ORDER BY consumer")]
+
+
+def activity_rows(db, consumer=None, start=None, end=None):
+    # Cursor of (consumer, date, score, letters generated) per stored report, oldest first within each
+    # consumer; start / end are inclusive "%Y-%m-%d" dates
+    where, params = [], []
+    if consumer:
+        where.append("r.consumer = ?")
+        params.append(consumer)
+    if start:
+        where.append("r.date >= ?")
+        params.append(start)
+    if end:
+        where.append("r.date <= ?")
+        params.append(end)
+    return db.execute(
+        "SELECT r.consumer, r.date, r.score, COALESCE(t.letters, 0) FROM reports r "
+        "LEFT JOIN letter_totals t ON t.consumer = r.consumer "
+        + (f"WHERE {' AND '.join(where)} " if where else "")
+        + "ORDER BY r.consumer, r.timestamp",
+        params,
+    )
+
+
+def recent_reports(db, limit=5):
+    rows = db.execute(
+        "SELECT consumer, latest_timestamp, latest_score FROM report_manifest "
+        "ORDER BY latest_timestamp DESC LIMIT ?",
+        (limit,),
+    )
+    return [{"client": r["consumer"].replace("_", " "), "score": r["latest_score"], "date": r["latest_timestamp"]}
+            for r in rows]
+
+
+def reports_due(db, today, days=45):
+    # (consumer name, days since last upload) for everyone whose latest report is older than `days`
+    cutoff = datetime.fromordinal(today.toordinal() - days + 1).strftime(TIMESTAMP_FORMAT)
+    rows = db.execute(
+        "SELECT consumer, latest_timestamp FROM report_manifest WHERE latest_timestamp < ? "
+        "ORDER BY latest_timestamp",
+        (cutoff,),
+    )
+    consumers, timestamps = [], []
+    for r in rows:
+        consumers.append(r["consumer"])
+        timestamps.append(r["latest_timestamp"])
+    # Calendar days, the same granularity as the cutoff above
+    ages = days_since(ordinals(timestamps), today)
+    return [(c.replace("_", " "), int(age)) for c, age in zip(consumers, ages) if age >= days]
+
+
+def sync_daily_scores(db):
+    # One-time backfill for reports indexed before daily_scores existed. The v2 key rebuilds
+    # tables filled before non-numeric scores were excluded.
+    if db.execute("SELECT 1 FROM meta WHERE key = 'daily_scores_built_v2'").fetchone():
+        return
+    with db:
+        db.execute("DELETE FROM daily_scores")
+        db.execute(
+            "INSERT INTO daily_scores (date, total, reports) "
+            "SELECT date, SUM(score), COUNT(score) FROM reports "
+            "WHERE typeof(score) IN ('integer', 'real') GROUP BY date"
+        )
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('daily_scores_built_v2', '1')")
+
+
+def sync_manifest(db, storage_dir):
+    # One-time backfill from reports stored before the manifest existed
+    if db.execute("SELECT 1 FROM meta WHERE key = 'manifest_built'").fetchone():
+        return
+    storage_dir = Path(storage_dir)
+    with db:
+        for consumer_dir in storage_dir.iterdir() if storage_dir.exists() else []:
+            if not consumer_dir.is_dir():
+                continue
+            for report_path in consumer_dir.glob("*/report.json"):
+                # "<timestamp>" or "<timestamp>_<sha256>"
+                timestamp = report_path.parent.name[:TIMESTAMP_LENGTH]
+                taken = to_ordinal(timestamp)
+                if taken == NO_DATE:
+                    continue
+                with open(report_path, "rb") as f:
+                    digest = content_digest(f)
+                    try:
+                        header, _ = open_report(f)
+                    except ValueError:
+                        header = {}
+                score = header.get("consumer_info", {}).get("credit_score")
+                _record_report(db, digest, consumer_dir.name, timestamp, to_date(taken).isoformat(), score)
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('manifest_built', '1')")
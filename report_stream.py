@@ -0,0 +1,152 @@
+import codecs
+import json
+
+# --- Streaming credit report reader ---
+# Walks the top-level report object incrementally so tradelines and
+# collections come out one record at a time instead of json.load()-ing
+# the whole tri-merge export into memory.
+
+ITEM_SECTIONS = ("tradelines", "collections")
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = " \t\r\n"
+DELIMITERS = WHITESPACE + ",]}"
+
+_decoder = json.JSONDecoder()
+
+
+class _Buffer:
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+        self.utf8 = None
+
+    def fill(self, size=None):
+        if self.eof:
+            return False
+        chunk = self.fp.read(size or self.chunk_size)
+        while isinstance(chunk, bytes):
+            if self.utf8 is None:
+                self.utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+            raw = chunk
+            chunk = self.utf8.decode(raw, final=not raw)
+            if raw and not chunk:
+                # Read stopped mid-character; pull the rest of it
+                chunk = self.fp.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed text so the buffer only ever holds the current record
+        if self.pos:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        self.text += chunk
+        return True
+
+    def peek(self, skip=WHITESPACE):
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in skip:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed report: expected {char!r}, found {found!r}")
+        self.pos += 1
+
+    def more(self, close):
+        # After a member: True on ",", False on `close`; anything else is malformed
+        found = self.peek()
+        if found in (",", close):
+            self.pos += 1
+            return found == ","
+        raise ValueError(f"Malformed report: expected ',' or {close!r}, found {found!r}")
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.text, self.pos)
+                # A number cut off at the chunk boundary still decodes ("1." | "5"
+                # reads as 1), so only trust a number once a delimiter (or EOF)
+                # follows it. Strings, objects, arrays and literals end themselves.
+                number = isinstance(obj, (int, float)) and not isinstance(obj, bool)
+                if self.eof or (end < len(self.text) and (not number or self.text[end] in DELIMITERS)):
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow reads geometrically so large values are not re-scanned per chunk
+            if not self.fill(max(self.chunk_size, len(self.text) - self.pos)):
+                if self.eof and self.pos < len(self.text):
+                    continue
+                raise ValueError("Malformed report: unexpected end of file")
+
+
+def iter_report(fp, sections=ITEM_SECTIONS, chunk_size=CHUNK_SIZE):
+    # Yields (key, value) for every top-level entry, except that arrays under
+    # `sections` are yielded element by element as (section, item). A section
+    # that is not an array (e.g. "tradelines": null) has no items and is skipped.
+    buf = _Buffer(fp, chunk_size)
+    buf.expect("{")
+    if buf.peek() == "}":
+        return
+    while True:
+        if buf.peek() != '"':
+            raise ValueError(f"Malformed report: expected a key, found {buf.peek()!r}")
+        key = buf.value()
+        buf.expect(":")
+        if key not in sections:
+            yield key, buf.value()
+        elif buf.peek() != "[":
+            buf.value()
+        else:
+            buf.pos += 1
+            if buf.peek() == "]":
+                buf.pos += 1
+            else:
+                while True:
+                    yield key, buf.value()
+                    if not buf.more("]"):
+                        break
+        if not buf.more("}"):
+            return
+
+
+def iter_items(fp, sections=ITEM_SECTIONS, chunk_size=CHUNK_SIZE):
+    for key, value in iter_report(fp, sections, chunk_size):
+        if key in sections:
+            yield key, value
+
+
+def open_report(fp, sections=ITEM_SECTIONS, chunk_size=CHUNK_SIZE):
+    # Returns (header, items): header holds every top-level key read before the
+    # first item section (consumer_info comes first in our exports) and keeps
+    # filling in as `items` is consumed; items yields (section, item) lazily.
+    events = iter_report(fp, sections, chunk_size)
+    header = {}
+    first = None
+    for key, value in events:
+        if key in sections:
+            first = (key, value)
+            break
+        header[key] = value
+
+    def items():
+        if first is None:
+            return
+        yield first
+        for key, value in events:
+            if key in sections:
+                yield key, value
+            else:
+                header[key] = value
+
+    return header, items()
@@ -0,0 +1,63 @@
+# --- Page router ---
+# App17 used to run all of its phases top to bottom on every rerun, whatever
+# tab was open. Pages now register here along with the data they read.
+# run() renders only the selected page and hands it a PageContext, which
+# loads each declared dependency the first time the page touches it (at
+# most once per rerun) and refuses anything the page did not declare.
+
+
+class PageContext:
+    def __init__(self, loaders, needs, **values):
+        self._loaders = loaders
+        self._needs = set(needs)
+        self.__dict__.update(values)
+
+    def __getattr__(self, name):
+        # Only reached for names not loaded yet
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name not in self._needs:
+            raise AttributeError(f"page did not declare '{name}' in its needs")
+        value = self._loaders[name][0](self)
+        setattr(self, name, value)
+        return value
+
+
+class Router:
+    def __init__(self):
+        self.pages = {}
+        self.loaders = {}
+
+    def loader(self, name, needs=()):
+        # Registers fn(ctx) -> value for `name`; `needs` lists other loaders it reads
+        def register(fn):
+            self.loaders[name] = (fn, tuple(needs))
+            return fn
+        return register
+
+    def page(self, name, needs=()):
+        def register(fn):
+            self.pages[name] = (fn, tuple(needs))
+            return fn
+        return register
+
+    def names(self):
+        return list(self.pages)
+
+    def _expand(self, needs):
+        resolved, stack = set(), list(needs)
+        while stack:
+            name = stack.pop()
+            if name in resolved:
+                continue
+            if name not in self.loaders:
+                raise KeyError(f"no loader registered for '{name}'")
+            resolved.add(name)
+            stack.extend(self.loaders[name][1])
+        return resolved
+
+    def run(self, name, **values):
+        # Renders one page; `values` (db, user, ...) are available to every page and loader
+        render, needs = self.pages[name]
+        ctx = PageContext(self.loaders, self._expand(needs), **values)
+        return render(ctx)
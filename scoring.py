@@ -0,0 +1,140 @@
+import numpy as np
+
+from records import Item, ItemBatch, Status, as_items
+
+# --- Dispute scoring engine ---
+# Every app used to carry its own item-by-item scoring loop. The rule sets
+# below reproduce each of them, but are evaluated column-wise over an
+# ItemBatch: status and remarks were reduced to Status flags when the Item
+# was built, each rule is one vectorized mask, and scores are a single
+# mask @ points product.
+
+
+def _has(flags):
+    return lambda b: b.has(flags)
+
+
+def _above(limit):
+    return lambda b: b.balance > limit
+
+
+def _old(b):
+    return b.months_old > 12
+
+
+def _collection(b):
+    return b.collection
+
+
+def _tradeline(b):
+    return ~b.collection
+
+
+def _both(*tests):
+    def test(b):
+        mask = np.ones(len(b), dtype=bool)
+        for t in tests:
+            mask &= t(b)
+        return mask
+    return test
+
+
+# (points, breakdown label, test) — order matches the original breakdown order
+RULE_SETS = {
+    # score_tradeline in 30.py / 43.py / 51.py
+    "tools": [
+        (3, "+3 Charge-Off", _has(Status.CHARGE_OFF)),
+        (-2, "-2 Collection", _has(Status.COLLECTION)),
+        (-1, "-1 High Balance", _above(1000)),
+        (-1, "-1 Late", _has(Status.LATE)),
+        (1, "+1 Closed Account", _has(Status.CLOSED)),
+    ],
+    # App17 Phase 1 account breakdown
+    "dispute": [
+        (3, "+3 Charge-off", _has(Status.CHARGE_OFF)),
+        (2, "+2 Late payments", _has(Status.LATE)),
+        (2, "+2 High balance", _above(1000)),
+        (2, "+2 Collection remark", _has(Status.COLLECTION_REMARK)),
+    ],
+    # App17 Phase 12 AI dispute priority
+    "priority": [
+        (3, "+3 Charge-off", _has(Status.CHARGE_OFF)),
+        (2, "+2 Late payments", _has(Status.LATE)),
+        (2, "+2 Collection remark", _has(Status.COLLECTION_REMARK)),
+        (1, "+1 High balance", _above(1000)),
+    ],
+    # score_item in the dispute chatbot
+    "chatbot": [
+        (2, "+2: Older than 12 months", _old),
+        (1, "+1: Recent negative reporting", lambda b: ~_old(b)),
+        (2, "+2: Balance exceeds limit", _both(_tradeline, lambda b: b.balance > b.credit_limit)),
+        (3, "+3: Account charged off", _both(_tradeline, _has(Status.CHARGE_OFF | Status.OFF))),
+        (2, "+2: Multiple late payments", _both(_tradeline, _has(Status.LATE))),
+        (3, "+3: Collection account", _collection),
+        (1, "+1: Recently added", _both(_collection, lambda b: b.months_old < 6)),
+    ],
+}
+
+EMPTY_BREAKDOWN = {
+    "dispute": ["0 – No indicators"],
+}
+
+
+def score_batch(batch, rule_set="tools", breakdown=False):
+    rules = RULE_SETS[rule_set]
+    points = np.array([p for p, _, _ in rules], dtype=np.int64)
+    if len(batch):
+        masks = np.column_stack([test(batch) for _, _, test in rules])
+    else:
+        masks = np.zeros((0, len(rules)), dtype=bool)
+    scores = masks.astype(np.int64) @ points
+    if not breakdown:
+        return scores
+
+    # Items sharing a rule pattern share one breakdown list
+    labels = [label for _, label, _ in rules]
+    empty = EMPTY_BREAKDOWN.get(rule_set, [])
+    patterns = masks.astype(np.int64) @ (1 << np.arange(len(rules), dtype=np.int64))
+    cache = {}
+    breakdowns = []
+    for row, pattern in enumerate(patterns):
+        if pattern not in cache:
+            cache[pattern] = [labels[j] for j in np.flatnonzero(masks[row])] or list(empty)
+        breakdowns.append(cache[pattern])
+    return scores, breakdowns
+
+
+def score_items(items, rule_set="tools", categories=None, breakdown=False, today=None):
+    # items: Items or raw tradeline/collection dicts; categories gives the dicts' section(s)
+    return score_batch(ItemBatch(as_items(items, categories or "tradelines"), today), rule_set, breakdown)
+
+
+def score_records(records, rule_set="tools", chunk_size=500, today=None):
+    # Scores Items in batches as they arrive; yields (item, score, breakdown)
+    batch = []
+
+    def flush():
+        scores, breakdowns = score_batch(ItemBatch(batch, today), rule_set, True)
+        for item, score, lines in zip(batch, scores, breakdowns):
+            yield item, int(score), lines
+        batch.clear()
+
+    for record in records:
+        batch.append(record)
+        if len(batch) >= chunk_size:
+            yield from flush()
+    if batch:
+        yield from flush()
+
+
+def score_stream(pairs, rule_set="tools", chunk_size=500, today=None):
+    # Scores (section, item) pairs from report_stream in batches while parsing continues;
+    # yields (section, item, score, breakdown) with the item as it was passed in
+    records = (Item.from_dict(item, section) for section, item in pairs)
+    for record, score, lines in score_records(records, rule_set, chunk_size, today):
+        yield record.section, record.raw, score, lines
+
+
+def score_tradeline(item):
+    scores, breakdowns = score_items([item], "tools", breakdown=True)
+    return int(scores[0]), breakdowns[0]
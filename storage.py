@@ -0,0 +1,784 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+# --- Embedded SQLite storage ---
+# One WAL-mode database replaces the flat JSON files App17 used to load and
+# rewrite in full on every rerun. Each helper touches only the rows it needs.
+
+DB_PATH = Path("app.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS letters (
+    id INTEGER PRIMARY KEY,
+    consumer TEXT NOT NULL,
+    creditor TEXT,
+    bureau TEXT,
+    reason TEXT,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS letters_consumer ON letters (consumer);
+CREATE INDEX IF NOT EXISTS letters_date ON letters (date);
+CREATE TABLE IF NOT EXISTS status_options (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS account_statuses (
+    key TEXT PRIMARY KEY,
+    consumer TEXT NOT NULL,
+    status TEXT,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS account_statuses_consumer ON account_statuses (consumer, status);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    sender TEXT,
+    recipient TEXT,
+    text TEXT,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_sender ON messages (sender);
+CREATE INDEX IF NOT EXISTS messages_date ON messages (date);
+CREATE TABLE IF NOT EXISTS todos (
+    id INTEGER PRIMARY KEY,
+    task TEXT,
+    done INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS branding (
+    email TEXT PRIMARY KEY,
+    name TEXT,
+    logo TEXT,
+    color TEXT
+);
+CREATE TABLE IF NOT EXISTS users (
+    email TEXT PRIMARY KEY,
+    password TEXT,
+    is_admin INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS leads (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    email TEXT,
+    source TEXT,
+    status TEXT,
+    tags TEXT,
+    phone TEXT,
+    notes TEXT,
+    added TEXT
+);
+CREATE INDEX IF NOT EXISTS leads_email ON leads (email);
+CREATE INDEX IF NOT EXISTS leads_added ON leads (added);
+CREATE TABLE IF NOT EXISTS clients (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    email TEXT,
+    status TEXT,
+    phone TEXT,
+    joined TEXT,
+    score INTEGER
+);
+CREATE INDEX IF NOT EXISTS clients_email ON clients (email);
+CREATE TABLE IF NOT EXISTS lead_keys (
+    key INTEGER PRIMARY KEY,
+    lead_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS email_log (
+    id INTEGER PRIMARY KEY,
+    recipient TEXT,
+    subject TEXT,
+    date TEXT,
+    UNIQUE (recipient, subject, date)
+);
+CREATE INDEX IF NOT EXISTS email_log_date ON email_log (date);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    account TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    subject TEXT,
+    body TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created TEXT,
+    sent TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (account, status, next_attempt);
+CREATE TABLE IF NOT EXISTS webhook_events (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    event TEXT NOT NULL,
+    payload TEXT,
+    idempotency_key TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created TEXT,
+    delivered TEXT,
+    UNIQUE (url, idempotency_key)
+);
+CREATE INDEX IF NOT EXISTS webhook_events_due ON webhook_events (status, next_attempt);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS reports (
+    digest TEXT PRIMARY KEY,
+    consumer TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    date TEXT,
+    score INTEGER
+);
+CREATE INDEX IF NOT EXISTS reports_consumer ON reports (consumer, timestamp);
+CREATE TABLE IF NOT EXISTS report_manifest (
+    consumer TEXT PRIMARY KEY,
+    report_count INTEGER NOT NULL DEFAULT 0,
+    latest_timestamp TEXT NOT NULL DEFAULT '',
+    latest_score INTEGER
+);
+CREATE INDEX IF NOT EXISTS report_manifest_latest ON report_manifest (latest_timestamp);
+CREATE TABLE IF NOT EXISTS letter_totals (
+    consumer TEXT PRIMARY KEY,
+    letters INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS shard_versions (
+    consumer TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (consumer, topic)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS status_totals (
+    consumer TEXT NOT NULL,
+    status TEXT NOT NULL,
+    accounts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (consumer, status)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS status_events (
+    id INTEGER PRIMARY KEY,
+    consumer TEXT NOT NULL,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS status_events_account ON status_events (consumer, key);
+CREATE TABLE IF NOT EXISTS daily_scores (
+    date TEXT PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    reports INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+LEAD_FIELDS = ("id", "name", "email", "source", "status", "tags", "phone", "notes", "added")
+CLIENT_FIELDS = ("id", "name", "email", "status", "phone", "joined", "score")
+
+_local = threading.local()
+
+
+def get_db(path=DB_PATH):
+    # Streamlit serves each session from its own thread; give each thread its own connection
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    path = str(path)
+    if path not in conns:
+        db = sqlite3.connect(path, timeout=30)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA foreign_keys=ON")
+        with db:
+            db.executescript(SCHEMA)
+        conns[path] = db
+    return conns[path]
+
+
+def bump_counter(db, name, by=1):
+    # Call inside the caller's transaction
+    db.execute(
+        "INSERT INTO counters (name, value) VALUES (?, ?) "
+        "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+        (name, by),
+    )
+
+
+def get_counter(db, name):
+    row = db.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+# ========== DATA VERSIONS ==========
+# Every write bumps a per-topic version counter in the same transaction, so
+# cached reads (data_cache.py) can be keyed by version and are invalidated by
+# writes from any session, thread or process. Topics: letters, statuses,
+# messages, todos, branding, leads, clients, emails, reports.
+def touch(db, *topics):
+    # Call inside the caller's transaction
+    for topic in topics:
+        bump_counter(db, f"version:{topic}")
+
+
+def data_versions(db):
+    # {topic: version}; one small read per rerun
+    rows = db.execute("SELECT name, value FROM counters WHERE name LIKE 'version:%'")
+    return {name[len("version:"):]: value for name, value in rows}
+
+
+# ========== PER-CONSUMER SHARDS ==========
+# A consumer's letters, account statuses and stored reports form its shard.
+# Writes to a shard also bump its own version (shard_versions), and client
+# views key their cached reads on those. So another client's writes never
+# invalidate them, and a client rerun reads only its own rows, however many
+# consumers the agency has. The global topic versions above, with
+# letter_totals and report_manifest as the directory of consumers, serve
+# the admin views. Shard topics: letters, statuses, reports.
+def touch_shard(db, consumer, *topics):
+    # Call inside the caller's transaction
+    db.executemany(
+        "INSERT INTO shard_versions (consumer, topic, version) VALUES (?, ?, 1) "
+        "ON CONFLICT (consumer, topic) DO UPDATE SET version = version + 1",
+        [(consumer, topic) for topic in topics],
+    )
+
+
+def shard_versions(db, consumer):
+    # {topic: version} for one consumer; a primary-key range read
+    rows = db.execute("SELECT topic, version FROM shard_versions WHERE consumer = ?", (consumer,))
+    return dict(rows.fetchall())
+
+
+# ========== LETTERS ==========
+# `letter_totals` and the "letters" counter are kept in step with the letters
+# table, so admin analytics never counts rows
+def _count_letters(db, consumer, n):
+    # Call inside the caller's transaction
+    if not n:
+        return
+    db.execute(
+        "INSERT INTO letter_totals (consumer, letters) VALUES (?, ?) "
+        "ON CONFLICT (consumer) DO UPDATE SET letters = letters + excluded.letters",
+        (consumer, n),
+    )
+    bump_counter(db, "letters", n)
+
+
+def add_letters(db, consumer, entries):
+    entries = list(entries)
+    with db:
+        db.executemany(
+            "INSERT INTO letters (consumer, creditor, bureau, reason, date) VALUES (?, ?, ?, ?, ?)",
+            [(consumer, e["creditor"], e["bureau"], e["reason"], e["date"]) for e in entries],
+        )
+        _count_letters(db, consumer, len(entries))
+        touch(db, "letters")
+        touch_shard(db, consumer, "letters")
+
+
+def letters_for(db, consumer):
+    rows = db.execute(
+        "SELECT creditor, bureau, reason, date FROM letters WHERE consumer = ? ORDER BY id", (consumer,)
+    )
+    return [dict(r) for r in rows]
+
+
+def letters_by_consumer(db):
+    grouped = {}
+    for r in db.execute("SELECT consumer, creditor, bureau, reason, date FROM letters ORDER BY consumer, id"):
+        grouped.setdefault(r["consumer"], []).append(
+            {"creditor": r["creditor"], "bureau": r["bureau"], "reason": r["reason"], "date": r["date"]}
+        )
+    return grouped
+
+
+def letter_counts(db):
+    return dict(db.execute("SELECT consumer, letters FROM letter_totals").fetchall())
+
+
+def total_letters(db):
+    return get_counter(db, "letters")
+
+
+def sync_letter_totals(db):
+    # One-time backfill for letters written before letter_totals existed
+    if db.execute("SELECT 1 FROM meta WHERE key = 'letter_totals_built'").fetchone():
+        return
+    with db:
+        db.execute("DELETE FROM letter_totals")
+        db.execute("INSERT INTO letter_totals (consumer, letters) SELECT consumer, COUNT(*) FROM letters GROUP BY consumer")
+        db.execute("INSERT OR REPLACE INTO counters (name, value) SELECT 'letters', COUNT(*) FROM letters")
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('letter_totals_built', '1')")
+
+
+# ========== DISPUTE STATUSES ==========
+# `status_totals` holds each consumer's account count per status. Every
+# status write adjusts it in the same transaction, so progress bars and
+# breakdowns read a consumer's few status rows and never count accounts.
+# account_statuses keeps only the latest status per account. Each change is
+# also appended to `status_events`, which is never updated. Its
+# (consumer, key) index lists one account's events in id order, which is
+# the order they happened.
+def status_options(db):
+    return [r[0] for r in db.execute("SELECT name FROM status_options ORDER BY rowid")]
+
+
+def add_status_option(db, name):
+    with db:
+        cur = db.execute("INSERT OR IGNORE INTO status_options (name) VALUES (?)", (name,))
+        if cur.rowcount:
+            touch(db, "statuses")
+    return cur.rowcount > 0
+
+
+def account_statuses(db, consumer):
+    rows = db.execute("SELECT key, status, date FROM account_statuses WHERE consumer = ?", (consumer,))
+    return {r["key"]: {"status": r["status"], "date": r["date"]} for r in rows}
+
+
+def _count_status(db, consumer, status, n):
+    # Call inside the caller's transaction
+    if not status:
+        return
+    db.execute(
+        "INSERT INTO status_totals (consumer, status, accounts) VALUES (?, ?, ?) "
+        "ON CONFLICT (consumer, status) DO UPDATE SET accounts = accounts + excluded.accounts",
+        (consumer, status, n),
+    )
+
+
+def _write_account_status(db, key, fields):
+    # Call inside the caller's transaction; key is (consumer, status key)
+    consumer, key = key
+    previous = db.execute("SELECT consumer, status FROM account_statuses WHERE key = ?", (key,)).fetchone()
+    changed = fields.get("status") and (previous is None or fields["status"] != previous["status"])
+    if previous is not None:
+        # An existing row keeps its consumer
+        consumer = previous["consumer"]
+        if changed:
+            _count_status(db, consumer, previous["status"], -1)
+    if changed:
+        _count_status(db, consumer, fields["status"], 1)
+        db.execute(
+            "INSERT INTO status_events (consumer, key, status, date) VALUES (?, ?, ?, ?)",
+            (consumer, key, fields["status"], fields.get("date")),
+        )
+    db.execute(
+        "INSERT INTO account_statuses (key, consumer, status, date) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (key) DO UPDATE SET status = COALESCE(excluded.status, status), "
+        "date = COALESCE(excluded.date, date)",
+        (key, consumer, fields.get("status"), fields.get("date")),
+    )
+    touch_shard(db, consumer, "statuses")
+
+
+def set_account_status(db, consumer, key, status, date):
+    with db:
+        _write_account_status(db, (consumer, key), {"status": status, "date": date})
+        touch(db, "statuses")
+
+
+def status_counts(db, consumer):
+    # {status: accounts} for one consumer, from the maintained totals
+    rows = db.execute(
+        "SELECT status, accounts FROM status_totals WHERE consumer = ? AND accounts > 0", (consumer,)
+    )
+    return dict(rows.fetchall())
+
+
+def status_history(db, consumer):
+    # {status key: [{"status", "date"}, ...]} for one consumer, oldest event first
+    history = {}
+    rows = db.execute("SELECT key, status, date FROM status_events WHERE consumer = ? ORDER BY key, id", (consumer,))
+    for r in rows:
+        history.setdefault(r["key"], []).append({"status": r["status"], "date": r["date"]})
+    return history
+
+
+def sync_status_events(db):
+    # One-time backfill: statuses set before status_events existed become each account's first event
+    if db.execute("SELECT 1 FROM meta WHERE key = 'status_events_built'").fetchone():
+        return
+    with db:
+        db.execute(
+            "INSERT INTO status_events (consumer, key, status, date) "
+            "SELECT s.consumer, s.key, s.status, s.date FROM account_statuses s "
+            "WHERE s.status IS NOT NULL AND s.status != '' "
+            "AND NOT EXISTS (SELECT 1 FROM status_events e WHERE e.consumer = s.consumer AND e.key = s.key) "
+            "ORDER BY s.date"
+        )
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('status_events_built', '1')")
+
+
+def sync_status_totals(db):
+    # One-time backfill for statuses written before status_totals existed
+    if db.execute("SELECT 1 FROM meta WHERE key = 'status_totals_built'").fetchone():
+        return
+    with db:
+        db.execute("DELETE FROM status_totals")
+        db.execute(
+            "INSERT INTO status_totals (consumer, status, accounts) "
+            "SELECT consumer, status, COUNT(*) FROM account_statuses WHERE status IS NOT NULL AND status != '' "
+            "GROUP BY consumer, status"
+        )
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('status_totals_built', '1')")
+
+
+# ========== MESSAGES ==========
+def add_message(db, sender, recipient, text, date):
+    with db:
+        db.execute(
+            "INSERT INTO messages (sender, recipient, text, date) VALUES (?, ?, ?, ?)",
+            (sender, recipient, text, date),
+        )
+        touch(db, "messages")
+
+
+def recent_messages(db, limit=10):
+    rows = db.execute("SELECT sender, recipient, text, date FROM messages ORDER BY id DESC LIMIT ?", (limit,))
+    return [{"from": r["sender"], "to": r["recipient"], "text": r["text"], "date": r["date"]} for r in rows]
+
+
+# ========== TO-DO LIST ==========
+def load_todos(db):
+    return [{"id": r["id"], "task": r["task"], "done": bool(r["done"])}
+            for r in db.execute("SELECT id, task, done FROM todos ORDER BY id")]
+
+
+def add_todo(db, task):
+    with db:
+        db.execute("INSERT INTO todos (task, done) VALUES (?, 0)", (task,))
+        touch(db, "todos")
+
+
+def _write_todo(db, todo_id, fields):
+    # Call inside the caller's transaction
+    db.execute("UPDATE todos SET done = ? WHERE id = ?", (int(fields["done"]), todo_id))
+
+
+def set_todo_done(db, todo_id, done):
+    with db:
+        _write_todo(db, todo_id, {"done": done})
+        touch(db, "todos")
+
+
+# ========== BRANDING ==========
+def get_branding(db, email):
+    row = db.execute("SELECT name, logo, color FROM branding WHERE email = ?", (email,)).fetchone()
+    return {k: row[k] for k in row.keys() if row[k] is not None} if row else {}
+
+
+def _write_branding(db, email, fields):
+    # Call inside the caller's transaction; fields left out keep their saved value
+    db.execute(
+        "INSERT INTO branding (email, name, logo, color) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (email) DO UPDATE SET name = COALESCE(excluded.name, branding.name), "
+        "logo = COALESCE(excluded.logo, branding.logo), color = COALESCE(excluded.color, branding.color)",
+        (email, fields.get("name"), fields.get("logo"), fields.get("color")),
+    )
+
+
+def save_branding(db, email, name="", logo="", color=None):
+    with db:
+        _write_branding(db, email, {"name": name, "logo": logo, "color": color})
+        touch(db, "branding")
+
+
+# ========== USERS ==========
+def has_users(db):
+    return db.execute("SELECT 1 FROM users LIMIT 1").fetchone() is not None
+
+
+def get_user(db, email):
+    row = db.execute("SELECT password, is_admin FROM users WHERE email = ?", (email,)).fetchone()
+    return {"password": row["password"], "is_admin": bool(row["is_admin"])} if row else None
+
+
+def add_user(db, email, password, is_admin=False):
+    with db:
+        cur = db.execute(
+            "INSERT OR IGNORE INTO users (email, password, is_admin) VALUES (?, ?, ?)",
+            (email, password, int(is_admin)),
+        )
+    return cur.rowcount > 0
+
+
+# ========== CRM LEADS + CLIENTS ==========
+def _lead_row(lead):
+    row = [lead.get(f) for f in LEAD_FIELDS]
+    row[LEAD_FIELDS.index("tags")] = json.dumps(lead.get("tags", []))
+    return row
+
+
+def _lead_dict(row):
+    lead = {k: row[k] for k in LEAD_FIELDS if row[k] is not None}
+    lead["tags"] = json.loads(row["tags"]) if row["tags"] else []
+    return lead
+
+
+def normalize_email(email):
+    email = str(email or "").strip().lower()
+    return email if "@" in email else ""
+
+
+def normalize_phone(phone):
+    digits = re.sub(r"\D", "", str(phone or ""))
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits if len(digits) >= 7 else ""
+
+
+def lead_key(kind, value):
+    # 64-bit hash of a normalized email ("e") or phone ("p"); stored in lead_keys for import dedupe
+    digest = hashlib.blake2b(f"{kind}:{value}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _lead_key_rows(leads):
+    rows = []
+    for lead in leads:
+        email, phone = normalize_email(lead.get("email")), normalize_phone(lead.get("phone"))
+        if email:
+            rows.append((lead_key("e", email), lead["id"]))
+        if phone:
+            rows.append((lead_key("p", phone), lead["id"]))
+    return rows
+
+
+def sync_lead_keys(db):
+    # One-time backfill of dedupe keys for leads stored before lead_keys existed
+    if db.execute("SELECT 1 FROM meta WHERE key = 'lead_keys_built'").fetchone():
+        return
+    with db:
+        leads = db.execute("SELECT id, email, phone FROM leads")
+        db.executemany("INSERT OR IGNORE INTO lead_keys (key, lead_id) VALUES (?, ?)", _lead_key_rows(map(dict, leads)))
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('lead_keys_built', '1')")
+
+
+def load_leads(db):
+    return [_lead_dict(r) for r in db.execute(f"SELECT {', '.join(LEAD_FIELDS)} FROM leads ORDER BY rowid")]
+
+
+def add_leads(db, leads):
+    with db:
+        db.executemany(
+            f"INSERT OR REPLACE INTO leads ({', '.join(LEAD_FIELDS)}) VALUES ({', '.join('?' * len(LEAD_FIELDS))})",
+            [_lead_row(l) for l in leads],
+        )
+        db.executemany("INSERT OR IGNORE INTO lead_keys (key, lead_id) VALUES (?, ?)", _lead_key_rows(leads))
+        touch(db, "leads")
+
+
+def add_lead(db, lead):
+    add_leads(db, [lead])
+
+
+def _write_lead(db, lead_id, fields):
+    # Call inside the caller's transaction
+    if "tags" in fields:
+        fields = {**fields, "tags": json.dumps(fields["tags"])}
+    assignments = ", ".join(f"{k} = ?" for k in fields if k in LEAD_FIELDS)
+    db.execute(f"UPDATE leads SET {assignments} WHERE id = ?", [fields[k] for k in fields if k in LEAD_FIELDS] + [lead_id])
+
+
+def update_lead(db, lead_id, **fields):
+    with db:
+        _write_lead(db, lead_id, fields)
+        touch(db, "leads")
+
+
+def load_clients(db):
+    rows = db.execute(f"SELECT {', '.join(CLIENT_FIELDS)} FROM clients ORDER BY rowid")
+    return [{k: r[k] for k in CLIENT_FIELDS if r[k] is not None} for r in rows]
+
+
+def add_clients(db, clients):
+    with db:
+        db.executemany(
+            f"INSERT OR REPLACE INTO clients ({', '.join(CLIENT_FIELDS)}) VALUES ({', '.join('?' * len(CLIENT_FIELDS))})",
+            [[c.get(f) for f in CLIENT_FIELDS] for c in clients],
+        )
+        touch(db, "clients")
+
+
+def convert_lead(db, lead, joined):
+    client = {"id": lead["id"], "name": lead["name"], "email": lead["email"], "status": "Active", "joined": joined}
+    with db:
+        db.execute(
+            f"INSERT OR REPLACE INTO clients ({', '.join(CLIENT_FIELDS)}) VALUES ({', '.join('?' * len(CLIENT_FIELDS))})",
+            [client.get(f) for f in CLIENT_FIELDS],
+        )
+        db.execute("DELETE FROM leads WHERE id = ?", (lead["id"],))
+        touch(db, "leads", "clients")
+    return client
+
+
+# ========== EMAIL LOG ==========
+def log_email(db, recipient, subject, date):
+    with db:
+        cur = db.execute(
+            "INSERT OR IGNORE INTO email_log (recipient, subject, date) VALUES (?, ?, ?)",
+            (recipient, subject, date),
+        )
+        if cur.rowcount:
+            touch(db, "emails")
+    return cur.rowcount > 0
+
+
+def log_emails(db, entries):
+    # entries: (recipient, subject, date); returns how many were new. The
+    # already-logged ones are dropped against a set read in one query, so a
+    # rerun that re-logs the same reminders opens no write transaction.
+    entries = set(entries)
+    if not entries:
+        return 0
+    dates = sorted({date for _, _, date in entries})
+    logged = set(map(tuple, db.execute(
+        f"SELECT recipient, subject, date FROM email_log WHERE date IN ({', '.join('?' * len(dates))})", dates
+    )))
+    new = sorted(entries - logged)
+    if not new:
+        return 0
+    with db:
+        cur = db.executemany("INSERT OR IGNORE INTO email_log (recipient, subject, date) VALUES (?, ?, ?)", new)
+        if cur.rowcount:
+            touch(db, "emails")
+    return cur.rowcount
+
+
+def recent_emails(db, limit=10):
+    rows = db.execute("SELECT recipient, subject, date FROM email_log ORDER BY id DESC LIMIT ?", (limit,))
+    return [{"to": r["recipient"], "subject": r["subject"], "date": r["date"]} for r in reversed(rows.fetchall())]
+
+
+# ========== STAGED ROW WRITES ==========
+# table -> (writer(db, key, fields), topic); used by write_behind.WriteBehind.flush
+ROW_WRITERS = {
+    "todos": (_write_todo, "todos"),
+    "leads": (_write_lead, "leads"),
+    "account_statuses": (_write_account_status, "statuses"),
+    "branding": (_write_branding, "branding"),
+}
+
+
+def write_rows(db, changes):
+    # {(table, key): {field: value}} -> one transaction, one version bump per topic
+    topics = set()
+    with db:
+        for (table, key), fields in changes.items():
+            writer, topic = ROW_WRITERS[table]
+            writer(db, key, fields)
+            topics.add(topic)
+        touch(db, *sorted(topics))
+
+
+# ========== ONE-TIME IMPORT OF THE OLD JSON FILES ==========
+def _split_status_key(key, consumers):
+    # Old keys are f"{consumer_key}_{creditor}_{i}"; match the longest known consumer prefix
+    for consumer in sorted(consumers, key=len, reverse=True):
+        if key.startswith(consumer + "_"):
+            return consumer
+    return key.split("_", 1)[0]
+
+
+def migrate_json(db, base=Path("."), storage_dir=Path("stored_reports")):
+    base = Path(base)
+
+    def load(name):
+        path = base / name
+        done = db.execute("SELECT 1 FROM meta WHERE key = ?", (f"migrated:{name}",)).fetchone()
+        if done or not path.exists():
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def mark(name, *topics):
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, '1')", (f"migrated:{name}",))
+        touch(db, *topics)
+
+    data = load("letter_logs.json")
+    if data is not None:
+        with db:
+            for consumer, entries in data.items():
+                db.executemany(
+                    "INSERT INTO letters (consumer, creditor, bureau, reason, date) VALUES (?, ?, ?, ?, ?)",
+                    [(consumer, e.get("creditor"), e.get("bureau"), e.get("reason"), e.get("date")) for e in entries],
+                )
+                _count_letters(db, consumer, len(entries))
+            mark("letter_logs.json", "letters")
+
+    data = load("dispute_statuses.json")
+    if data is not None:
+        consumers = [p.name for p in Path(storage_dir).iterdir() if p.is_dir()] if Path(storage_dir).exists() else []
+        with db:
+            for key, value in data.items():
+                if value.get("status"):
+                    _write_account_status(db, (_split_status_key(key, consumers), key),
+                                          {"status": value["status"], "date": value.get("date")})
+                else:
+                    db.execute("INSERT OR IGNORE INTO status_options (name) VALUES (?)", (key,))
+            mark("dispute_statuses.json", "statuses")
+
+    data = load("messages.json")
+    if data is not None:
+        with db:
+            db.executemany(
+                "INSERT INTO messages (sender, recipient, text, date) VALUES (?, ?, ?, ?)",
+                [(m.get("from"), m.get("to"), m.get("text"), m.get("date")) for m in data],
+            )
+            mark("messages.json", "messages")
+
+    data = load("todo.json")
+    if data is not None:
+        with db:
+            db.executemany("INSERT INTO todos (task, done) VALUES (?, ?)", [(t["task"], int(t["done"])) for t in data])
+            mark("todo.json", "todos")
+
+    data = load("branding.json")
+    if data is not None:
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO branding (email, name, logo, color) VALUES (?, ?, ?, ?)",
+                [(email, b.get("name"), b.get("logo"), b.get("color")) for email, b in data.items()],
+            )
+            mark("branding.json", "branding")
+
+    data = load("users.json")
+    if data is not None:
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO users (email, password, is_admin) VALUES (?, ?, ?)",
+                [(email, u.get("password"), int(u.get("is_admin", False))) for email, u in data.items()],
+            )
+            mark("users.json")
+
+    data = load("crm_leads.json")
+    if data is not None:
+        with db:
+            db.executemany(
+                f"INSERT OR REPLACE INTO leads ({', '.join(LEAD_FIELDS)}) VALUES ({', '.join('?' * len(LEAD_FIELDS))})",
+                [_lead_row(l) for l in data],
+            )
+            mark("crm_leads.json", "leads")
+
+    data = load("crm_clients.json")
+    if data is not None:
+        with db:
+            db.executemany(
+                f"INSERT OR REPLACE INTO clients ({', '.join(CLIENT_FIELDS)}) VALUES ({', '.join('?' * len(CLIENT_FIELDS))})",
+                [[c.get(f) for f in CLIENT_FIELDS] for c in data],
+            )
+            mark("crm_clients.json", "clients")
+
+    data = load("email_log.json")
+    if data is not None:
+        with db:
+            db.executemany(
+                "INSERT OR IGNORE INTO email_log (recipient, subject, date) VALUES (?, ?, ?)",
+                [(e.get("to"), e.get("subject"), e.get("date")) for e in data],
+            )
+            mark("email_log.json", "emails")
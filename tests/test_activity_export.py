@@ -0,0 +1,32 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+import pyarrow.parquet as pq
+
+from activity_export import export_activity
+from report_store import store_report
+from storage import get_db
+
+
+def report(score):
+    return io.BytesIO(json.dumps({"consumer_info": {"name": "Jane Doe", "credit_score": score},
+                                  "tradelines": [], "collections": []}).encode())
+
+
+def test_exports_keep_float_and_non_numeric_scores(tmp_path):
+    path = tmp_path / "app.db"
+    db = get_db(path)
+    for minute, score in enumerate((640, 655.5, "N/A", None)):
+        store_report(db, tmp_path / "stored", "Jane_Doe", report(score), score,
+                     datetime(2025, 4, 24, 10, minute))
+
+    table = pq.read_table(io.BytesIO(export_activity("Parquet", db_path=path, chunk_rows=3)))
+    assert table.column("score").to_pylist() == [640.0, 655.5, None, None]
+    assert table.column("letters_generated").to_pylist() == [0, 0, 0, 0]
+
+    with gzip.open(io.BytesIO(export_activity("CSV (gzip)", db_path=path)), "rt", newline="") as f:
+        rows = list(csv.reader(f))
+    assert [r[2] for r in rows] == ["score", "640", "655.5", "N/A", ""]
@@ -0,0 +1,68 @@
+import copy
+
+from crm_search import reindex, session_index
+
+LEADS = [
+    {"id": "1", "name": "Ann Lee", "email": "ann@example.com", "status": "New", "added": "2025-04-24"},
+    {"id": "2", "name": "Bob Ray", "email": "bob@example.com", "status": "New", "added": "2025-04-24"},
+    {"id": "3", "name": "Cy Dunn", "email": "cy@example.com", "status": "Hot", "added": "2025-04-24"},
+]
+
+
+def rerun(records):
+    # data_cache hands every rerun fresh copies
+    return copy.deepcopy(records)
+
+
+def test_edit_from_another_session_shows_after_version_bump():
+    state = {}
+    session_index(state, "leads", rerun(LEADS), 1, date_field="added")
+
+    edited = rerun(LEADS)
+    edited[0]["status"] = "Hot"
+    index = session_index(state, "leads", edited, 2, date_field="added")
+
+    assert [r["id"] for r in index.search("", "Hot")] == ["1", "3"]
+    assert index.search("ann")[0] is edited[0]
+    assert index.search("ann")[0]["status"] == "Hot"
+
+
+def test_reused_index_returns_this_reruns_records():
+    state = {}
+    session_index(state, "leads", rerun(LEADS), 1, date_field="added")
+
+    records = rerun(LEADS)
+    index = session_index(state, "leads", records, 1, date_field="added")
+    assert index.search("bob")[0] is records[1]
+
+    # An in-session tag edit, staged but not flushed yet
+    records[1]["tags"] = ["Auto Loan"]
+    reindex(state, "leads", [records[1]])
+    assert index.search("bob")[0]["tags"] == ["Auto Loan"]
+
+
+def test_in_session_status_edit_is_searchable():
+    state = {}
+    records = rerun(LEADS)
+    index = session_index(state, "leads", records, 1, date_field="added")
+    records[1]["status"] = "Hot"
+    reindex(state, "leads", [records[1]])
+
+    assert [r["id"] for r in index.search("", "Hot")] == ["2", "3"]
+    assert index.search("", "New") == [records[0]]
+
+
+class NoWalk(list):
+    # A record list that fails if anything iterates over it
+    def __iter__(self):
+        raise AssertionError("walked every record")
+
+
+def test_reused_index_does_not_walk_the_records():
+    state = {}
+    session_index(state, "leads", rerun(LEADS), 1, date_field="added")
+
+    records = NoWalk(rerun(LEADS))
+    index = session_index(state, "leads", records, 1, date_field="added")
+    assert index.search("cy")[0] is records[2]
+    assert [r["id"] for r in index.search("", "New")] == ["1", "2"]
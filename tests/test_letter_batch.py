@@ -0,0 +1,29 @@
+import io
+import zipfile
+
+from letter_batch import render_batch
+
+
+def job(name, creditor):
+    return {
+        "name": name,
+        "consumer_info": {"name": name.replace("_", " "), "address": "12 Main St"},
+        "items": [{"creditor_name": creditor, "balance": 1200, "status": "Charge-Off"}],
+        "bureaus": {"Equifax": "Equifax\nP.O. Box 740256"},
+    }
+
+
+def test_consumers_with_the_same_name_get_their_own_entries():
+    out = io.BytesIO()
+    stats = render_batch([job("Jane_Doe", "CAPITAL ONE"), job("Jane_Doe", "DISCOVER"), job("a/b", "CHASE")],
+                         out, workers=1)
+    assert stats["consumers"] == 3 and stats["letters"] == 3
+
+    with zipfile.ZipFile(out) as archive:
+        names = archive.namelist()
+        assert sorted(names) == [
+            "0001_Jane_Doe_dispute_letters.pdf",
+            "0002_Jane_Doe_dispute_letters.pdf",
+            "0003_a_b_dispute_letters.pdf",
+        ]
+        assert archive.read(names[0]) != archive.read(names[1])
@@ -0,0 +1,26 @@
+import sqlite3
+import time
+
+from log_rotation import LogRotator
+
+
+def test_rotator_survives_a_failed_pass(tmp_path, monkeypatch, caplog):
+    passes = []
+
+    def rotate(self):
+        passes.append(time.monotonic())
+        if len(passes) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return 0
+
+    monkeypatch.setattr(LogRotator, "rotate", rotate)
+    rotator = LogRotator(tmp_path / "app.db", tmp_path / "logs", interval=0.02).start()
+    try:
+        deadline = time.monotonic() + 10
+        while len(passes) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(passes) >= 2
+        assert rotator._thread.is_alive()
+        assert "database is locked" in caplog.text
+    finally:
+        rotator.stop(timeout=5)
@@ -0,0 +1,39 @@
+import io
+
+import pytest
+import requests
+from PIL import Image
+
+import logo_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(logo_cache, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(logo_cache, "_failed", {})
+    monkeypatch.setattr(logo_cache, "_inflight", set())
+    return tmp_path / "cache"
+
+
+def png(size=(1000, 400)):
+    out = io.BytesIO()
+    Image.new("RGB", size, "red").save(out, format="PNG")
+    return out.getvalue()
+
+
+def test_normalize_logo_leaves_only_the_png(cache_dir):
+    digest, path = logo_cache.normalize_logo(png())
+    assert path == cache_dir / f"{digest}.png"
+    assert [p.name for p in cache_dir.iterdir()] == [path.name]
+    assert Image.open(path).size == (420, 168)
+
+
+def test_failed_fetch_is_recorded_not_printed(cache_dir, monkeypatch, capsys):
+    def refuse(url, headers=None, timeout=None):
+        raise requests.ConnectionError("no route to host")
+
+    monkeypatch.setattr(logo_cache.requests, "get", refuse)
+    assert logo_cache.prefetch_logo("https://logos.example.test/a.png") is None
+    assert logo_cache.logo_error("https://logos.example.test/a.png") == "no route to host"
+    assert capsys.readouterr().out == ""
+    assert not cache_dir.exists() or not any(cache_dir.iterdir())
@@ -0,0 +1,93 @@
+import io
+import json
+
+import mismo
+from mismo import _records, convert_cached, load_report, read_header
+
+LIABILITIES = 2000
+
+
+def liability(i):
+    return (f'<CREDIT_LIABILITY BorrowerID="B1" _AccountIdentifier="A{i}" _UnpaidBalanceAmount="{i}" '
+            f'_AccountReportedDate="2024-10"><_CREDITOR _Name="BANK {i}"/>'
+            f'<_CURRENT_RATING _Type="AsAgreed"/></CREDIT_LIABILITY>')
+
+
+def merged(responses=2):
+    # BORROWER and CREDIT_SCORE are siblings of many liabilities, before and after them
+    parts = ['<RESPONSE_GROUP><RESPONSE><RESPONSE_DATA>']
+    for r in range(responses):
+        parts.append('<CREDIT_RESPONSE>')
+        parts.append('<BORROWER BorrowerID="C1" _FirstName="JANE" _LastName="ROE" _PrintPositionType="CoBorrower"/>')
+        parts.append('<BORROWER BorrowerID="B1" _FirstName="JOHN" _LastName="DOE" _PrintPositionType="Borrower">'
+                     '<_RESIDENCE _StreetAddress="1 MAIN ST" _City="SPRINGFIELD" _State="IL" '
+                     'BorrowerResidencyType="Current"/></BORROWER>')
+        parts.extend(liability(r * LIABILITIES + i) for i in range(LIABILITIES))
+        for bureau, value in (("Equifax", 640), ("Experian", 655), ("TransUnion", 628)):
+            parts.append(f'<CREDIT_SCORE BorrowerID="B1" CreditRepositorySourceType="{bureau}" _Value="{value}"/>')
+        parts.append('<CREDIT_SCORE BorrowerID="C1" CreditRepositorySourceType="Equifax" _Value="790"/>')
+        parts.append('</CREDIT_RESPONSE>')
+    parts.append('</RESPONSE_DATA></RESPONSE></RESPONSE_GROUP>')
+    return io.BytesIO("\n".join(parts).encode())
+
+
+def test_header_survives_pruning_of_many_liabilities():
+    header = read_header(merged())
+    info = header["consumer_info"]
+    assert info["name"] == "JOHN DOE"
+    assert info["address"] == "1 MAIN ST, SPRINGFIELD, IL"
+    # Both responses' primary-borrower scores, none of the co-borrower's
+    assert sorted(s["score"] for s in info["scores"]) == [628, 628, 640, 640, 655, 655]
+    assert info["credit_score"] == 640
+
+
+def test_records_keep_their_children_and_siblings_are_pruned():
+    seen = 0
+    for tag, elem in _records(merged(), {"BORROWER", "CREDIT_LIABILITY", "CREDIT_SCORE"}):
+        if tag == "BORROWER" and elem.get("BorrowerID") == "B1":
+            assert len(elem) == 1  # its _RESIDENCE child is intact
+        if tag == "CREDIT_LIABILITY":
+            assert [c.tag for c in elem] == ["_CREDITOR", "_CURRENT_RATING"]
+            seen += 1
+    assert seen == 2 * LIABILITIES
+
+
+def test_parent_does_not_accumulate_finished_records(monkeypatch):
+    # Watch the CREDIT_RESPONSE element that every liability is parsed into
+    opened = {}
+    iterparse = mismo.ET.iterparse
+
+    def watching(fp, events):
+        for event, elem in iterparse(fp, events):
+            if event == "start":
+                opened.setdefault(elem.tag, elem)
+            yield event, elem
+
+    monkeypatch.setattr(mismo.ET, "iterparse", watching)
+    widest = 0
+    for _ in _records(merged(responses=1), {"CREDIT_LIABILITY"}):
+        widest = max(widest, len(opened["CREDIT_RESPONSE"]))
+    # iterparse builds elements one read block ahead of the events we see, so
+    # a few dozen siblings can be present at once, but never the whole file
+    assert widest < LIABILITIES // 10
+
+
+def test_load_report_reads_every_liability():
+    report = load_report(merged())
+    assert report["consumer_info"]["credit_score"] == 640
+    assert len(report["tradelines"]) == 2 * LIABILITIES
+    assert report["tradelines"][5]["creditor_name"] == "BANK 5"
+
+
+def test_converted_upload_is_cached_by_content(tmp_path, monkeypatch):
+    expected = load_report(merged(1))
+    with convert_cached(merged(1), tmp_path) as f:
+        assert json.load(f) == expected
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("re-parsed a cached upload")
+
+    monkeypatch.setattr(mismo.ET, "iterparse", no_parse)
+    with convert_cached(merged(1), tmp_path) as f:
+        assert json.load(f) == expected
+    assert [p.suffix for p in tmp_path.iterdir()] == [".json"]
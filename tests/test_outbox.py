@@ -0,0 +1,131 @@
+import smtplib
+import sqlite3
+import time
+
+import outbox
+from outbox import MAX_ATTEMPTS, OutboxWorker
+from storage import get_db
+
+
+class FakeSMTP:
+    # Local stand-in for smtplib.SMTP; recipients starting "perm" / "temp" are refused with 550 / 451,
+    # and "boom" raises a non-SMTP error
+    connections = []
+
+    def __init__(self, host, port, timeout=None):
+        self.logins = 0
+        self.sent = []
+        self.closed = False
+        FakeSMTP.connections.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        self.logins += 1
+
+    def send_message(self, message):
+        to = message["To"]
+        if to.startswith("perm"):
+            raise smtplib.SMTPRecipientsRefused({to: (550, b"5.1.1 no such user")})
+        if to.startswith("temp"):
+            raise smtplib.SMTPRecipientsRefused({to: (451, b"4.7.1 try again later")})
+        if to.startswith("boom"):
+            raise RuntimeError("unexpected")
+        self.sent.append(to)
+
+    def quit(self):
+        self.closed = True
+
+    close = quit
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_outbox_against_fake_smtp(tmp_path):
+    FakeSMTP.connections = []
+    path = tmp_path / "app.db"
+    db = get_db(path)
+    worker = OutboxWorker("smtp.test", 587, "agency@test", "secret", rate=1000, db_path=path,
+                          smtp_factory=FakeSMTP).start()
+    try:
+        worker.send([
+            ("a@test", "Hello", "body"),
+            ("perm@test", "Hello", "body"),
+            ("temp@test", "Hello", "body"),
+            ("b@test", "Hello", "body"),
+        ])
+
+        def settled():
+            rows = db.execute("SELECT status, attempts FROM outbox").fetchall()
+            return all(r["attempts"] > 0 for r in rows)
+        assert wait_for(settled)
+    finally:
+        worker.stop(timeout=5)
+
+    rows = {r["recipient"]: (r["status"], r["attempts"], r["last_error"])
+            for r in db.execute("SELECT recipient, status, attempts, last_error FROM outbox")}
+    assert rows["a@test"][:2] == ("sent", 1)
+    assert rows["b@test"][:2] == ("sent", 1)
+    # A permanent 5xx is not retried; a transient 4xx goes back in the queue with backoff
+    assert rows["perm@test"][:2] == ("failed", 1)
+    assert rows["temp@test"][:2] == ("queued", 1) and "451" in rows["temp@test"][2]
+    assert db.execute("SELECT next_attempt FROM outbox WHERE recipient = 'temp@test'").fetchone()[0] > time.time()
+
+    # One connection and one login for the whole batch, refusals included
+    assert len(FakeSMTP.connections) == 1
+    assert FakeSMTP.connections[0].logins == 1
+    assert FakeSMTP.connections[0].sent == ["a@test", "b@test"]
+
+    logged = {r["recipient"] for r in db.execute("SELECT recipient FROM email_log")}
+    assert logged == {"a@test", "b@test"}
+
+
+def test_worker_survives_bad_rows_and_a_locked_database(tmp_path, monkeypatch):
+    FakeSMTP.connections = []
+    monkeypatch.setattr(outbox, "BACKOFF_BASE", 0.05)
+    real_log_email = outbox.log_email
+    calls = []
+
+    def locked_once(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return real_log_email(*args)
+
+    monkeypatch.setattr(outbox, "log_email", locked_once)
+    path = tmp_path / "app.db"
+    db = get_db(path)
+    worker = OutboxWorker("smtp.test", 587, "agency@test", "secret", rate=1000, db_path=path,
+                          smtp_factory=FakeSMTP).start()
+    try:
+        worker.send([
+            ("a@test", "Hello", "body"),
+            ("c@test\r\nBcc: x@test", "Hello", "body"),
+            ("b@test", "Hi\nthere", "body"),
+            ("boom@test", "Hello", "body"),
+            ("d@test", "Hello", "body"),
+        ])
+
+        def settled():
+            return not db.execute("SELECT 1 FROM outbox WHERE status = 'queued'").fetchone()
+        assert wait_for(settled)
+        assert worker._thread.is_alive()
+    finally:
+        worker.stop(timeout=5)
+
+    rows = {r["recipient"].split("\r")[0]: (r["status"], r["attempts"])
+            for r in db.execute("SELECT recipient, status, attempts FROM outbox")}
+    # Header injection fails at once; the non-SMTP error is retried up to MAX_ATTEMPTS, then failed
+    assert rows == {"a@test": ("sent", 1), "c@test": ("failed", 1), "b@test": ("failed", 1),
+                    "boom@test": ("failed", MAX_ATTEMPTS), "d@test": ("sent", 1)}
+    # The locked log write did not make a.test get the mail twice
+    assert sum(c.sent.count("a@test") for c in FakeSMTP.connections) == 1
+    assert {r["recipient"] for r in db.execute("SELECT recipient FROM email_log")} == {"a@test", "d@test"}
@@ -0,0 +1,81 @@
+import pytest
+
+from pdf_report import _clean, parse_rows
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("$1,200.50", 1200.5),
+    ("$ 2,000", 2000),
+    ("-$450", -450),
+    ("$-450", -450),
+    ("None, account current", "None, account current"),
+    (",", ","),
+    ("N/A", "N/A"),
+])
+def test_money_fields(value, expected):
+    assert _clean("balance", value) == expected
+
+
+def test_unparseable_money_keeps_the_raw_text():
+    # Matches the pattern but is not a float
+    assert _clean("past_due", "--5") == "--5"
+
+
+def test_past_due_with_a_comma_does_not_crash():
+    report = parse_rows(["Accounts", "CAPITAL ONE", "Past Due: None, account current", "Status: Open"])
+    assert report["tradelines"] == [
+        {"creditor_name": "CAPITAL ONE", "past_due": "None, account current", "status": "Open"}
+    ]
+
+
+@pytest.mark.parametrize("rows, expected", [
+    (["Credit Score: N/A"], 0),
+    (["Credit Score: N/A", "VantageScore 3.0: 702"], 702),
+    (["FICO Score 8\t655"], 655),
+])
+def test_credit_score_is_always_an_int(rows, expected):
+    assert parse_rows(["Personal Information", "Name: JANE DOE"] + rows)["consumer_info"]["credit_score"] == expected
+
+
+def test_account_blocks():
+    report = parse_rows([
+        "Personal Information",
+        "Name: JANE DOE",
+        "Address: 12 MAIN ST",
+        "SPRINGFIELD, IL 62701",
+        "Accounts (2)",
+        "CAPITAL ONE",
+        "Account Number: 1234XXXX",
+        "Balance: $1,200.50",
+        "Credit Limit\t$2,000",
+        "Status: Open",
+        "Date Reported: 03/15/2025",
+        "Remarks: Paid as agreed",
+        "since opening",
+        "Account Number: 9876XXXX",
+        "Balance: $0",
+        "Collections",
+        "MIDLAND CREDIT",
+        "Original Creditor: COMENITY",
+        "Amount: $450",
+        "Inquiries",
+        "DISCOVER BANK",
+    ])
+    assert report["consumer_info"] == {
+        "name": "JANE DOE", "address": "12 MAIN ST, SPRINGFIELD, IL 62701", "credit_score": 0,
+    }
+    assert report["tradelines"] == [
+        {
+            "creditor_name": "CAPITAL ONE",
+            "account_number": "1234XXXX",
+            "balance": 1200.5,
+            "credit_limit": 2000,
+            "status": "Open",
+            "last_reported": "2025-03-15",
+            "remarks": "Paid as agreed since opening",
+        },
+        {"creditor_name": "CAPITAL ONE", "account_number": "9876XXXX", "balance": 0},
+    ]
+    assert report["collections"] == [
+        {"agency_name": "MIDLAND CREDIT", "original_creditor": "COMENITY", "amount": 450},
+    ]
@@ -0,0 +1,62 @@
+import io
+import json
+from datetime import datetime
+
+from report_store import daily_score_averages, snapshot_path, store_report, sync_daily_scores
+from storage import get_db
+
+NOW = datetime(2025, 4, 24, 10, 30)
+
+
+def report(name, score):
+    return io.BytesIO(json.dumps({"consumer_info": {"name": name, "credit_score": score},
+                                  "tradelines": [], "collections": []}).encode())
+
+
+def manifest(db, consumer):
+    return db.execute("SELECT report_count, latest_timestamp, latest_score FROM report_manifest WHERE consumer = ?",
+                      (consumer,)).fetchone()
+
+
+def test_two_uploads_in_the_same_minute_keep_their_own_snapshots(tmp_path):
+    db = get_db(tmp_path / "app.db")
+    first, _ = store_report(db, tmp_path / "stored", "Jane_Doe", report("Jane Doe", 600), 600, NOW)
+    second, _ = store_report(db, tmp_path / "stored", "Jane_Doe", report("Jane Doe", 650), 650, NOW)
+
+    assert first["digest"] != second["digest"]
+    for entry, score in ((first, 600), (second, 650)):
+        path = snapshot_path(tmp_path / "stored", "Jane_Doe", entry["timestamp"], entry["digest"])
+        assert entry["digest"] in str(path)
+        with open(path) as f:
+            assert json.load(f)["consumer_info"]["credit_score"] == score
+    assert tuple(manifest(db, "Jane_Doe"))[0] == 2
+
+
+def test_repointing_a_missing_snapshot_fixes_the_old_consumers_manifest(tmp_path):
+    db = get_db(tmp_path / "app.db")
+    storage = tmp_path / "stored"
+    store_report(db, storage, "Jane_Doe", report("Jane Doe", 600), 600, datetime(2025, 4, 1, 9, 0))
+    moved, _ = store_report(db, storage, "Jane_Doe", report("Jane Doe", 700), 700, datetime(2025, 4, 2, 9, 0))
+    assert tuple(manifest(db, "Jane_Doe")) == (2, "2025-04-02_09-00", 700)
+
+    snapshot_path(storage, "Jane_Doe", moved["timestamp"], moved["digest"]).unlink()
+    entry, is_new = store_report(db, storage, "J_Doe", report("Jane Doe", 700), 700, datetime(2025, 4, 3, 9, 0))
+
+    assert is_new and entry["consumer"] == "J_Doe"
+    assert tuple(manifest(db, "Jane_Doe")) == (1, "2025-04-01_09-00", 600)
+    assert tuple(manifest(db, "J_Doe")) == (1, "2025-04-03_09-00", 700)
+    assert db.execute("SELECT value FROM counters WHERE name = 'reports'").fetchone()[0] == 2
+
+
+def test_non_numeric_scores_do_not_count_towards_daily_averages(tmp_path):
+    db = get_db(tmp_path / "app.db")
+    for minute, score in enumerate((700, "N/A", None, 650.5)):
+        store_report(db, tmp_path / "stored", "Jane_Doe", report("Jane Doe", score), score, NOW.replace(minute=minute))
+    assert daily_score_averages(db) == [("2025-04-24", 675.25)]
+
+    # The backfill agrees with the incremental counts
+    with db:
+        db.execute("DELETE FROM daily_scores")
+        db.execute("DELETE FROM meta WHERE key LIKE 'daily_scores_built%'")
+    sync_daily_scores(db)
+    assert daily_score_averages(db) == [("2025-04-24", 675.25)]
@@ -0,0 +1,79 @@
+import io
+import json
+
+import pytest
+
+from report_stream import ITEM_SECTIONS, iter_report, open_report
+
+CHUNK_SIZES = (1, 2, 3, 4, 5, 7, 8, 16, 64 * 1024)
+
+DOCUMENTS = [
+    {"a": 1.5, "tradelines": []},
+    {"consumer_info": {"name": "Zoë Ångström", "credit_score": 612.5, "ssn": "123-45-6789"},
+     "tradelines": [{"creditor_name": "BANK", "balance": 1e3, "credit_limit": -2.5e-2, "past_due": 0},
+                    {"creditor_name": "CARD", "balance": 12345678901234, "status": "Late 30 days"}],
+     "collections": [{"agency_name": "COLL", "amount": 10.25, "remarks": "naïve € \"quoted\""}],
+     "score": -17, "flags": [True, False, None], "ratio": 3.0E+2},
+    {"tradelines": [1, 22, 333.5, -4e1, {"x": [0.5, 6]}], "z": 0, "collections": [], "tail": 9.75},
+    {},
+]
+
+
+def stream(doc):
+    return io.BytesIO(json.dumps(doc, ensure_ascii=False).encode())
+
+
+def rebuild(fp, chunk_size):
+    # iter_report's events folded back into a dict, for comparing with json.load
+    out = {}
+    for key, value in iter_report(fp, chunk_size=chunk_size):
+        if key in ITEM_SECTIONS:
+            out.setdefault(key, []).append(value)
+        else:
+            out[key] = value
+    return out
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("doc", DOCUMENTS)
+def test_matches_json_load(doc, chunk_size):
+    expected = json.load(stream(doc))
+    for section in ITEM_SECTIONS:
+        if expected.get(section) == []:
+            del expected[section]  # empty arrays yield no items
+    assert rebuild(stream(doc), chunk_size) == expected
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_text_stream_matches_json_load(chunk_size):
+    doc = DOCUMENTS[1]
+    assert rebuild(io.StringIO(json.dumps(doc)), chunk_size) == json.loads(json.dumps(doc))
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_non_array_sections_are_skipped(chunk_size):
+    fp = stream({"consumer_info": {"name": "A"}, "tradelines": None, "collections": {"bad": 1}, "after": 2.5})
+    header, items = open_report(fp, chunk_size=chunk_size)
+    assert list(items) == []
+    assert header == {"consumer_info": {"name": "A"}, "after": 2.5}
+
+
+@pytest.mark.parametrize("chunk_size", (1, 4, 64 * 1024))
+@pytest.mark.parametrize("text", [
+    '{"tradelines": [1 2]}',
+    '{"tradelines": [1,,2]}',
+    '{"tradelines": [,1]}',
+    '{"tradelines": [1,]}',
+    '{"a": 1 "b": 2}',
+    '{"a": 1,, "b": 2}',
+    '{, "a": 1}',
+    '{"a": 1,}',
+    '{"a": 1',
+    '{"tradelines": [1, 2',
+    '{1: 2}',
+])
+def test_malformed_documents_raise(text, chunk_size):
+    with pytest.raises(ValueError):
+        list(iter_report(io.BytesIO(text.encode()), chunk_size=chunk_size))
+    with pytest.raises(ValueError):
+        json.loads(text)
@@ -0,0 +1,123 @@
+import random
+from datetime import date, datetime
+
+import pytest
+
+from scoring import score_items
+
+# Scalar reference implementations: the per-item loops the rule sets replaced
+TODAY = date(2025, 6, 15)
+
+
+def tools_reference(item):
+    score, breakdown = 0, []
+    status = item["status"].lower()
+    if "charge" in status:
+        score += 3
+        breakdown.append("+3 Charge-Off")
+    if "collection" in status:
+        score -= 2
+        breakdown.append("-2 Collection")
+    if item.get("balance", 0) > 1000:
+        score -= 1
+        breakdown.append("-1 High Balance")
+    if "late" in status:
+        score -= 1
+        breakdown.append("-1 Late")
+    if "closed" in status:
+        score += 1
+        breakdown.append("+1 Closed Account")
+    return score, breakdown
+
+
+def dispute_reference(item):
+    score, breakdown = 0, []
+    status = item.get("status", "N/A")
+    balance = item.get("balance", item.get("amount", 0))
+    if "charge" in status.lower():
+        score += 3
+        breakdown.append("+3 Charge-off")
+    if "late" in status.lower():
+        score += 2
+        breakdown.append("+2 Late payments")
+    if balance and balance > 1000:
+        score += 2
+        breakdown.append("+2 High balance")
+    if "collection" in item.get("remarks", "").lower():
+        score += 2
+        breakdown.append("+2 Collection remark")
+    if not breakdown:
+        breakdown.append("0 – No indicators")
+    return score, breakdown
+
+
+def chatbot_reference(item, category):
+    reported = datetime.strptime(item["last_reported"], "%Y-%m-%d")
+    months_old = (TODAY.year - reported.year) * 12 + (TODAY.month - reported.month)
+    score, breakdown = 0, []
+    if months_old > 12:
+        score += 2
+        breakdown.append("+2: Older than 12 months")
+    else:
+        score += 1
+        breakdown.append("+1: Recent negative reporting")
+    if category == "tradelines":
+        if item["balance"] > item.get("credit_limit", 1):
+            score += 2
+            breakdown.append("+2: Balance exceeds limit")
+        if "charge" in item["status"].lower() or "off" in item["status"].lower():
+            score += 3
+            breakdown.append("+3: Account charged off")
+        if "late" in item["status"].lower():
+            score += 2
+            breakdown.append("+2: Multiple late payments")
+    if category == "collections":
+        score += 3
+        breakdown.append("+3: Collection account")
+        if months_old < 6:
+            score += 1
+            breakdown.append("+1: Recently added")
+    return score, breakdown
+
+
+STATUSES = ["Current", "Late 30", "Charge-Off", "Closed", "In Collection", "Paid off", "closed - late", "CHARGED OFF"]
+REMARKS = ["", "Sent to collection agency", "Disputed by consumer"]
+
+
+def random_items(count, seed):
+    rng = random.Random(seed)
+    items = []
+    for _ in range(count):
+        item = {
+            "creditor_name": f"Creditor {rng.randrange(50)}",
+            "balance": rng.choice([0, 250, 999, 1000, 1001, rng.randrange(20000), round(rng.uniform(0, 5000), 2)]),
+            "status": rng.choice(STATUSES),
+            "remarks": rng.choice(REMARKS),
+            "last_reported": date.fromordinal(TODAY.toordinal() - rng.randrange(1200)).isoformat(),
+        }
+        if rng.random() < 0.7:
+            item["credit_limit"] = rng.choice([500, 1000, 5000])
+        items.append(item)
+    return items
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_tools_and_dispute_match_the_scalar_loops(seed):
+    items = random_items(600, seed)
+    for rule_set, reference in (("tools", tools_reference), ("dispute", dispute_reference)):
+        scores, breakdowns = score_items(items, rule_set, breakdown=True, today=TODAY)
+        assert [(int(s), b) for s, b in zip(scores, breakdowns)] == [reference(i) for i in items], rule_set
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_chatbot_matches_the_scalar_loop(seed):
+    items = random_items(600, seed)
+    categories = ["collections" if i % 3 == 0 else "tradelines" for i in range(len(items))]
+    scores, breakdowns = score_items(items, "chatbot", categories, breakdown=True, today=TODAY)
+    expected = [chatbot_reference(item, category) for item, category in zip(items, categories)]
+    assert [(int(s), b) for s, b in zip(scores, breakdowns)] == expected
+
+
+def test_empty_batch():
+    scores, breakdowns = score_items([], "dispute", breakdown=True)
+    assert len(scores) == 0 and breakdowns == []
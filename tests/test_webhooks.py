@@ -0,0 +1,101 @@
+import time
+
+import webhooks
+from storage import get_db
+from webhooks import BATCH_FORMAT, WebhookDispatcher, emit, webhook_counts
+
+URL = "https://hooks.example.test/catch"
+
+
+class FakeResponse:
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.text = text
+        self.headers = {}
+
+
+class FakeSession:
+    # Records every POST; `respond(body)` decides the status code
+    def __init__(self, respond=lambda body: 200):
+        self.respond = respond
+        self.posts = []
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.posts.append((json, headers))
+        return FakeResponse(self.respond(json))
+
+
+def statuses(db):
+    return {r["event"]: (r["status"], r["attempts"]) for r in db.execute("SELECT event, status, attempts FROM webhook_events")}
+
+
+def test_single_event_is_posted_as_one_object(tmp_path):
+    db = get_db(tmp_path / "app.db")
+    emit(db, URL, "lead.created", {"name": "Ann"}, key="k1")
+    emit(db, URL, "lead.updated", {"name": "Ann B"}, key="k2")
+    session = FakeSession()
+    WebhookDispatcher(tmp_path / "app.db", session=session)._deliver_due(db)
+
+    assert [body["event"] for body, _ in session.posts] == ["lead.created", "lead.updated"]
+    body, headers = session.posts[0]
+    assert body["payload"] == {"name": "Ann"}
+    assert headers == {"Idempotency-Key": "k1"}
+    assert webhook_counts(db)["delivered"] == 2
+
+
+def test_batches_use_the_versioned_envelope(tmp_path):
+    db = get_db(tmp_path / "app.db")
+    for i in range(3):
+        emit(db, URL, f"e{i}", {"i": i})
+    session = FakeSession()
+    WebhookDispatcher(tmp_path / "app.db", session=session, batch_size=5)._deliver_due(db)
+
+    [(body, headers)] = session.posts
+    assert body["format"] == BATCH_FORMAT
+    assert [e["event"] for e in body["events"]] == ["e0", "e1", "e2"]
+    assert headers == {"X-Webhook-Format": BATCH_FORMAT}
+
+
+def test_rejected_batch_is_settled_per_event(tmp_path):
+    db = get_db(tmp_path / "app.db")
+    for name in ("good", "bad", "flaky"):
+        emit(db, URL, name, {})
+
+    def respond(body):
+        if "events" in body:
+            return 400
+        return {"good": 200, "bad": 422, "flaky": 503}[body["event"]]
+
+    session = FakeSession(respond)
+    WebhookDispatcher(tmp_path / "app.db", session=session, batch_size=5)._deliver_due(db)
+
+    assert len(session.posts) == 4
+    assert statuses(db) == {"good": ("delivered", 1), "bad": ("failed", 1), "flaky": ("queued", 1)}
+
+
+def test_worker_survives_a_failed_pass(tmp_path, monkeypatch):
+    monkeypatch.setattr(webhooks, "IDLE_POLL", 0.05)
+    calls = []
+
+    def respond(body):
+        calls.append(body)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return 200
+
+    path = tmp_path / "app.db"
+    dispatcher = WebhookDispatcher(path, session=FakeSession(respond)).start()
+    try:
+        dispatcher.emit(URL, "lead.created", {})
+        deadline = time.monotonic() + 10
+        while webhook_counts(get_db(path))["delivered"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert dispatcher._thread.is_alive()
+        assert webhook_counts(get_db(path))["delivered"] == 1
+        assert len(calls) == 2
+    finally:
+        dispatcher.stop(timeout=5)
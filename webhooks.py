@@ -0,0 +1,191 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from storage import DB_PATH, get_db
+
+# --- Outbound webhook dispatcher ---
+# Events are written to `webhook_events` with an idempotency key, unique
+# per URL, so emitting the same event again (e.g. on every Streamlit rerun)
+# is a no-op. A background thread delivers them over one keep-alive
+# requests.Session with timeouts. Each event is POSTed on its own as the
+# {"event", "payload", ...} object receivers have always been sent.
+# Batching is opt-in per dispatcher (batch_size > 1). Batches use a
+# versioned envelope, {"format": BATCH_FORMAT, "events": [...]}, plus an
+# X-Webhook-Format header, so a receiver can never mistake one for a single
+# event. Each event carries its key so receivers can drop the rare
+# redelivery after a lost response. Delivery state (attempts, status,
+# errors) is kept per event. If a receiver rejects a batch, its events are
+# settled one at a time, so one bad event cannot fail the rest. Failures
+# are retried with backoff.
+
+BATCH_SIZE = 1             # events per POST; 1 keeps the single-object body
+BATCH_FORMAT = "events-batch/1"
+MAX_BATCH_SIZE = 20
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 15          # seconds before the first retry; doubles per attempt
+BACKOFF_MAX = 60 * 60
+TIMEOUT = (3.05, 10)       # (connect, read) seconds
+IDLE_POLL = 30
+
+_dispatchers = {}
+_dispatchers_lock = threading.Lock()
+log = logging.getLogger(__name__)
+
+
+def emit(db, url, event, payload, key=None):
+    # Queues one event; returns False if an event with this key was already queued for url
+    if not url:
+        return False
+    key = key or f"{event}:{uuid.uuid4()}"
+    with db:
+        cur = db.execute(
+            "INSERT OR IGNORE INTO webhook_events (url, event, payload, idempotency_key, created) VALUES (?, ?, ?, ?, ?)",
+            (url, event, json.dumps(payload), key, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        )
+    return cur.rowcount > 0
+
+
+def _body(row):
+    return {
+        "event": row["event"],
+        "payload": json.loads(row["payload"]),
+        "idempotency_key": row["idempotency_key"],
+        "occurred": row["created"],
+    }
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+class WebhookDispatcher:
+    def __init__(self, db_path=DB_PATH, session=None, batch_size=BATCH_SIZE):
+        self.db_path = db_path
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.session = session or requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        self.session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="webhooks", daemon=True)
+            self._thread.start()
+        return self
+
+    def emit(self, url, event, payload, key=None):
+        queued = emit(get_db(self.db_path), url, event, payload, key)
+        if queued:
+            self._wake.set()
+        return queued
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        db = get_db(self.db_path)
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                if self._deliver_due(db):
+                    continue
+                upcoming = db.execute(
+                    "SELECT MIN(next_attempt) FROM webhook_events WHERE status = 'queued'"
+                ).fetchone()[0]
+                wait = IDLE_POLL if upcoming is None else min(IDLE_POLL, max(0.0, upcoming - time.time()))
+            except Exception:
+                # A failed pass (locked database, unexpected response) must not end the thread
+                log.exception("webhook delivery pass failed")
+                wait = IDLE_POLL
+            self._wake.wait(wait)
+
+    def _deliver_due(self, db):
+        # Delivers one round of due events; False when none were due
+        due = db.execute(
+            "SELECT id, url, event, payload, idempotency_key, attempts, created FROM webhook_events "
+            "WHERE status = 'queued' AND next_attempt <= ? ORDER BY id LIMIT ?",
+            (time.time(), MAX_BATCH_SIZE * 4),
+        ).fetchall()
+        if not due:
+            return False
+        by_url = {}
+        for row in due:
+            by_url.setdefault(row["url"], []).append(row)
+        for url, rows in by_url.items():
+            for i in range(0, len(rows), self.batch_size):
+                if self._stop.is_set():
+                    return True
+                self._deliver(db, url, rows[i:i + self.batch_size])
+        return True
+
+    def _deliver(self, db, url, rows):
+        if len(rows) == 1:
+            body, headers = _body(rows[0]), {"Idempotency-Key": rows[0]["idempotency_key"]}
+        else:
+            body = {"format": BATCH_FORMAT, "events": [_body(r) for r in rows]}
+            headers = {"X-Webhook-Format": BATCH_FORMAT}
+        retry_after = None
+        try:
+            response = self.session.post(url, json=body, headers=headers, timeout=TIMEOUT)
+        except requests.RequestException as e:
+            error, permanent = str(e), False
+        else:
+            if response.ok:
+                with db:
+                    db.executemany(
+                        "UPDATE webhook_events SET status = 'delivered', attempts = attempts + 1, delivered = ?, "
+                        "last_error = NULL WHERE id = ?",
+                        [(datetime.now().strftime("%Y-%m-%d %H:%M:%S"), r["id"]) for r in rows],
+                    )
+                return
+            error = f"HTTP {response.status_code}: {response.text[:200]}"
+            # Client errors other than timeout / rate limiting won't succeed on retry
+            permanent = 400 <= response.status_code < 500 and response.status_code not in (408, 425, 429)
+            retry_after = _retry_after(response)
+            if permanent and len(rows) > 1:
+                # The receiver refused the batch; settle each event on its own
+                for r in rows:
+                    self._deliver(db, url, [r])
+                return
+
+        with db:
+            for r in rows:
+                attempts = r["attempts"] + 1
+                delay = retry_after or min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+                db.execute(
+                    "UPDATE webhook_events SET status = ?, attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                    ("failed" if permanent or attempts >= MAX_ATTEMPTS else "queued", attempts,
+                     time.time() + delay, error[:500], r["id"]),
+                )
+
+
+def webhook_counts(db):
+    counts = {"queued": 0, "delivered": 0, "failed": 0}
+    counts.update({status: n for status, n in db.execute("SELECT status, COUNT(*) FROM webhook_events GROUP BY status")})
+    return counts
+
+
+def get_dispatcher(db_path=DB_PATH):
+    # One running dispatcher per database for the whole process
+    key = str(db_path)
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(key)
+        if dispatcher is None:
+            dispatcher = _dispatchers[key] = WebhookDispatcher(db_path)
+        return dispatcher.start()
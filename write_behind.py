@@ -0,0 +1,36 @@
+from storage import write_rows
+
+# --- Write-behind for widget edits ---
+# Pages used to write widget values straight to the database while they
+# rendered: a transaction per ticked to-do, per edited lead or per saved
+# status. Lead rows were also rewritten on every rerun whenever their saved
+# tags were not among the tag options. Pages now stage edits here instead.
+# Each edit is compared with the record as loaded, and only fields that
+# really changed are kept, so a widget redrawn with its saved value stages
+# nothing. Edits to the same row within a rerun are coalesced. flush()
+# writes them all at the end of the rerun in one transaction, and a rerun
+# with no edits never opens one.
+
+
+class WriteBehind:
+    def __init__(self):
+        self._pending = {}  # (table, key) -> {field: value}
+
+    def update(self, table, key, record, **fields):
+        # Stages the fields that differ from `record` and applies them to it; True if any did
+        changed = {k: v for k, v in fields.items() if record.get(k) != v}
+        if changed:
+            self._pending.setdefault((table, key), {}).update(changed)
+            record.update(changed)
+        return bool(changed)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def flush(self, db):
+        # Writes and clears everything staged; returns the number of rows written
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        write_rows(db, pending)
+        return len(pending)